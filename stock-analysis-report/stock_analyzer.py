@@ -7,6 +7,7 @@ and stores them in a local knowledge base.
 """
 
 import os
+import sys
 import json
 import argparse
 from datetime import datetime
@@ -29,6 +30,19 @@ except ImportError:
             "Please install: pip install perplexityai"
         )
 
+# Reuse the knowledge base storage helpers from the sibling stock-analysis package
+# (report storage in any codec or backend) when it is available
+_STOCK_ANALYSIS_DIR = Path(__file__).resolve().parent.parent / "stock-analysis"
+if _STOCK_ANALYSIS_DIR.exists() and str(_STOCK_ANALYSIS_DIR) not in sys.path:
+    sys.path.insert(0, str(_STOCK_ANALYSIS_DIR))
+
+try:
+    from src.kb_tools.kb_archive import KBArchive
+    from src.kb_tools.report_tools import ReportTools
+    KB_TOOLS_AVAILABLE = True
+except ImportError:
+    KB_TOOLS_AVAILABLE = False
+
 # Load environment variables
 load_dotenv()
 
@@ -294,12 +308,18 @@ class StockAnalysisGenerator:
         Returns:
             Path to the saved file
         """
-        ticker = report["ticker"]
-        analysis_date = report["analysis_date"]
-        storage_path = self._get_storage_path(ticker, analysis_date)
-        
-        with open(storage_path, "w", encoding="utf-8") as f:
-            json.dump(report, f, indent=2, ensure_ascii=False)
+        if KB_TOOLS_AVAILABLE:
+            # Keeps the ticker manifest and search index in sync with the file
+            storage_path = ReportTools(self.knowledge_base_dir).save_report(report)
+        else:
+            storage_path = self._get_storage_path(report["ticker"], report["analysis_date"])
+            # Write to a temp file and rename so a crash never leaves a truncated report
+            temp_path = storage_path.with_name(f".{storage_path.name}.tmp")
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, storage_path)
         
         print(f"Report saved to: {storage_path}")
         return storage_path
@@ -315,12 +335,20 @@ class StockAnalysisGenerator:
         Returns:
             Report dictionary if found, None otherwise
         """
+        if KB_TOOLS_AVAILABLE:
+            # Resolves the stored file whatever its codec (json, json-compact, msgpack-zstd)
+            return ReportTools(self.knowledge_base_dir).read_report(ticker, analysis_date)
+        
         storage_path = self._get_storage_path(ticker, analysis_date)
         
         if not storage_path.exists():
             return None
         
-        with open(storage_path, "r", encoding="utf-8") as f:
+        return self._read_report_file(storage_path)
+    
+    def _read_report_file(self, file_path: Path) -> Dict[str, Any]:
+        """Parse a JSON report file (used when the knowledge base tools are unavailable)."""
+        with open(file_path, "r", encoding="utf-8") as f:
             return json.load(f)
     
     def list_reports(self, ticker: Optional[str] = None) -> list:
@@ -342,7 +370,23 @@ class StockAnalysisGenerator:
                 return reports
             search_dirs = [ticker_dir]
         else:
-            search_dirs = [d for d in self.knowledge_base_dir.iterdir() if d.is_dir()]
+            search_dirs = [d for d in self.knowledge_base_dir.iterdir() if d.is_dir() and not d.name.startswith("_")]
+        
+        if KB_TOOLS_AVAILABLE:
+            # Reports may live in a segment log rather than in year directories
+            tools = ReportTools(self.knowledge_base_dir)
+            for ticker_dir in search_dirs:
+                for date in tools.list_report_dates(ticker_dir.name):
+                    report = tools.read_report(ticker_dir.name, date)
+                    entry = tools.manifest_store.entry(ticker_dir.name, date)
+                    if report and entry:
+                        reports.append({
+                            "ticker": report.get("ticker"),
+                            "analysis_date": report.get("analysis_date"),
+                            "generated_at": report.get("generated_at"),
+                            "file_path": str(self.knowledge_base_dir / entry["path"])
+                        })
+            return sorted(reports, key=lambda x: x.get("analysis_date", ""), reverse=True)
         
         for ticker_dir in search_dirs:
             for year_dir in ticker_dir.iterdir():
@@ -350,15 +394,14 @@ class StockAnalysisGenerator:
                     continue
                 for report_file in year_dir.glob("*.json"):
                     try:
-                        with open(report_file, "r", encoding="utf-8") as f:
-                            report = json.load(f)
-                            reports.append({
-                                "ticker": report.get("ticker"),
-                                "analysis_date": report.get("analysis_date"),
-                                "generated_at": report.get("generated_at"),
-                                "file_path": str(report_file)
-                            })
-                    except (json.JSONDecodeError, KeyError):
+                        report = self._read_report_file(report_file)
+                        reports.append({
+                            "ticker": report.get("ticker"),
+                            "analysis_date": report.get("analysis_date"),
+                            "generated_at": report.get("generated_at"),
+                            "file_path": str(report_file)
+                        })
+                    except (json.JSONDecodeError, IOError, KeyError):
                         continue
         
         return sorted(reports, key=lambda x: x.get("analysis_date", ""), reverse=True)
@@ -393,12 +436,62 @@ def main():
     list_parser.add_argument("--ticker", help="Filter by ticker symbol")
     list_parser.add_argument("--kb-dir", default="./knowledge_base", help="Knowledge base directory")
     
+    # Migrate command
+    migrate_parser = subparsers.add_parser("migrate", help="Convert stored reports to another storage codec")
+    migrate_parser.add_argument("codec", choices=["json", "json-compact", "msgpack-zstd"], help="Target storage codec")
+    migrate_parser.add_argument("--kb-dir", default="./knowledge_base", help="Knowledge base directory")
+    
+    # Export command
+    export_parser = subparsers.add_parser("export", help="Stream the knowledge base to a JSONL or tar archive")
+    export_parser.add_argument("output", help="Archive path (.jsonl, .jsonl.gz, .tar, .tar.gz) or - for stdout")
+    export_parser.add_argument("--format", choices=["jsonl", "tar"], help="Archive format (default: from the file name)")
+    export_parser.add_argument("--ticker", action="append", help="Only export this ticker (repeatable)")
+    export_parser.add_argument("--no-indexes", action="store_true", help="Leave out the graph index nodes")
+    export_parser.add_argument("--kb-dir", default="./knowledge_base", help="Knowledge base directory")
+    
+    # Import command
+    import_parser = subparsers.add_parser("import", help="Load a knowledge base archive written by export")
+    import_parser.add_argument("source", help="Archive path or - for stdin")
+    import_parser.add_argument("--format", choices=["jsonl", "tar"], help="Archive format (default: from the file name)")
+    import_parser.add_argument("--batch-size", type=int, default=200, help="Reports saved per batch")
+    import_parser.add_argument("--no-indexes", action="store_true", help="Skip graph index nodes in the archive")
+    import_parser.add_argument("--kb-dir", default="./knowledge_base", help="Knowledge base directory")
+    
     args = parser.parse_args()
     
     if not args.command:
         parser.print_help()
         return
     
+    if args.command in ("migrate", "export", "import"):
+        # Storage maintenance does not need an API key
+        if not KB_TOOLS_AVAILABLE:
+            print(f"Error: {args.command} requires the stock-analysis package next to this script")
+            return 1
+    
+    if args.command == "export":
+        stats = KBArchive(ReportTools(args.kb_dir)).export(
+            args.output, archive_format=args.format, tickers=args.ticker, include_indexes=not args.no_indexes
+        )
+        if args.output != "-":
+            print(f"Exported {stats['reports']} report(s) and {stats['index_nodes']} index node(s) to {args.output}")
+        return 0
+    
+    if args.command == "import":
+        stats = KBArchive(ReportTools(args.kb_dir)).import_archive(
+            args.source, archive_format=args.format, batch_size=args.batch_size, include_indexes=not args.no_indexes
+        )
+        print(f"Imported {stats['reports']} report(s) and {stats['index_nodes']} index node(s) "
+              f"({stats['skipped']} skipped)")
+        return 0
+    
+    if args.command == "migrate":
+        stats = ReportTools(args.kb_dir).migrate_storage(args.codec)
+        print(f"Migrated {stats['migrated']} report(s) to {args.codec} "
+              f"({stats['unchanged']} unchanged, {stats['failed']} failed)")
+        print(f"Size: {stats['bytes_before']} -> {stats['bytes_after']} bytes")
+        return 0
+    
     try:
         kb_dir = getattr(args, "kb_dir", "./knowledge_base")
         generator = StockAnalysisGenerator(knowledge_base_dir=kb_dir)
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Benchmark report storage codecs.
+
+Encodes a set of reports with every available codec and reports the on-disk size
+and the time to load (read + decode) all of them, relative to the legacy
+pretty-printed JSON format.
+
+Usage:
+    python benchmarks/bench_codecs.py                      # 500 synthetic reports
+    python benchmarks/bench_codecs.py --reports 2000
+    python benchmarks/bench_codecs.py --kb-dir ./knowledge_base
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.kb_tools.report_codec import (  # noqa: E402
+    BINARY_CODEC_AVAILABLE,
+    CODECS,
+    MSGPACK_ZSTD_CODEC,
+    decode_report,
+    encode_report,
+    iter_report_files,
+)
+from synthetic_kb import make_dates, make_report, make_ticker  # noqa: E402
+
+
+def load_reports(kb_dir: Path, limit: int):
+    """Load up to `limit` reports from an existing knowledge base."""
+    reports = []
+    for ticker_dir in sorted(kb_dir.iterdir()):
+        if not ticker_dir.is_dir() or ticker_dir.name.startswith("_"):
+            continue
+        for year_dir in sorted(p for p in ticker_dir.iterdir() if p.is_dir()):
+            for _, report_file in iter_report_files(year_dir):
+                reports.append(decode_report(report_file.read_bytes()))
+                if len(reports) >= limit:
+                    return reports
+    return reports
+
+
+def synthetic_reports(count: int):
+    """Generate `count` synthetic reports spread over tickers and dates."""
+    dates = make_dates(10)
+    return [make_report(make_ticker(i // len(dates)), dates[i % len(dates)]) for i in range(count)]
+
+
+def bench_codec(codec: str, reports, work_dir: Path, repeat: int):
+    """Write reports with one codec, then time loading them back."""
+    codec_dir = work_dir / codec
+    codec_dir.mkdir()
+    paths = []
+    total_bytes = 0
+    for i, report in enumerate(reports):
+        data, _ = encode_report(report, codec)
+        path = codec_dir / f"{i}.bin"
+        path.write_bytes(data)
+        paths.append(path)
+        total_bytes += len(data)
+
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for path in paths:
+            decode_report(path.read_bytes())
+        best = min(best, time.perf_counter() - start)
+    return total_bytes, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark report storage codecs")
+    parser.add_argument("--reports", type=int, default=500, help="Number of reports to benchmark")
+    parser.add_argument("--kb-dir", help="Use reports from an existing knowledge base instead of synthetic ones")
+    parser.add_argument("--repeat", type=int, default=3, help="Load passes per codec (best time is reported)")
+    args = parser.parse_args()
+
+    reports = load_reports(Path(args.kb_dir), args.reports) if args.kb_dir else synthetic_reports(args.reports)
+    if not reports:
+        print("No reports found.")
+        return 1
+
+    codecs = [c for c in CODECS if c != MSGPACK_ZSTD_CODEC or BINARY_CODEC_AVAILABLE]
+    if not BINARY_CODEC_AVAILABLE:
+        print("msgpack/zstandard not installed, skipping msgpack-zstd\n")
+
+    print(f"{len(reports)} reports\n")
+    print(f"{'codec':<14}{'total size':>14}{'vs json':>10}{'load time':>12}{'vs json':>10}{'per report':>14}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        baseline = None
+        for codec in codecs:
+            size, seconds = bench_codec(codec, reports, Path(tmp), args.repeat)
+            baseline = baseline or (size, seconds)
+            print(
+                f"{codec:<14}{size / 1024:>11.1f} KB{size / baseline[0]:>9.2f}x"
+                f"{seconds * 1000:>9.1f} ms{seconds / baseline[1]:>9.2f}x"
+                f"{seconds / len(reports) * 1e6:>11.1f} us"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
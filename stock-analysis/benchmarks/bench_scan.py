@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Benchmark parallel full-scan search.
+
+Builds a synthetic knowledge base (10k reports by default) and times
+ReportTools.search_reports(full_scan=True) for thread and process pools at
+increasing worker counts, printing the resulting scaling curve.
+
+Usage:
+    python benchmarks/bench_scan.py
+    python benchmarks/bench_scan.py --reports 2000 --workers 1 2 4
+    python benchmarks/bench_scan.py --kb-dir /tmp/bench_kb --keep   # reuse between runs
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.kb_tools.fs_utils import atomic_write_bytes  # noqa: E402
+from src.kb_tools.report_cache import get_report_cache  # noqa: E402
+from src.kb_tools.report_codec import codec_suffix, encode_report  # noqa: E402
+from src.kb_tools.report_tools import ReportTools  # noqa: E402
+from synthetic_kb import make_dates, make_report, make_ticker  # noqa: E402
+
+REPORTS_PER_TICKER = 10
+
+
+def build_kb(kb_dir: Path, count: int, codec: str) -> None:
+    """Write `count` synthetic report files (report files only, no indexes)."""
+    dates = make_dates(REPORTS_PER_TICKER)
+    existing = sum(1 for _ in kb_dir.glob("*/*/*_*.*"))
+    if existing >= count:
+        print(f"Reusing {existing} reports in {kb_dir}")
+        return
+
+    print(f"Writing {count} synthetic reports to {kb_dir} ...")
+    start = time.perf_counter()
+    for i in range(count):
+        ticker = make_ticker(i // REPORTS_PER_TICKER)
+        analysis_date = dates[i % REPORTS_PER_TICKER]
+        data, _ = encode_report(make_report(ticker, analysis_date), codec)
+        path = kb_dir / ticker / analysis_date[:4] / f"{ticker}_{analysis_date}{codec_suffix(codec)}"
+        atomic_write_bytes(path, data)
+    print(f"Done in {time.perf_counter() - start:.1f}s\n")
+
+
+def time_scan(kb_dir: Path, executor: str, workers: int, keywords, repeat: int):
+    """Return (best seconds, match count) for one pool configuration."""
+    report_tools = ReportTools(kb_dir, scan_workers=workers, scan_executor=executor)
+    best = float("inf")
+    matches = 0
+    for _ in range(repeat):
+        # Measure cold reads, not the shared report cache
+        get_report_cache().clear()
+        start = time.perf_counter()
+        # limit=None: time the whole scan, not a top-k page of it
+        matches = len(report_tools.search_reports(keywords=keywords, full_scan=True, limit=None))
+        best = min(best, time.perf_counter() - start)
+    return best, matches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark parallel full-scan search")
+    parser.add_argument("--reports", type=int, default=10000, help="Number of synthetic reports")
+    parser.add_argument("--kb-dir", help="Directory for the synthetic knowledge base (default: temp dir)")
+    parser.add_argument("--keep", action="store_true", help="Keep the synthetic knowledge base")
+    parser.add_argument("--codec", default="json", help="Storage codec of the synthetic reports")
+    parser.add_argument("--workers", type=int, nargs="+", help="Worker counts to test")
+    parser.add_argument("--executors", nargs="+", default=["thread", "process"], help="Pool types to test")
+    parser.add_argument("--keywords", nargs="+", default=["semiconductor tariff"], help="Keywords to search")
+    parser.add_argument("--repeat", type=int, default=2, help="Runs per configuration (best time is reported)")
+    args = parser.parse_args()
+
+    kb_dir = Path(args.kb_dir) if args.kb_dir else Path(tempfile.mkdtemp(prefix="kb_bench_"))
+    kb_dir.mkdir(parents=True, exist_ok=True)
+    cpu_count = os.cpu_count() or 1
+    worker_counts = args.workers or sorted({1, 2, 4, 8, cpu_count})
+
+    try:
+        build_kb(kb_dir, args.reports, args.codec)
+        print(f"{args.reports} reports, keywords={args.keywords}, {cpu_count} CPUs\n")
+        print(f"{'executor':<10}{'workers':>8}{'time':>10}{'reports/s':>12}{'speedup':>9}{'matches':>9}")
+
+        expected_matches = None
+        for executor in args.executors:
+            baseline = None
+            for workers in worker_counts:
+                seconds, matches = time_scan(kb_dir, executor, workers, args.keywords, args.repeat)
+                if not 0 < matches <= args.reports:
+                    raise SystemExit(f"Scan returned {matches} matches for {args.reports} reports")
+                if expected_matches is not None and matches != expected_matches:
+                    raise SystemExit(f"{executor}/{workers} returned {matches} matches, expected {expected_matches}")
+                expected_matches = matches
+                baseline = baseline or seconds
+                print(
+                    f"{executor:<10}{workers:>8}{seconds:>9.2f}s{args.reports / seconds:>12.0f}"
+                    f"{baseline / seconds:>8.2f}x{matches:>9}"
+                )
+    finally:
+        if not args.keep and not args.kb_dir:
+            shutil.rmtree(kb_dir, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
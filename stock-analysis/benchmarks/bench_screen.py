@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Benchmark cross-sectional stock screens.
+
+Fills a metrics store with synthetic reports (5k tickers x 4 reports by default)
+and times Screener.screen for a few typical filter/sort combinations.
+
+Usage:
+    python benchmarks/bench_screen.py
+    python benchmarks/bench_screen.py --tickers 20000 --reports-per-ticker 2
+"""
+
+import argparse
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.kb_tools.metrics_store import MetricsStore  # noqa: E402
+from src.kb_tools.screener import Screener  # noqa: E402
+from synthetic_kb import make_dates, make_report, make_ticker  # noqa: E402
+
+SCREENS = [
+    ("forward P/E < 20, growth > 0", ["pe_forward < 20", "revenue_growth_yoy_pct > 0"], "pe_forward", False),
+    ("cheapest on EV/EBITDA", [], "ev_to_ebitda", False),
+    ("best 1y return with P/E < 30", ["pe_ttm < 30"], "return_1y_pct", True),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark metrics-store stock screens")
+    parser.add_argument("--tickers", type=int, default=5000, help="Number of synthetic tickers")
+    parser.add_argument("--reports-per-ticker", type=int, default=4, help="Reports per ticker")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per screen (best is reported)")
+    args = parser.parse_args()
+
+    kb_dir = Path(tempfile.mkdtemp(prefix="bench_screen_"))
+    try:
+        store = MetricsStore(kb_dir)
+        dates = make_dates(args.reports_per_ticker)
+        start = time.perf_counter()
+        store.append_many(
+            make_report(make_ticker(i), d) for i in range(args.tickers) for d in dates
+        )
+        print(f"Loaded {args.tickers * len(dates)} reports in {time.perf_counter() - start:.1f}s\n")
+
+        screener = Screener(store)
+        print(f"{'screen':<32} {'matches':>8} {'best ms':>9}")
+        for name, filters, sort_by, descending in SCREENS:
+            best = float("inf")
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                result = screener.screen(filters, sort_by=sort_by, descending=descending, limit=20)
+                best = min(best, (time.perf_counter() - started) * 1000)
+            print(f"{name:<32} {result['count']:>8} {best:>9.2f}")
+    finally:
+        shutil.rmtree(kb_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Compare the files and segments report storage backends.
+
+Saves the same synthetic reports (5k by default) with each backend and times the
+batched save, cold random reads of single reports and of one section, and a
+listing of every stored report, along with the number of files created.
+
+Usage:
+    python benchmarks/bench_segments.py
+    python benchmarks/bench_segments.py --reports 20000 --reads 2000
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.kb_tools.report_cache import get_report_cache  # noqa: E402
+from src.kb_tools.report_tools import ReportTools  # noqa: E402
+from synthetic_kb import make_dates, make_report, make_ticker  # noqa: E402
+
+REPORTS_PER_TICKER = 10
+BATCH_SIZE = 500
+
+
+def run_backend(backend: str, reports, reads: int):
+    """Return timings (seconds) and file count for one backend."""
+    kb_dir = Path(tempfile.mkdtemp(prefix=f"bench_{backend}_"))
+    try:
+        report_tools = ReportTools(kb_dir, backend=backend)
+        started = time.perf_counter()
+        for start in range(0, len(reports), BATCH_SIZE):
+            report_tools.save_reports(reports[start:start + BATCH_SIZE])
+        save = time.perf_counter() - started
+
+        sample = random.Random(0).sample(reports, min(reads, len(reports)))
+        cache = get_report_cache()
+
+        cache.clear()
+        started = time.perf_counter()
+        for report in sample:
+            report_tools.read_report(report["ticker"], report["analysis_date"])
+        read = (time.perf_counter() - started) / len(sample)
+
+        cache.clear()
+        started = time.perf_counter()
+        for report in sample:
+            report_tools.read_report(report["ticker"], report["analysis_date"], sections=["valuation"])
+        section = (time.perf_counter() - started) / len(sample)
+
+        started = time.perf_counter()
+        listed = sum(1 for _ in report_tools._iter_report_files())
+        listing = time.perf_counter() - started
+
+        files = sum(len(names) for _, _, names in os.walk(kb_dir))
+        return save, read, section, listing, listed, files
+    finally:
+        shutil.rmtree(kb_dir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare report storage backends")
+    parser.add_argument("--reports", type=int, default=5000, help="Number of synthetic reports")
+    parser.add_argument("--reads", type=int, default=500, help="Random reads to time")
+    args = parser.parse_args()
+
+    # Durability is the same for both backends; measure storage layout, not fsync latency
+    os.environ.setdefault("KB_WRITE_FSYNC", "0")
+
+    dates = make_dates(REPORTS_PER_TICKER)
+    reports = [
+        make_report(make_ticker(i // REPORTS_PER_TICKER), dates[i % REPORTS_PER_TICKER])
+        for i in range(args.reports)
+    ]
+
+    print(f"{'backend':<10} {'save s':>8} {'read ms':>9} {'section ms':>11} {'list ms':>9} {'files':>7}")
+    for backend in ("files", "segments"):
+        save, read, section, listing, listed, files = run_backend(backend, reports, args.reads)
+        assert listed == len(reports)
+        print(f"{backend:<10} {save:>8.2f} {read * 1000:>9.3f} {section * 1000:>11.3f} "
+              f"{listing * 1000:>9.1f} {files:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""Synthetic report generator for knowledge base benchmarks"""
+
+import random
+from datetime import date, timedelta
+from typing import Dict, Any, List
+
+WORDS = (
+    "cloud ai growth margin regulatory competition chips semiconductor retail consumer "
+    "energy oil bank lending biotech pharma tariff china europe platform subscription "
+    "advertising payments logistics pricing demand supply inventory guidance buyback"
+).split()
+
+INDUSTRIES = [
+    "Technology hardware and software",
+    "Consumer retail and e-commerce",
+    "Integrated energy producer",
+    "Commercial banking and lending",
+    "Biotechnology and pharmaceuticals",
+]
+
+
+def make_ticker(i: int) -> str:
+    """Return a deterministic synthetic ticker symbol (T0000, T0001, ...)."""
+    return f"T{i:04d}"
+
+
+def make_report(ticker: str, analysis_date: str) -> Dict[str, Any]:
+    """
+    Build a synthetic report following the schema in docs/perplexity-stock-analysis-prompt.md.
+
+    Args:
+        ticker: Ticker symbol
+        analysis_date: Analysis date (YYYY-MM-DD)
+
+    Returns:
+        Report dictionary
+    """
+    rng = random.Random(f"{ticker}/{analysis_date}")
+
+    def words(n: int) -> str:
+        return " ".join(rng.choice(WORDS) for _ in range(n))
+
+    def pct(low: float, high: float) -> float:
+        return round(rng.uniform(low, high), 2)
+
+    return {
+        "ticker": ticker,
+        "analysis_date": analysis_date,
+        "generated_at": f"{analysis_date}T08:00:00",
+        "model": "sonar-pro",
+        "analysis": {
+            "meta": {
+                "ticker": ticker,
+                "company_name": f"{ticker} Holdings Inc.",
+                "exchange": "NASDAQ",
+                "report_date": analysis_date,
+                "currency": "USD",
+                "data_sources": ["synthetic"],
+            },
+            "price_snapshot": {
+                "current_price": pct(5, 900),
+                "price_change_1d_pct": pct(-5, 5),
+                "price_change_1d_abs": pct(-10, 10),
+                "returns": {
+                    "return_1d_pct": pct(-5, 5),
+                    "return_1m_pct": pct(-15, 15),
+                    "return_3m_pct": pct(-25, 25),
+                    "return_1y_pct": pct(-40, 80),
+                },
+                "relative_to_index": words(12),
+                "relative_to_peers": words(12),
+            },
+            "executive_summary": {
+                "core_thesis": words(15),
+                "bull_points": [words(10) for _ in range(3)],
+                "bear_points": [words(10) for _ in range(3)],
+                "summary": words(45),
+            },
+            "company_overview": {
+                "business_description": words(40),
+                "revenue_streams": [words(6) for _ in range(3)],
+                "geographic_exposure": {"north_america": "50%", "europe": "25%", "asia_pacific": "25%"},
+                "recent_strategic_actions": [words(12) for _ in range(3)],
+            },
+            "fundamentals": {
+                "growth": {
+                    "commentary": words(30),
+                    "revenue_growth_yoy_pct": pct(-10, 40),
+                    "drivers": [words(6) for _ in range(3)],
+                    "headwinds": [words(6) for _ in range(2)],
+                },
+                "profitability": {
+                    "gross_margin_pct": pct(20, 80),
+                    "operating_margin_pct": pct(-5, 40),
+                    "net_margin_pct": pct(-5, 30),
+                    "commentary": words(25),
+                },
+                "balance_sheet": {
+                    "net_debt_to_ebitda": pct(0, 4),
+                    "current_ratio": pct(0.5, 3),
+                    "commentary": words(20),
+                },
+            },
+            "industry_and_competition": {
+                "industry_description": f"{rng.choice(INDUSTRIES)}. {words(20)}",
+                "structural_trends": [words(8) for _ in range(3)],
+                "key_competitors": [
+                    {"name": f"{make_ticker(rng.randrange(10000))} Holdings Inc.", "market_position": words(8)}
+                    for _ in range(3)
+                ],
+                "moat_and_pricing_power": words(20),
+            },
+            "catalysts": [
+                {
+                    "name": words(4),
+                    "timeframe": rng.choice(["short", "medium", "long"]),
+                    "description": words(20),
+                    "expected_impact": rng.choice(["positive", "negative", "mixed"]),
+                    "impact_channel": ["revenue", "margin"],
+                }
+                for _ in range(3)
+            ],
+            "risks": [
+                {
+                    "name": words(3),
+                    "category": rng.choice(["business", "regulatory", "financial", "macro"]),
+                    "description": words(20),
+                    "likelihood_commentary": words(10),
+                    "impact_commentary": words(10),
+                }
+                for _ in range(3)
+            ],
+            "valuation": {
+                "overall_assessment": words(30),
+                "multiples": {"pe_ttm": pct(5, 80), "pe_forward": pct(5, 60), "ev_to_ebitda": pct(3, 40)},
+                "relative_to_peers": rng.choice(["premium", "discount", "in_line"]),
+                "scenarios": {
+                    "bull_case": {"narrative": words(25), "price_target": pct(100, 1000)},
+                    "base_case": {"narrative": words(25), "price_target": pct(50, 800)},
+                    "bear_case": {"narrative": words(25), "price_target": pct(10, 500)},
+                },
+            },
+            "informational_stance": {
+                "recommendation": rng.choice(["buy", "hold", "sell"]),
+                "description": words(25),
+                "timeframe": "medium",
+                "key_reasons": [words(10) for _ in range(3)],
+            },
+        },
+        "usage": {"prompt_tokens": 1500, "completion_tokens": 3000, "total_tokens": 4500},
+    }
+
+
+def make_dates(count: int, start: str = "2025-01-06", step_days: int = 7) -> List[str]:
+    """Return `count` analysis dates spaced `step_days` apart."""
+    first = date.fromisoformat(start)
+    return [(first + timedelta(days=step_days * i)).isoformat() for i in range(count)]
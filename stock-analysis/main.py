@@ -17,6 +17,11 @@ sys.path.insert(0, str(Path(__file__).parent))
 
 from src.chat_agent import ChatAgent
 from src.index_manager import IndexManager
+from src.index_worker import IndexWorker
+from src.kb_tools.change_feed import ChangeFeed
+from src.kb_tools.index_tools import IndexTools
+from src.kb_tools.kb_archive import KBArchive
+from src.kb_tools.report_tools import ReportTools
 
 # Load environment variables
 load_dotenv()
@@ -29,15 +34,77 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-def initialize_knowledge_base(kb_dir: Path):
-    """Initialize knowledge base with root index."""
+def initialize_knowledge_base(kb_dir: Path, full: bool = False):
+    """Initialize knowledge base with root index (re-reading only changed tickers unless full)."""
     logger.info("Initializing knowledge base...")
     index_manager = IndexManager(kb_dir)
-    root_index = index_manager.initialize_root_index()
+    root_index = index_manager.initialize_root_index(full=full)
     logger.info(f"Knowledge base initialized with {root_index.get('stock_count', 0)} stocks")
     return root_index
 
 
+def rebuild_indexes(kb_dir: Path, workers: int = None, resume: bool = True):
+    """Rebuild every stock, topic, date and root index node from the reports, printing progress."""
+    logger.info("Rebuilding index nodes...")
+    
+    def progress(stats):
+        done, total, elapsed = stats["done"], stats["tickers"], stats["elapsed"]
+        rate = (done - stats["resumed"]) / elapsed if elapsed else 0.0
+        eta = (total - done) / rate if rate else 0.0
+        print(
+            f"\r[{done}/{total}] {stats['reports']} report(s), {rate:.1f} tickers/s, ETA {eta:.0f}s",
+            end="", file=sys.stderr, flush=True
+        )
+    
+    stats = IndexManager(kb_dir).rebuild_indexes(workers=workers, resume=resume, progress=progress)
+    if stats["done"] > stats["resumed"]:
+        print(file=sys.stderr)
+    return stats
+
+
+def drain_index_feed(kb_dir: Path):
+    """Apply every queued index update from the change feed."""
+    worker = IndexWorker(kb_dir)
+    logger.info(f"Applying {worker.change_feed.pending()} queued index update(s)...")
+    worker.drain()
+    return worker.stats()
+
+
+def rebuild_manifests(kb_dir: Path):
+    """Rebuild every ticker manifest from the report files on disk."""
+    logger.info("Rebuilding ticker manifests...")
+    counts = ReportTools(kb_dir).rebuild_manifests()
+    logger.info(f"Rebuilt {len(counts)} manifests covering {sum(counts.values())} reports")
+    return counts
+
+
+def rebuild_metrics(kb_dir: Path):
+    """Rebuild the numeric metrics store from the report files on disk."""
+    logger.info("Rebuilding metrics store...")
+    count = ReportTools(kb_dir).rebuild_metrics()
+    logger.info(f"Extracted metrics from {count} reports")
+    return count
+
+
+def rebuild_vectors(kb_dir: Path):
+    """Re-embed every report section for semantic search."""
+    logger.info("Rebuilding vector index...")
+    count = ReportTools(kb_dir).rebuild_vector_index()
+    logger.info(f"Embedded {count} report sections")
+    return count
+
+
+def migrate_storage(kb_dir: Path, codec: str):
+    """Convert every stored report to another storage codec."""
+    logger.info(f"Migrating reports to {codec}...")
+    stats = ReportTools(kb_dir).migrate_storage(codec)
+    logger.info(
+        f"Migrated {stats['migrated']} reports ({stats['unchanged']} unchanged, {stats['failed']} failed): "
+        f"{stats['bytes_before']} -> {stats['bytes_after']} bytes"
+    )
+    return stats
+
+
 def chat_mode(kb_dir: Path, openrouter_key: str = None, perplexity_key: str = None, model: str = "openai/gpt-4o-mini"):
     """Run in interactive chat mode."""
     print("=" * 80)
@@ -59,31 +126,35 @@ def chat_mode(kb_dir: Path, openrouter_key: str = None, perplexity_key: str = No
     
     chat_history = []
     
-    while True:
-        try:
-            user_input = input("\nYou: ").strip()
-            
-            if user_input.lower() in ['quit', 'exit', 'q']:
-                print("\nGoodbye!")
+    try:
+        while True:
+            try:
+                user_input = input("\nYou: ").strip()
+                
+                if user_input.lower() in ['quit', 'exit', 'q']:
+                    print("\nGoodbye!")
+                    break
+                
+                if not user_input:
+                    continue
+                
+                print("\nAgent: ", end="", flush=True)
+                response = agent.chat(user_input, chat_history)
+                print(response)
+                
+                # Add to chat history (simplified)
+                chat_history.append(("human", user_input))
+                chat_history.append(("ai", response))
+                
+            except KeyboardInterrupt:
+                print("\n\nGoodbye!")
                 break
-            
-            if not user_input:
-                continue
-            
-            print("\nAgent: ", end="", flush=True)
-            response = agent.chat(user_input, chat_history)
-            print(response)
-            
-            # Add to chat history (simplified)
-            chat_history.append(("human", user_input))
-            chat_history.append(("ai", response))
-            
-        except KeyboardInterrupt:
-            print("\n\nGoodbye!")
-            break
-        except Exception as e:
-            logger.error(f"Error in chat mode: {e}")
-            print(f"\nError: {e}")
+            except Exception as e:
+                logger.error(f"Error in chat mode: {e}")
+                print(f"\nError: {e}")
+    finally:
+        # Apply index updates still queued by research in this session
+        agent.close()
 
 
 def single_query_mode(kb_dir: Path, query: str, openrouter_key: str = None, perplexity_key: str = None, model: str = "openai/gpt-4o-mini"):
@@ -103,8 +174,54 @@ def single_query_mode(kb_dir: Path, query: str, openrouter_key: str = None, perp
     print(f"Using model: {model}\n")
     print("Response:")
     print("-" * 80)
-    response = agent.chat(query)
-    print(response)
+    try:
+        response = agent.chat(query)
+        print(response)
+    finally:
+        agent.close()
+
+
+def convert_backend(kb_dir: Path, backend: str):
+    """Move every stored report to another storage backend."""
+    logger.info(f"Converting reports to the {backend} backend...")
+    stats = ReportTools(kb_dir).convert_backend(backend)
+    logger.info(f"Converted {stats['converted']} reports ({stats['bytes']} bytes)")
+    return stats
+
+
+def convert_index_store(kb_dir: Path, store: str):
+    """Move every graph index node to JSON files or the SQLite node database."""
+    logger.info(f"Converting index nodes to the {store} store...")
+    count = IndexTools(kb_dir).convert_store(store)
+    logger.info(f"Converted {count} index nodes")
+    return count
+
+
+def compact_segments(kb_dir: Path):
+    """Reclaim space held by overwritten reports in the segment log."""
+    logger.info("Compacting segment log...")
+    stats = ReportTools(kb_dir).compact_storage()
+    logger.info(
+        f"Removed {stats['segments_removed']} segments, moved {stats['records_moved']} reports, "
+        f"reclaimed {stats['bytes_reclaimed']} bytes"
+    )
+    return stats
+
+
+def export_kb(kb_dir: Path, output: str, archive_format: str = None):
+    """Stream every report and graph index node to a JSONL or tar archive."""
+    logger.info(f"Exporting knowledge base to {output}...")
+    return KBArchive(ReportTools(kb_dir)).export(output, archive_format=archive_format)
+
+
+def import_kb(kb_dir: Path, source: str, archive_format: str = None):
+    """Load a JSONL or tar archive in batches and rebuild the derived indexes once."""
+    logger.info(f"Importing knowledge base archive {source}...")
+    stats = KBArchive(ReportTools(kb_dir)).import_archive(source, archive_format=archive_format)
+    if stats["reports"]:
+        # One root index refresh covering every imported ticker (the archive may replace root.json)
+        IndexManager(kb_dir).initialize_root_index(full=True)
+    return stats
 
 
 def main():
@@ -140,14 +257,105 @@ def main():
         action="store_true",
         help="Only initialize knowledge base and exit"
     )
+    parser.add_argument(
+        "--rebuild-root-index",
+        action="store_true",
+        help="Rebuild the root index from the latest report of every ticker and exit"
+    )
+    parser.add_argument(
+        "--rebuild-indexes",
+        action="store_true",
+        help="Rebuild all stock, topic, date and root index nodes from the reports and exit "
+             "(resumes an interrupted run)"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help="Worker processes for --rebuild-indexes (default: CPU count)"
+    )
+    parser.add_argument(
+        "--no-resume",
+        action="store_true",
+        help="Start --rebuild-indexes from scratch instead of resuming an interrupted run"
+    )
+    parser.add_argument(
+        "--index-status",
+        action="store_true",
+        help="Print how far background index updates lag behind saved reports and exit"
+    )
+    parser.add_argument(
+        "--drain-index-feed",
+        action="store_true",
+        help="Apply every queued background index update and exit"
+    )
+    parser.add_argument(
+        "--rebuild-manifests",
+        action="store_true",
+        help="Rebuild per-ticker report manifests from the files on disk and exit"
+    )
+    parser.add_argument(
+        "--rebuild-metrics",
+        action="store_true",
+        help="Rebuild the numeric metrics store from the report files on disk and exit"
+    )
+    parser.add_argument(
+        "--rebuild-vectors",
+        action="store_true",
+        help="Rebuild the semantic search vector index from the reports on disk and exit"
+    )
+    parser.add_argument(
+        "--migrate-codec",
+        choices=["json", "json-compact", "msgpack-zstd"],
+        help="Convert all stored reports to the given storage codec and exit"
+    )
+    parser.add_argument(
+        "--convert-backend",
+        choices=["files", "segments"],
+        help="Move all stored reports to one file per report or to the append-only segment log and exit"
+    )
+    parser.add_argument(
+        "--convert-index-store",
+        choices=["files", "sqlite"],
+        help="Move all graph index nodes to one JSON file per node or to the SQLite node database and exit"
+    )
+    parser.add_argument(
+        "--compact-segments",
+        action="store_true",
+        help="Compact the segment log and exit"
+    )
+    parser.add_argument(
+        "--export",
+        metavar="PATH",
+        help="Stream all reports and index nodes to a .jsonl[.gz] or .tar[.gz] archive ('-' for stdout) and exit"
+    )
+    parser.add_argument(
+        "--import",
+        dest="import_path",
+        metavar="PATH",
+        help="Import a knowledge base archive written by --export ('-' for stdin) and exit"
+    )
+    parser.add_argument(
+        "--archive-format",
+        choices=["jsonl", "tar"],
+        help="Archive format for --export/--import (default: from the file name)"
+    )
     
     args = parser.parse_args()
     
     kb_dir = Path(args.kb_dir)
     kb_dir.mkdir(parents=True, exist_ok=True)
     
+    maintenance_only = (
+        args.init_only or args.rebuild_root_index or args.rebuild_indexes
+        or args.index_status or args.drain_index_feed
+        or args.rebuild_manifests or args.rebuild_metrics or args.rebuild_vectors
+        or args.migrate_codec
+        or args.convert_backend or args.convert_index_store or args.compact_segments
+        or args.export or args.import_path
+    )
+    
     # Check for required API keys
-    if not args.init_only:
+    if not maintenance_only:
         openrouter_key = args.openrouter_key or os.getenv("OPENROUTER_API_KEY")
         perplexity_key = args.perplexity_key or os.getenv("PERPLEXITY_API_KEY")
         
@@ -159,7 +367,51 @@ def main():
             print("Warning: PERPLEXITY_API_KEY not set. Perplexity research will not work.")
     
     try:
-        if args.init_only:
+        if args.export:
+            stats = export_kb(kb_dir, args.export, args.archive_format)
+            if args.export != "-":
+                print(f"Exported {stats['reports']} report(s) and {stats['index_nodes']} index node(s).")
+        elif args.import_path:
+            stats = import_kb(kb_dir, args.import_path, args.archive_format)
+            print(f"Imported {stats['reports']} report(s) and {stats['index_nodes']} index node(s) "
+                  f"({stats['skipped']} skipped).")
+        elif args.convert_backend:
+            stats = convert_backend(kb_dir, args.convert_backend)
+            print(f"Converted {stats['converted']} report(s) to the {args.convert_backend} backend.")
+        elif args.convert_index_store:
+            count = convert_index_store(kb_dir, args.convert_index_store)
+            print(f"Converted {count} index node(s) to the {args.convert_index_store} store.")
+        elif args.compact_segments:
+            stats = compact_segments(kb_dir)
+            print(f"Reclaimed {stats['bytes_reclaimed']} bytes from {stats['segments_removed']} segment(s).")
+        elif args.migrate_codec:
+            stats = migrate_storage(kb_dir, args.migrate_codec)
+            print(f"Migrated {stats['migrated']} report(s) to {args.migrate_codec}.")
+        elif args.rebuild_root_index:
+            root_index = initialize_knowledge_base(kb_dir, full=True)
+            print(f"Rebuilt the root index with {root_index.get('stock_count', 0)} stock(s).")
+        elif args.rebuild_indexes:
+            stats = rebuild_indexes(kb_dir, workers=args.workers, resume=not args.no_resume)
+            print(f"Rebuilt index nodes for {stats['tickers']} ticker(s) and {stats['reports']} report(s) "
+                  f"in {stats['elapsed']:.1f}s ({stats['reports_per_second']:.0f} reports/s).")
+        elif args.index_status:
+            feed = ChangeFeed(kb_dir)
+            lag = feed.lag()
+            print(f"{lag['pending']} index update(s) pending, lag {lag['lag_seconds']:.1f}s, "
+                  f"{feed.dead_letter_count()} dead-lettered.")
+        elif args.drain_index_feed:
+            stats = drain_index_feed(kb_dir)
+            print(f"Applied {stats['applied']} index update(s) in {stats['batches']} batch(es).")
+        elif args.rebuild_manifests:
+            counts = rebuild_manifests(kb_dir)
+            print(f"Rebuilt {len(counts)} ticker manifest(s).")
+        elif args.rebuild_metrics:
+            count = rebuild_metrics(kb_dir)
+            print(f"Extracted metrics from {count} report(s).")
+        elif args.rebuild_vectors:
+            count = rebuild_vectors(kb_dir)
+            print(f"Embedded {count} report section(s).")
+        elif args.init_only:
             initialize_knowledge_base(kb_dir)
             print("Knowledge base initialized successfully.")
         elif args.query:
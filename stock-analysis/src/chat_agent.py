@@ -11,6 +11,7 @@ from langchain_core.runnables import RunnableLambda
 import os
 
 from .kb_manager_agent import KBManagerAgent
+from .kb_tools.entity_index import STOPWORDS
 
 logger = logging.getLogger(__name__)
 
@@ -57,6 +58,11 @@ class ChatAgent:
             openrouter_api_key=openrouter_api_key
         )
         
+        # Company names resolved without an LLM call: every ticker and name in the
+        # knowledge base, plus the common aliases above
+        self.entity_index = self.kb_manager.index_tools.entities
+        self.entity_index.add_aliases(self.TICKER_MAPPINGS)
+        
         # Create agent with KB Manager as tool
         self.tools = self._create_tools()
         self.agent = self._create_agent(model, openrouter_api_key)
@@ -159,9 +165,15 @@ Always be helpful, accurate, and transparent about data sources."""
         """
         query_lower = query.lower()
         
-        # Check explicit ticker patterns
+        # Tickers, company names and aliases known to the knowledge base
+        matches = self.entity_index.find_in_text(query, fuzzy=False)
+        if matches:
+            return matches[0]["ticker"]
+        
+        # Check explicit ticker patterns, only words the user wrote in capitals ("I" and
+        # other stopwords excluded) so ordinary words never read as tickers
         ticker_pattern = r'\b([A-Z]{1,5}(?::[A-Z0-9]+)?)\b'
-        matches = re.findall(ticker_pattern, query.upper())
+        matches = [m for m in re.findall(ticker_pattern, query) if m.lower() not in STOPWORDS]
         if matches:
             return matches[0]
         
@@ -170,6 +182,11 @@ Always be helpful, accurate, and transparent about data sources."""
             if company_name in query_lower:
                 return ticker
         
+        # Misspelled names, only when nothing matched exactly
+        matches = self.entity_index.find_in_text(query)
+        if matches:
+            return matches[0]["ticker"]
+        
         return None
     
     def extract_topics(self, query: str) -> List[str]:
@@ -231,4 +248,7 @@ Always be helpful, accurate, and transparent about data sources."""
         except Exception as e:
             logger.error(f"Error in Chat Agent: {e}")
             return f"I encountered an error processing your query: {str(e)}"
-
+    
+    def close(self) -> None:
+        """Release background resources (applies pending index updates)."""
+        self.kb_manager.close()
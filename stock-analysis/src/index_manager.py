@@ -2,15 +2,41 @@
 
 import json
 import logging
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Callable, Iterator
 from datetime import datetime
 
+from .kb_tools.fs_utils import atomic_write_json
 from .kb_tools.index_tools import IndexTools
+from .kb_tools.manifest import ManifestStore
 from .kb_tools.report_tools import ReportTools
+from .kb_tools.topic_index import report_topics, topic_slug
 
 logger = logging.getLogger(__name__)
 
+# Per-ticker mtimes recorded by the last root index scan, in _indexes/
+WATERMARK_FILE = "root_watermarks.json"
+# Window (ns) before the last scan in which an unchanged mtime is not trusted
+RACY_WINDOW_NS = 2_000_000_000
+# Per-ticker results of an interrupted rebuild_indexes run, in _indexes/
+REBUILD_CHECKPOINT = "rebuild_checkpoint.jsonl"
+
+# ReportTools of each rebuild worker process, keyed by knowledge base directory
+_worker_report_tools: Dict[str, ReportTools] = {}
+
+
+def _rebuild_tickers(kb_dir: str, tickers: List[str]) -> List[Dict[str, Any]]:
+    """Rebuild worker: derive the index entries of a chunk of tickers from their reports."""
+    report_tools = _worker_report_tools.get(kb_dir)
+    if report_tools is None:
+        report_tools = _worker_report_tools[kb_dir] = ReportTools(Path(kb_dir), scan_workers=1, recover=False)
+    return [IndexManager._rebuild_ticker(report_tools, ticker) for ticker in tickers]
+
 
 class IndexManager:
     """Manages graph-based index system initialization and updates."""
@@ -26,55 +52,325 @@ class IndexManager:
         self.index_tools = IndexTools(self.kb_dir)
         self.report_tools = ReportTools(self.kb_dir)
     
-    def initialize_root_index(self) -> Dict[str, Any]:
-        """Initialize or update the root index."""
-        root_index = self.index_tools.read_index(node_id="root")
+    def initialize_root_index(self, full: bool = False) -> Dict[str, Any]:
+        """
+        Initialize or update the root index.
+        
+        Each ticker directory is fingerprinted by the mtimes of the directory, its
+        manifest and its year directories; only tickers whose fingerprint changed since
+        the watermarks stored in ``_indexes/root_watermarks.json`` have their latest
+        report re-read, so startup costs a few stat calls per ticker instead of a
+        report load. Without watermarks (or a root node) every ticker is re-read.
+        
+        Args:
+            full: Re-read the latest report of every ticker (``--rebuild-root-index``)
+            
+        Returns:
+            Root index node
+        """
+        root_index = self.index_tools.read_index(node_id="root", copy=True)
+        exists = bool(root_index)
         
         if not root_index:
-            # Create new root index
-            root_index = {
-                "node_id": "root",
-                "node_type": "root",
-                "summary": "Knowledge base containing stock analysis reports.",
-                "last_updated": datetime.now().isoformat(),
-                "stock_count": 0,
-                "stocks": [],
-                "topics": []
-            }
+            root_index = self._new_root_index()
+        
+        watermarks = None if full or not exists else self._load_watermarks()
+        previous = (watermarks or {}).get("tickers", {})
+        # Changes within RACY_WINDOW_NS of the last scan may share its mtime; re-check them
+        racy_after = (watermarks or {}).get("scanned_at_ns", 0) - RACY_WINDOW_NS
+        scanned_at = time.time_ns()
+        
+        listed = {}
+        if watermarks is not None:
+            listed = {s["ticker"]: s for s in root_index.get("stocks", []) if isinstance(s, dict) and s.get("ticker")}
         
         # Scan knowledge base for stocks
-        stocks = []
-        for ticker_dir in self.kb_dir.iterdir():
+        entries = {}
+        fingerprints = {}
+        reread = 0
+        for ticker_dir in sorted(self.kb_dir.iterdir()):
             if not ticker_dir.is_dir() or ticker_dir.name.startswith("_"):
                 continue
             
             ticker = ticker_dir.name
-            most_recent_report = self.report_tools.read_report(ticker)
+            fingerprint = self._ticker_fingerprint(ticker_dir)
+            known = previous.get(ticker)
+            unchanged = (
+                known is not None
+                and known.get("mtimes") == fingerprint
+                and max(fingerprint) < racy_after
+                and known.get("listed", False) == (ticker in listed)
+            )
             
-            if most_recent_report:
-                analysis = most_recent_report.get("analysis", {})
-                meta = analysis.get("meta", {})
-                
-                stocks.append({
-                    "ticker": ticker,
-                    "company_name": meta.get("company_name", ticker),
-                    "latest_report_date": most_recent_report.get("analysis_date", ""),
-                    "stock_index_id": f"{ticker}_stock_index",
-                    "summary": analysis.get("executive_summary", {}).get("summary", "")[:100] if analysis.get("executive_summary") else ""
-                })
+            if unchanged:
+                if ticker in listed:
+                    entries[ticker] = listed[ticker]
+            else:
+                reread += 1
+                most_recent_report = self.report_tools.read_report(ticker)
+                if most_recent_report:
+                    entries[ticker] = self._root_stock_entry(ticker, most_recent_report)
+            fingerprints[ticker] = {"mtimes": fingerprint, "listed": ticker in entries}
         
-        root_index["stocks"] = stocks
-        root_index["stock_count"] = len(stocks)
-        root_index["last_updated"] = datetime.now().isoformat()
+        # Keep the existing order, appending new tickers
+        stocks = [entries.pop(s["ticker"]) for s in root_index.get("stocks", [])
+                  if isinstance(s, dict) and s.get("ticker") in entries]
+        stocks += [entries[ticker] for ticker in sorted(entries)]
+        logger.info(f"Root index: re-read {reread} of {len(fingerprints)} ticker(s)")
         
-        # Save root index (create if doesn't exist, update if exists)
-        if self.index_tools.read_index(node_id="root"):
-            self.index_tools.update_index("root", root_index)
-        else:
-            self.index_tools.create_index_node("root", root_index)
+        if not exists or stocks != root_index.get("stocks") or root_index.get("stock_count") != len(stocks):
+            root_index["stocks"] = stocks
+            root_index["stock_count"] = len(stocks)
+            root_index["last_updated"] = datetime.now().isoformat()
+            
+            # Save root index (create if doesn't exist, update if exists)
+            if exists:
+                self.index_tools.update_index("root", root_index)
+            else:
+                self.index_tools.create_index_node("root", root_index)
         
+        # Written after the root node, so a crash in between only costs a re-read
+        self._save_watermarks({"scanned_at_ns": scanned_at, "tickers": fingerprints})
         return root_index
     
+    @staticmethod
+    def _new_root_index() -> Dict[str, Any]:
+        return {
+            "node_id": "root",
+            "node_type": "root",
+            "summary": "Knowledge base containing stock analysis reports.",
+            "last_updated": datetime.now().isoformat(),
+            "stock_count": 0,
+            "stocks": [],
+            "topics": []
+        }
+    
+    def rebuild_indexes(
+        self,
+        workers: Optional[int] = None,
+        resume: bool = True,
+        progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+        chunk_size: int = 8
+    ) -> Dict[str, Any]:
+        """
+        Rebuild every stock, topic, date and root index node from the stored reports.
+        
+        Tickers are processed in a process pool; each worker folds a ticker's reports
+        (oldest first, as ingestion would) into its stock node and extracts its root,
+        date and topic entries. Finished tickers are appended to
+        ``_indexes/rebuild_checkpoint.jsonl``, so an interrupted run resumes with the
+        tickers that are missing or changed since. The results are then merged and
+        every node is written once in a single batch; the checkpoint is removed after.
+        
+        Stock nodes keep fields the reports do not derive (e.g. aliases). Stock and
+        topic nodes created by hand for tickers without reports are left alone.
+        
+        Args:
+            workers: Worker processes (defaults to the CPU count; 1 rebuilds inline)
+            resume: Reuse the results of an interrupted run
+            progress: Called after each finished ticker with the stats below
+            chunk_size: Tickers handed to a worker per job
+            
+        Returns:
+            Stats: tickers, done, resumed, reports, elapsed (seconds),
+            tickers_per_second and reports_per_second
+        """
+        started = time.perf_counter()
+        indexes_dir = self.kb_dir / "_indexes"
+        indexes_dir.mkdir(parents=True, exist_ok=True)
+        checkpoint = indexes_dir / REBUILD_CHECKPOINT
+        
+        scanned_at = time.time_ns()
+        tickers = sorted(d.name for d in self.kb_dir.iterdir() if d.is_dir() and not d.name.startswith("_"))
+        fingerprints = {ticker: self._ticker_fingerprint(self.kb_dir / ticker) for ticker in tickers}
+        results = self._load_checkpoint(checkpoint, fingerprints) if resume else {}
+        if not resume and checkpoint.exists():
+            checkpoint.unlink()
+        
+        stats = {
+            "tickers": len(tickers),
+            "done": len(results),
+            "resumed": len(results),
+            "reports": sum(r["reports"] for r in results.values()),
+            "elapsed": 0.0,
+        }
+        resumed_reports = stats["reports"]
+        if results:
+            logger.info(f"Resuming index rebuild: {len(results)} of {len(tickers)} ticker(s) already done")
+        
+        pending = [ticker for ticker in tickers if ticker not in results]
+        with open(checkpoint, "a", encoding="utf-8") as f:
+            for result in self._run_rebuild(pending, workers, chunk_size):
+                ticker = result["ticker"]
+                f.write(json.dumps(dict(result, fingerprint=fingerprints[ticker]), separators=(",", ":")) + "\n")
+                f.flush()
+                results[ticker] = result
+                stats["done"] += 1
+                stats["reports"] += result["reports"]
+                stats["elapsed"] = time.perf_counter() - started
+                if progress:
+                    progress(dict(stats))
+        
+        self._merge_rebuild(tickers, results, fingerprints, scanned_at)
+        checkpoint.unlink()
+        
+        stats["elapsed"] = time.perf_counter() - started
+        processed = stats["done"] - stats["resumed"]
+        stats["tickers_per_second"] = processed / stats["elapsed"] if stats["elapsed"] else 0.0
+        stats["reports_per_second"] = (stats["reports"] - resumed_reports) / stats["elapsed"] if stats["elapsed"] else 0.0
+        logger.info(
+            f"Rebuilt indexes for {stats['tickers']} ticker(s) and {stats['reports']} report(s) "
+            f"in {stats['elapsed']:.1f}s ({stats['tickers_per_second']:.1f} tickers/s)"
+        )
+        return stats
+    
+    def _run_rebuild(self, tickers: List[str], workers: Optional[int], chunk_size: int) -> Iterator[Dict[str, Any]]:
+        """Yield per-ticker rebuild results, from a process pool unless one worker is requested."""
+        workers = max(1, workers or os.cpu_count() or 1)
+        if workers == 1 or len(tickers) <= chunk_size:
+            for ticker in tickers:
+                yield self._rebuild_ticker(self.report_tools, ticker)
+            return
+        
+        ticker_iter = iter(tickers)
+        chunks = iter(lambda: list(islice(ticker_iter, max(1, chunk_size))), [])
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            in_flight = deque()
+            for chunk in chunks:
+                in_flight.append(pool.submit(_rebuild_tickers, str(self.kb_dir), chunk))
+                if len(in_flight) >= workers * 2:
+                    yield from in_flight.popleft().result()
+            while in_flight:
+                yield from in_flight.popleft().result()
+    
+    @staticmethod
+    def _rebuild_ticker(report_tools: ReportTools, ticker: str) -> Dict[str, Any]:
+        """Fold every report of a ticker into a fresh stock node and collect its other index entries."""
+        reports = sorted(
+            ((date_str, relative_path, report) for _, date_str, relative_path, report in report_tools.iter_reports([ticker])),
+            key=lambda r: r[0]
+        )
+        stock_index = None
+        dates = []
+        topics = []
+        for date_str, relative_path, report in reports:
+            stock_index = IndexManager._apply_report(stock_index, ticker, report, relative_path)
+            entry = ReportTools._date_entry(ticker, date_str, relative_path, report)
+            dates.append(entry)
+            topics.append((entry, report_topics(report)))
+        return {
+            "ticker": ticker,
+            "stock_index": stock_index,
+            "root_entry": IndexManager._root_stock_entry(ticker, reports[-1][2]) if reports else None,
+            "dates": dates,
+            "topics": topics,
+            "reports": len(reports),
+        }
+    
+    @staticmethod
+    def _load_checkpoint(checkpoint: Path, fingerprints: Dict[str, List[int]]) -> Dict[str, Dict[str, Any]]:
+        """Load finished tickers of an interrupted rebuild whose directories have not changed since."""
+        results = {}
+        try:
+            with open(checkpoint, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        result = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # Torn last line of an interrupted run
+                    if fingerprints.get(result.get("ticker")) == result.pop("fingerprint", None):
+                        results[result["ticker"]] = result
+        except FileNotFoundError:
+            pass
+        return results
+    
+    def _merge_rebuild(
+        self,
+        tickers: List[str],
+        results: Dict[str, Dict[str, Any]],
+        fingerprints: Dict[str, List[int]],
+        scanned_at: int
+    ) -> None:
+        """Write the stock, date, topic and root nodes of a rebuild in one batch."""
+        finished = [results[ticker] for ticker in tickers if ticker in results]
+        with self.index_tools.updates(), self.index_tools.batch():
+            for result in finished:
+                stock_index = result["stock_index"]
+                if not stock_index:
+                    continue
+                if self.index_tools.read_index(node_id=stock_index["node_id"]):
+                    self.index_tools.update_index(stock_index["node_id"], stock_index)
+                else:
+                    self.index_tools.create_index_node("stock", stock_index)
+            
+            root_index = self.index_tools.read_index(node_id="root", copy=True)
+            exists = bool(root_index)
+            root_index = root_index or self._new_root_index()
+            root_index["stocks"] = [r["root_entry"] for r in finished if r["root_entry"]]
+            root_index["stock_count"] = len(root_index["stocks"])
+            root_index["last_updated"] = datetime.now().isoformat()
+            if exists:
+                self.index_tools.update_index("root", root_index)
+            else:
+                self.index_tools.create_index_node("root", root_index)
+            
+            self.report_tools.date_index.add_reports((entry for r in finished for entry in r["dates"]), reset=True)
+            self.report_tools.topic_index.add_topics(
+                ((entry, topics) for r in finished for entry, topics in r["topics"]), reset=True
+            )
+        
+        self._save_watermarks({
+            "scanned_at_ns": scanned_at,
+            "tickers": {
+                ticker: {"mtimes": fingerprints[ticker], "listed": bool(results.get(ticker, {}).get("root_entry"))}
+                for ticker in tickers
+            },
+        })
+    
+    @staticmethod
+    def _ticker_fingerprint(ticker_dir: Path) -> List[int]:
+        """Return the mtimes (ns) of a ticker directory, its manifest and its year directories."""
+        mtimes = [ticker_dir.stat().st_mtime_ns]
+        try:
+            with os.scandir(ticker_dir) as children:
+                for child in children:
+                    if child.name == ManifestStore.FILE_NAME or child.is_dir():
+                        mtimes.append(child.stat().st_mtime_ns)
+        except OSError:
+            pass
+        return mtimes
+    
+    @staticmethod
+    def _root_stock_entry(ticker: str, report: Dict[str, Any]) -> Dict[str, Any]:
+        """Build the root index entry of a ticker from its latest report."""
+        analysis = report.get("analysis", {})
+        meta = analysis.get("meta", {})
+        return {
+            "ticker": ticker,
+            "company_name": meta.get("company_name", ticker),
+            "latest_report_date": report.get("analysis_date", ""),
+            "stock_index_id": f"{ticker}_stock_index",
+            "summary": analysis.get("executive_summary", {}).get("summary", "")[:100] if analysis.get("executive_summary") else ""
+        }
+    
+    def _load_watermarks(self) -> Optional[Dict[str, Any]]:
+        watermark_path = self.kb_dir / "_indexes" / WATERMARK_FILE
+        try:
+            with open(watermark_path, "r", encoding="utf-8") as f:
+                watermarks = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (json.JSONDecodeError, IOError) as e:
+            logger.warning(f"Ignoring unreadable root index watermarks {watermark_path}: {e}")
+            return None
+        return watermarks if isinstance(watermarks, dict) else None
+    
+    def _save_watermarks(self, watermarks: Dict[str, Any]) -> None:
+        try:
+            atomic_write_json(self.kb_dir / "_indexes" / WATERMARK_FILE, watermarks, indent=None)
+        except OSError as e:
+            logger.warning(f"Could not save root index watermarks: {e}")
+    
     def update_stock_index(self, ticker: str, report: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """
         Update or create stock index after new report ingestion.
@@ -86,9 +382,46 @@ class IndexManager:
         Returns:
             Updated stock index node
         """
-        node_id = f"{ticker.upper().replace(':', '_')}_stock_index"
-        stock_index = self.index_tools.read_index(node_id=node_id)
+        with self.index_tools.updates():
+            node_id = f"{ticker.upper().replace(':', '_')}_stock_index"
+            stock_index = self.index_tools.read_index(node_id=node_id, copy=True)
+            exists = bool(stock_index)
+            analysis_date = report.get("analysis_date", "")
+            
+            # Add/update report entry (the manifest knows the actual file name/format)
+            normalized_ticker = ticker.upper().replace(':', '_')
+            manifest_entry = self.report_tools.manifest_store.entry(normalized_ticker, analysis_date)
+            file_path = manifest_entry["path"] if manifest_entry else f"{normalized_ticker}/{analysis_date[:4]}/{normalized_ticker}_{analysis_date}.json"
+            stock_index = self._apply_report(stock_index, ticker, report, file_path)
+            
+            # Save stock index (create if doesn't exist, update if exists)
+            if exists:
+                self.index_tools.update_index(node_id, stock_index)
+            else:
+                self.index_tools.create_index_node("stock", stock_index)
+            
+            return stock_index
+    
+    @staticmethod
+    def _apply_report(
+        stock_index: Optional[Dict[str, Any]],
+        ticker: str,
+        report: Dict[str, Any],
+        file_path: str
+    ) -> Dict[str, Any]:
+        """
+        Fold one report into a stock index node (creating it if needed) without saving it.
         
+        Args:
+            stock_index: Existing stock index node (modified in place) or None
+            ticker: Stock ticker symbol
+            report: Report dictionary
+            file_path: Report path relative to the knowledge base
+            
+        Returns:
+            Updated stock index node
+        """
+        node_id = f"{ticker.upper().replace(':', '_')}_stock_index"
         analysis = report.get("analysis", {})
         meta = analysis.get("meta", {})
         analysis_date = report.get("analysis_date", "")
@@ -116,7 +449,7 @@ class IndexManager:
         # Add/update report entry
         report_entry = {
             "date": analysis_date,
-            "file_path": f"{ticker.upper().replace(':', '_')}/{analysis_date[:4]}/{ticker.upper().replace(':', '_')}_{analysis_date}.json",
+            "file_path": file_path,
             "summary": exec_summary.get("summary", "")[:150] if exec_summary else ""
         }
         
@@ -132,15 +465,13 @@ class IndexManager:
         stock_index["latest_report_date"] = analysis_date
         stock_index["last_updated"] = datetime.now().isoformat()
         
-        # Extract related topics from report
+        # Link the sector, risk and catalyst topics of the report (same extraction as the topic nodes)
         industry = analysis.get("industry_and_competition", {})
-        if industry:
-            # Extract sector/industry info for topic links
-            industry_desc = industry.get("industry_description", "")
-            # Simple topic extraction (can be enhanced)
-            if "technology" in industry_desc.lower():
-                if "topic_technology" not in stock_index.get("related_topics", []):
-                    stock_index.setdefault("related_topics", []).append("topic_technology")
+        related_topics = stock_index.setdefault("related_topics", [])
+        for topic_name, _, _ in report_topics(report):
+            topic_id = f"topic_{topic_slug(topic_name)}"
+            if topic_id not in related_topics:
+                related_topics.append(topic_id)
         
         # Extract related stocks (competitors)
         competitors = industry.get("key_competitors", []) if industry else []
@@ -156,44 +487,59 @@ class IndexManager:
                 related_stocks.append("AMZN")
         
         stock_index["related_stocks"] = list(set(related_stocks))
-        
-        # Save stock index (create if doesn't exist, update if exists)
-        if self.index_tools.read_index(node_id=node_id):
-            self.index_tools.update_index(node_id, stock_index)
-        else:
-            self.index_tools.create_index_node("stock", stock_index)
-        
         return stock_index
     
+    def index_reports(self, reports: List[Dict[str, Any]]) -> int:
+        """
+        Update stock and root indexes for many new reports, writing each node once.
+        
+        Args:
+            reports: Report dictionaries (with ticker and analysis_date)
+            
+        Returns:
+            Number of reports indexed
+        """
+        count = 0
+        with self.index_tools.updates(), self.index_tools.batch():
+            for report in reports:
+                ticker = report.get("ticker", "").upper().replace(":", "_")
+                if not ticker:
+                    continue
+                self.update_stock_index(ticker, report)
+                self.update_root_index_stock(ticker, report)
+                count += 1
+        return count
+    
     def update_root_index_stock(self, ticker: str, report: Dict[str, Any]) -> None:
         """Update root index with new/updated stock entry."""
-        root_index = self.index_tools.read_index(node_id="root")
-        if not root_index:
-            root_index = self.initialize_root_index()
-        
-        analysis = report.get("analysis", {})
-        meta = analysis.get("meta", {})
-        analysis_date = report.get("analysis_date", "")
-        
-        # Find or create stock entry
-        stocks = root_index.get("stocks", [])
-        stock_entry = next((s for s in stocks if s.get("ticker") == ticker.upper().replace(":", "_")), None)
-        
-        if stock_entry:
-            stock_entry["latest_report_date"] = analysis_date
-            stock_entry["summary"] = analysis.get("executive_summary", {}).get("summary", "")[:100] if analysis.get("executive_summary") else ""
-        else:
-            stocks.append({
-                "ticker": ticker.upper().replace(":", "_"),
-                "company_name": meta.get("company_name", ticker),
-                "latest_report_date": analysis_date,
-                "stock_index_id": f"{ticker.upper().replace(':', '_')}_stock_index",
-                "summary": analysis.get("executive_summary", {}).get("summary", "")[:100] if analysis.get("executive_summary") else ""
-            })
-        
-        root_index["stocks"] = stocks
-        root_index["stock_count"] = len(stocks)
-        root_index["last_updated"] = datetime.now().isoformat()
-        
-        self.index_tools.update_index("root", root_index)
+        with self.index_tools.updates():
+            root_index = self.index_tools.read_index(node_id="root", copy=True)
+            if not root_index:
+                root_index = self.initialize_root_index()
+            
+            analysis = report.get("analysis", {})
+            meta = analysis.get("meta", {})
+            analysis_date = report.get("analysis_date", "")
+            
+            # Find or create stock entry
+            stocks = root_index.get("stocks", [])
+            stock_entry = next((s for s in stocks if s.get("ticker") == ticker.upper().replace(":", "_")), None)
+            
+            if stock_entry:
+                stock_entry["latest_report_date"] = analysis_date
+                stock_entry["summary"] = analysis.get("executive_summary", {}).get("summary", "")[:100] if analysis.get("executive_summary") else ""
+            else:
+                stocks.append({
+                    "ticker": ticker.upper().replace(":", "_"),
+                    "company_name": meta.get("company_name", ticker),
+                    "latest_report_date": analysis_date,
+                    "stock_index_id": f"{ticker.upper().replace(':', '_')}_stock_index",
+                    "summary": analysis.get("executive_summary", {}).get("summary", "")[:100] if analysis.get("executive_summary") else ""
+                })
+            
+            root_index["stocks"] = stocks
+            root_index["stock_count"] = len(stocks)
+            root_index["last_updated"] = datetime.now().isoformat()
+            
+            self.index_tools.update_index("root", root_index)
 
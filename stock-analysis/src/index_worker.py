@@ -0,0 +1,247 @@
+"""Index Worker - Applies change feed entries to the indexes in the background"""
+
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+from .index_manager import IndexManager
+from .kb_tools.change_feed import ChangeFeed
+
+logger = logging.getLogger(__name__)
+
+# Failed attempts before a batch is retried change by change, and before a single
+# change is moved to the feed's dead-letter table
+DEFAULT_MAX_ATTEMPTS = 5
+
+
+class IndexWorker:
+    """
+    Consumes the change feed and brings every index up to date in batches.
+
+    Each batch re-reads the saved reports and applies the stock and root node updates
+    (``IndexManager.index_reports``) together with the search, date, topic, metrics and
+    vector index updates (``ReportTools.index_saved_reports``) inside one index graph
+    batch, holding the graph's update lock so node edits made meanwhile by the agent
+    (``IndexTools.update_index``) wait instead of interleaving, then acknowledges the batch.
+    A failed batch stays in the feed and is retried after ``poll_interval``. After
+    ``max_attempts`` failures the batch is retried one change at a time, and a single
+    change that fails ``max_attempts`` times is logged and moved to the feed's
+    dead-letter table so the changes behind it are applied. Changes left by a stopped
+    or crashed process are applied when the next worker starts.
+    """
+
+    def __init__(
+        self,
+        knowledge_base_dir: Path,
+        index_manager: Optional[IndexManager] = None,
+        change_feed: Optional[ChangeFeed] = None,
+        batch_size: int = 100,
+        poll_interval: float = 1.0,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS
+    ):
+        """
+        Initialize Index Worker.
+
+        Args:
+            knowledge_base_dir: Root directory of the knowledge base
+            index_manager: Index manager to apply updates with (created if omitted)
+            change_feed: Feed to consume (defaults to the index manager's report tools' feed)
+            batch_size: Maximum number of changes applied per batch
+            poll_interval: Seconds between checks for new changes when not notified
+            max_attempts: Failures of a batch before it is split, and of a single change
+                before it is dead-lettered
+        """
+        self.kb_dir = Path(knowledge_base_dir)
+        self.index_manager = index_manager or IndexManager(self.kb_dir)
+        self.report_tools = self.index_manager.report_tools
+        self.change_feed = change_feed or self.report_tools.change_feed or ChangeFeed(self.kb_dir)
+        self.batch_size = max(1, batch_size)
+        self.poll_interval = poll_interval
+        self.max_attempts = max(1, max_attempts)
+
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._run_lock = threading.Lock()
+
+        # Failure tracking for the change at the head of the feed
+        self._failing_seq: Optional[int] = None
+        self._attempts = 0
+        self._isolate_through: Optional[int] = None
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "applied": 0,
+            "batches": 0,
+            "errors": 0,
+            "dead_lettered": 0,
+            "last_batch_size": 0,
+            "last_batch_seconds": 0.0,
+            "last_applied_at": None,
+            "last_error": None,
+        }
+
+    def start(self) -> "IndexWorker":
+        """Start the worker thread (no-op if already running)."""
+        if self._thread is None or not self._thread.is_alive():
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name="index-worker", daemon=True)
+            self._thread.start()
+        return self
+
+    def notify(self) -> None:
+        """Wake the worker after appending to the feed instead of waiting for the next poll."""
+        self._wake.set()
+
+    def stop(self, drain: bool = True, timeout: Optional[float] = 30.0) -> None:
+        """
+        Stop the worker thread.
+
+        Args:
+            drain: Apply the remaining changes before returning (undrained changes stay in
+                the feed for the next worker)
+            timeout: Seconds to wait for the current batch
+        """
+        self._stopping.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            if self._thread.is_alive():
+                logger.warning("Index worker did not stop in time; pending changes stay in the feed")
+                return
+            self._thread = None
+        if drain:
+            self.drain()
+
+    def drain(self) -> int:
+        """
+        Apply every pending change in the calling thread.
+
+        Returns:
+            Number of changes applied
+        """
+        applied = 0
+        while True:
+            count = self.run_once()
+            if not count:
+                return applied
+            applied += count
+
+    def run_once(self) -> int:
+        """
+        Apply the next batch of changes.
+
+        Returns:
+            Number of changes applied (0 when the feed is empty)
+
+        Raises:
+            Exception: Whatever the index updates raised (the batch stays in the feed,
+                or is dead-lettered once a single change has failed ``max_attempts`` times)
+        """
+        with self._run_lock:
+            changes = self.change_feed.read(self.batch_size)
+            if not changes:
+                return 0
+            if self._isolate_through is not None:
+                if changes[0]["seq"] > self._isolate_through:
+                    self._isolate_through = None
+                else:
+                    changes = changes[:1]
+            try:
+                return self._apply_batch(changes)
+            except Exception as e:
+                self._record_failure(changes, e)
+                raise
+
+    def _record_failure(self, changes: List[Dict[str, Any]], error: Exception) -> None:
+        """Count a failed attempt at the head change; split the batch or dead-letter the change."""
+        head = changes[0]
+        if head["seq"] != self._failing_seq:
+            self._failing_seq, self._attempts = head["seq"], 0
+        self._attempts += 1
+        if self._attempts < self.max_attempts:
+            return
+
+        self._failing_seq, self._attempts = None, 0
+        if len(changes) > 1:
+            # Find the change that fails by applying the batch one change at a time
+            self._isolate_through = changes[-1]["seq"]
+            logger.warning(
+                f"Index batch of {len(changes)} change(s) failed {self.max_attempts} times; "
+                f"retrying them one at a time"
+            )
+            return
+
+        message = f"{type(error).__name__}: {error}"
+        self.change_feed.dead_letter(head, message, self.max_attempts)
+        with self._stats_lock:
+            self._stats["dead_lettered"] += 1
+        logger.error(
+            f"Moved change feed entry {head['seq']} ({head['ticker']} {head['date']}, {head['path']}) "
+            f"to the dead-letter table after {self.max_attempts} failed attempts: {message}"
+        )
+
+    def _apply_batch(self, changes: List[Dict[str, Any]]) -> int:
+        started = time.perf_counter()
+
+        # A report saved twice in the batch is indexed once, from its latest save
+        latest = {(c["ticker"], c["date"]): c for c in changes}
+        entries = []
+        reports = []
+        for change in latest.values():
+            report = self.report_tools.read_report(change["ticker"], change["date"])
+            if report is None:
+                logger.warning(f"Skipping change feed entry for missing report {change['path']}")
+                continue
+            entries.append(change)
+            reports.append(report)
+
+        index_tools = self.index_manager.index_tools
+        with index_tools.updates(), index_tools.batch():
+            if reports:
+                self.report_tools.index_saved_reports(entries, reports)
+                self.index_manager.index_reports(reports)
+        self.change_feed.ack(changes[-1]["seq"])
+        if self._failing_seq is not None and self._failing_seq <= changes[-1]["seq"]:
+            self._failing_seq, self._attempts = None, 0
+
+        elapsed = time.perf_counter() - started
+        with self._stats_lock:
+            self._stats["applied"] += len(changes)
+            self._stats["batches"] += 1
+            self._stats["last_batch_size"] = len(changes)
+            self._stats["last_batch_seconds"] = elapsed
+            self._stats["last_applied_at"] = time.time()
+        logger.debug(f"Applied {len(changes)} index change(s) in {elapsed:.3f}s")
+        return len(changes)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return lag and throughput metrics.
+
+        Returns:
+            Dict with the feed's pending, oldest_enqueued_at, lag_seconds and dead_letters
+            (changes in the dead-letter table), plus running, applied, batches, errors,
+            dead_lettered, last_batch_size, last_batch_seconds, last_applied_at and
+            last_error for this worker
+        """
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats.update(self.change_feed.lag())
+        stats["dead_letters"] = self.change_feed.dead_letter_count()
+        stats["running"] = self._thread is not None and self._thread.is_alive()
+        return stats
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            self._wake.clear()
+            try:
+                if self.run_once():
+                    continue
+            except Exception as e:
+                with self._stats_lock:
+                    self._stats["errors"] += 1
+                    self._stats["last_error"] = f"{type(e).__name__}: {e}"
+                logger.error(f"Index worker batch failed, retrying: {e}")
+            self._wake.wait(self.poll_interval)
@@ -11,9 +11,10 @@ from langchain_core.runnables import RunnableLambda
 import os
 
 from .kb_tools.index_tools import IndexTools
-from .kb_tools.report_tools import ReportTools
+from .kb_tools.report_tools import ReportTools, BACKGROUND_INDEX_UPDATES
 from .kb_tools.perplexity_tool import PerplexityResearchTool
 from .index_manager import IndexManager
+from .index_worker import IndexWorker
 
 logger = logging.getLogger(__name__)
 
@@ -39,15 +40,27 @@ class KBManagerAgent:
         """
         self.kb_dir = Path(knowledge_base_dir)
         self.index_tools = IndexTools(self.kb_dir)
-        self.report_tools = ReportTools(self.kb_dir)
+        # Saves from research only append to the change feed; the index worker applies them
+        self.report_tools = ReportTools(
+            self.kb_dir,
+            index_updates=os.getenv("KB_INDEX_UPDATES", BACKGROUND_INDEX_UPDATES)
+        )
         self.index_manager = IndexManager(self.kb_dir)
+        self.index_worker = None
+        if self.report_tools.change_feed:
+            self.index_worker = IndexWorker(
+                self.kb_dir,
+                index_manager=self.index_manager,
+                change_feed=self.report_tools.change_feed
+            ).start()
         
         # Initialize Perplexity tool
         prompt_file = Path(__file__).parent.parent.parent / "docs" / "perplexity-stock-analysis-prompt.md"
         self.perplexity_tool = PerplexityResearchTool(
             api_key=api_key,
             knowledge_base_dir=self.kb_dir,
-            prompt_file=prompt_file
+            prompt_file=prompt_file,
+            report_tools=self.report_tools
         )
         
         # Create LangChain tools
@@ -64,28 +77,116 @@ class KBManagerAgent:
             """Read an index node from the knowledge base."""
             return self.index_tools.read_index(node_id=node_id, node_path=node_path) or {}
         
-        def search_index_tool(query_text: str, node_type: Optional[str] = None, max_results: int = 10) -> List[Dict[str, Any]]:
-            """Search index nodes by text query."""
-            return self.index_tools.search_index(query_text=query_text, node_type=node_type, max_results=max_results)
+        def search_index_tool(
+            query_text: str,
+            node_type: Optional[str] = None,
+            max_results: int = 10,
+            method: str = "bm25"
+        ) -> List[Dict[str, Any]]:
+            """Search index nodes by text query. method="bm25" matches words literally; method="semantic" matches by meaning."""
+            try:
+                return self.index_tools.search_index(
+                    query_text=query_text,
+                    node_type=node_type,
+                    max_results=max_results,
+                    method=method
+                )
+            except (ValueError, ImportError) as e:
+                return [{"error": str(e)}]
+        
+        def explore_graph_tool(
+            node_id: str = "root",
+            depth: int = 2,
+            edge_types: Optional[List[str]] = None,
+            direction: str = "both",
+            max_nodes: int = 50
+        ) -> Dict[str, Any]:
+            """Walk the index graph from a node in one call instead of many read_index calls. Returns every node within `depth` hops (node_type, summary, ticker/topic/date) and the edges followed. edge_types: stock, topic, date, related_stock, related_topic; direction: out, in or both (e.g. node_id="topic_technology", direction="in" lists the stocks linking to it)."""
+            try:
+                return self.index_tools.neighbors(
+                    node_id=node_id,
+                    depth=depth,
+                    edge_types=edge_types,
+                    direction=direction,
+                    max_nodes=max_nodes
+                )
+            except ValueError as e:
+                return {"error": str(e)}
+        
+        def resolve_ticker_tool(name: str, limit: int = 5) -> List[Dict[str, Any]]:
+            """Resolve a company name, alias or ticker (e.g. "Alibaba", "Tencent", "alibba") to tickers in the knowledge base without searching. Returns candidates with ticker, company name and score (1.0 = exact match)."""
+            return self.index_tools.resolve_ticker(name=name, limit=limit)
         
-        def read_report_tool(ticker: str, date: Optional[str] = None) -> Dict[str, Any]:
-            """Read a stock analysis report."""
-            return self.report_tools.read_report(ticker=ticker, date=date) or {}
+        def read_report_tool(
+            ticker: str,
+            date: Optional[str] = None,
+            sections: Optional[List[str]] = None
+        ) -> Dict[str, Any]:
+            """Read a stock analysis report. Pass sections (e.g. ["valuation", "risks", "executive_summary"]) to fetch only those parts of the report."""
+            return self.report_tools.read_report(ticker=ticker, date=date, sections=sections) or {}
         
         def search_reports_tool(
             tickers: Optional[List[str]] = None,
             date_range: Optional[Dict[str, str]] = None,
             topics: Optional[List[str]] = None,
-            keywords: Optional[List[str]] = None
-        ) -> List[Dict[str, Any]]:
-            """Search across multiple reports."""
-            return self.report_tools.search_reports(
+            keywords: Optional[List[str]] = None,
+            limit: int = 10,
+            cursor: Optional[str] = None,
+            include_report: bool = False
+        ) -> Dict[str, Any]:
+            """Search across multiple reports. Returns the best `limit` matches (excerpts only unless include_report is true) and a next_cursor to fetch more."""
+            return self.report_tools.search_reports_page(
                 tickers=tickers,
                 date_range=date_range,
                 topics=topics,
-                keywords=keywords
+                keywords=keywords,
+                limit=limit,
+                cursor=cursor,
+                include_report=include_report
             )
         
+        def screen_stocks_tool(
+            filters: List[str],
+            sort_by: Optional[str] = None,
+            descending: bool = False,
+            limit: int = 20,
+            fields: Optional[List[str]] = None,
+            tickers: Optional[List[str]] = None
+        ) -> Dict[str, Any]:
+            """Screen every stock's latest report by numeric metrics without reading reports, e.g. filters=["pe_forward < 20", "revenue_growth_yoy_pct > 0"], sort_by="pe_forward". Metric names may be suffixes of valuation.*, fundamentals.* or price_snapshot.* fields."""
+            try:
+                return self.report_tools.screen_stocks(
+                    filters=filters,
+                    sort_by=sort_by,
+                    descending=descending,
+                    limit=limit,
+                    fields=fields,
+                    tickers=tickers
+                )
+            except (ValueError, ImportError) as e:
+                metrics_store = self.report_tools.metrics_store
+                return {
+                    "error": str(e),
+                    "available_metrics": metrics_store.list_metrics() if metrics_store else []
+                }
+        
+        def semantic_search_tool(
+            query_text: str,
+            limit: int = 10,
+            tickers: Optional[List[str]] = None,
+            sections: Optional[List[str]] = None
+        ) -> Dict[str, Any]:
+            """Find report sections closest in meaning to a free-text question (e.g. "exposure to AI chip export restrictions"), even without exact keyword matches. Returns ticker, date, section and score; read the sections with read_report."""
+            try:
+                return {"matches": self.report_tools.semantic_search(
+                    query=query_text,
+                    limit=limit,
+                    tickers=tickers,
+                    sections=sections
+                )}
+            except ImportError as e:
+                return {"error": str(e), "matches": []}
+        
         def update_index_tool(node_id: str, updates: Dict[str, Any]) -> Dict[str, Any]:
             """Update an index node."""
             return self.index_tools.update_index(node_id=node_id, updates=updates) or {}
@@ -94,20 +195,37 @@ class KBManagerAgent:
             """Generate new report using Perplexity and update indexes."""
             report = self.perplexity_tool.research(ticker=ticker, date=date, focus_areas=focus_areas)
             
-            # Update indexes after new report
+            if self.index_worker:
+                # The save is in the change feed; index it off the chat turn
+                self.index_worker.notify()
+                return report
+            
+            # Update indexes after new report (each node is written once)
             normalized_ticker = ticker.upper().replace(":", "_")
-            self.index_manager.update_stock_index(normalized_ticker, report)
-            self.index_manager.update_root_index_stock(normalized_ticker, report)
+            with self.index_tools.updates(), self.index_tools.batch():
+                self.index_manager.update_stock_index(normalized_ticker, report)
+                self.index_manager.update_root_index_stock(normalized_ticker, report)
             
             return report
         
+        def index_status_tool() -> Dict[str, Any]:
+            """Report how far index updates lag behind saved reports: pending changes, lag_seconds, dead_letters (changes that kept failing and were set aside) and worker throughput. Newly researched reports are readable with read_report at once but may not be in the indexes until pending is 0."""
+            if not self.index_worker:
+                return {"mode": "sync", "pending": 0, "lag_seconds": 0.0}
+            return dict(self.index_worker.stats(), mode="background")
+        
         tools = [
             StructuredTool.from_function(read_index_tool),
             StructuredTool.from_function(search_index_tool),
+            StructuredTool.from_function(explore_graph_tool),
+            StructuredTool.from_function(resolve_ticker_tool),
             StructuredTool.from_function(read_report_tool),
             StructuredTool.from_function(search_reports_tool),
+            StructuredTool.from_function(screen_stocks_tool),
+            StructuredTool.from_function(semantic_search_tool),
             StructuredTool.from_function(update_index_tool),
             StructuredTool.from_function(research_tool),
+            StructuredTool.from_function(index_status_tool),
         ]
         
         return tools
@@ -143,10 +261,24 @@ class KBManagerAgent:
    - Read index nodes to understand available information
    - Follow links to relevant topic/stock/date nodes
    - Decide navigation path based on query parameters and index summaries
+   - Use resolve_ticker to turn company names into tickers instead of search_index
+   - Use explore_graph to see a node's neighborhood (related stocks, topics, months)
+     several hops deep in one call instead of reading nodes one by one
+   - For sector, risk-theme or catalyst questions read the topic node
+     (e.g. topic_technology, topic_regulatory_risk, topic_ai): it lists every covering
+     stock with its report dates instead of scanning reports
+   - For period questions read the month (date_2026_01) or ISO week (date_2026_W02)
+     node, which lists every report of that period
 
 3. Retrieve relevant reports using report tools:
    - Use read_report for specific ticker/date queries
+   - Pass the sections parameter to read_report when only some sections are needed
+     (e.g. valuation, risks, catalysts, executive_summary)
    - Use search_reports for topic-based or comparative queries
+   - Use screen_stocks for numeric screens across the whole knowledge base
+     (e.g. forward P/E below 20 and positive revenue growth) instead of reading reports
+   - Use semantic_search for conceptual questions whose wording may not match the
+     reports literally, then read_report the matching sections
 
 4. Assess information sufficiency:
    - Check date recency (if query implies current information)
@@ -157,14 +289,15 @@ class KBManagerAgent:
 5. Call Perplexity tool when information is insufficient:
    - Pass ticker, date, focus areas, and context
    - Store raw response in knowledge base
-   - Trigger index update after new data ingestion
+   - Index updates for the new report run in the background; use read_report
+     for it right away and index_status to check whether the indexes caught up
 
-6. Update indexes after new report ingestion:
-   - Root index: Add/update stock entry
-   - Topic indexes: Add/update relevant topic nodes
-   - Stock indexes: Add/update date entries
-   - Cross-references: Update related stock/topic links
-   - Generate/update index summaries based on report content
+6. Do not update indexes after research: saving a report updates the root, stock,
+   topic and date indexes (in the background). Use update_index only for manual
+   edits the saved reports cannot produce:
+   - Correcting or adding fields of a node (e.g. company name, aliases, sector)
+   - Cross-references: related stock/topic links
+   - Index summaries written from report content
 
 7. Return structured results with:
    - sufficient: boolean
@@ -273,4 +406,9 @@ Please:
                 pass
         
         return {"output": output}
-
+    
+    def close(self) -> None:
+        """Stop the index worker, applying the index updates still in the change feed."""
+        if self.index_worker:
+            self.index_worker.stop(drain=True)
+            self.index_worker = None
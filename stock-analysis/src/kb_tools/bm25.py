@@ -0,0 +1,178 @@
+"""BM25 - Okapi BM25 ranking for report sections and index nodes"""
+
+import math
+from collections import Counter
+from typing import Optional, Dict, Any, List, Iterable, Hashable, Tuple
+
+from .inverted_index import tokenize
+
+DEFAULT_K1 = 1.2
+DEFAULT_B = 0.75
+
+
+def idf(doc_freq: int, doc_count: int) -> float:
+    """Inverse document frequency (the non-negative BM25+ variant)."""
+    return math.log(1.0 + (doc_count - doc_freq + 0.5) / (doc_freq + 0.5))
+
+
+def term_score(
+    tf: float,
+    doc_length: float,
+    avg_length: float,
+    idf_value: float,
+    k1: float = DEFAULT_K1,
+    b: float = DEFAULT_B
+) -> float:
+    """BM25 contribution of one term to one document."""
+    if tf <= 0:
+        return 0.0
+    norm = 1.0 - b + b * (doc_length / avg_length if avg_length else 1.0)
+    return idf_value * tf * (k1 + 1.0) / (tf + k1 * norm)
+
+
+def query_tokens(terms: Iterable[str]) -> List[str]:
+    """Tokenize query terms/phrases into unique tokens, keeping their order."""
+    seen = {}
+    for term in terms:
+        for token in tokenize(term):
+            seen.setdefault(token, None)
+    return list(seen)
+
+
+class BM25Corpus:
+    """
+    In-memory BM25 statistics for a set of small documents.
+
+    Document frequencies and the total length are updated as documents are added,
+    replaced or removed, so scoring never has to re-tokenize the corpus. Query tokens
+    are matched as prefixes of indexed terms, like the report inverted index.
+    """
+
+    def __init__(self, k1: float = DEFAULT_K1, b: float = DEFAULT_B):
+        """
+        Initialize BM25 Corpus.
+
+        Args:
+            k1: Term frequency saturation
+            b: Document length normalization
+        """
+        self.k1 = k1
+        self.b = b
+        self._docs: Dict[Hashable, Tuple[Counter, int]] = {}
+        self._doc_freq: Counter = Counter()
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._docs
+
+    def add(self, key: Hashable, text: str) -> None:
+        """Add a document, replacing any previous version under the same key."""
+        self.remove(key)
+        tokens = tokenize(text)
+        counts = Counter(tokens)
+        self._docs[key] = (counts, len(tokens))
+        self._doc_freq.update(counts.keys())
+        self._total_length += len(tokens)
+
+    def remove(self, key: Hashable) -> None:
+        """Remove a document if present."""
+        entry = self._docs.pop(key, None)
+        if entry is None:
+            return
+        counts, length = entry
+        self._doc_freq.subtract(counts.keys())
+        for term in counts:
+            if self._doc_freq[term] <= 0:
+                del self._doc_freq[term]
+        self._total_length -= length
+
+    def _expand(self, token: str) -> List[str]:
+        return [term for term in self._doc_freq if term.startswith(token)]
+
+    def score(self, query: str, keys: Optional[Iterable[Hashable]] = None) -> Dict[Hashable, float]:
+        """
+        Score documents against a query.
+
+        Args:
+            query: Free-text query
+            keys: Restrict scoring to these documents (default: all)
+
+        Returns:
+            Mapping of document key to BM25 score for documents with a positive score
+        """
+        doc_count = len(self._docs)
+        if not doc_count:
+            return {}
+        avg_length = self._total_length / doc_count
+        candidates = list(self._docs) if keys is None else [k for k in keys if k in self._docs]
+
+        scores: Dict[Hashable, float] = {}
+        for token in query_tokens([query]):
+            for term in self._expand(token):
+                term_idf = idf(self._doc_freq[term], doc_count)
+                for key in candidates:
+                    counts, length = self._docs[key]
+                    tf = counts.get(term, 0)
+                    if tf:
+                        scores[key] = scores.get(key, 0.0) + term_score(
+                            tf, length, avg_length, term_idf, self.k1, self.b
+                        )
+        return scores
+
+
+def score_postings(
+    term_postings: Dict[str, Dict[str, Dict[str, int]]],
+    docs: Dict[str, Dict[str, Any]],
+    stats: Dict[str, Any],
+    sections: Optional[Iterable[str]] = None,
+    k1: float = DEFAULT_K1,
+    b: float = DEFAULT_B
+) -> Dict[str, float]:
+    """
+    Score reports from inverted index postings.
+
+    A report's BM25 document is the concatenation of ``sections``; term and document
+    frequencies only count occurrences inside those sections.
+
+    Args:
+        term_postings: Indexed term -> {doc key: {section: tf}} for every query term
+        docs: Indexed report metadata (with per-section token counts)
+        stats: Corpus statistics ({"doc_count", "section_lengths"})
+        sections: Report sections to score (default: every section in the statistics,
+            i.e. all the index tokenizes)
+        k1: Term frequency saturation
+        b: Document length normalization
+
+    Returns:
+        Mapping of doc key to BM25 score for reports with a positive score
+    """
+    section_totals = stats.get("section_lengths", {})
+    fields = list(sections if sections is not None else section_totals)
+    doc_count = max(stats.get("doc_count", 0), 1)
+    avg_length = sum(section_totals.get(f, 0) for f in fields) / doc_count
+
+    scores: Dict[str, float] = {}
+    lengths: Dict[str, int] = {}
+
+    for postings in term_postings.values():
+        term_frequencies = {}
+        for doc_key, section_tf in postings.items():
+            tf = sum(section_tf.get(f, 0) for f in fields)
+            if tf:
+                term_frequencies[doc_key] = tf
+        if not term_frequencies:
+            continue
+
+        term_idf = idf(len(term_frequencies), doc_count)
+        for doc_key, tf in term_frequencies.items():
+            if doc_key not in lengths:
+                doc_sections = docs.get(doc_key, {}).get("sections", {})
+                lengths[doc_key] = sum(doc_sections.get(f, 0) for f in fields)
+            scores[doc_key] = scores.get(doc_key, 0.0) + term_score(
+                tf, lengths[doc_key], avg_length, term_idf, k1, b
+            )
+
+    return scores
@@ -0,0 +1,200 @@
+"""Change Feed - Durable queue of saved reports awaiting index updates"""
+
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Iterable
+
+from .report_writer import fsync_enabled
+
+logger = logging.getLogger(__name__)
+
+# Database file under _indexes/
+FEED_DATABASE = "change_feed.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS changes (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    ticker TEXT NOT NULL,
+    date TEXT NOT NULL,
+    path TEXT NOT NULL,
+    enqueued_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS dead_letters (
+    seq INTEGER PRIMARY KEY,
+    ticker TEXT NOT NULL,
+    date TEXT NOT NULL,
+    path TEXT NOT NULL,
+    enqueued_at REAL NOT NULL,
+    failed_at REAL NOT NULL,
+    attempts INTEGER NOT NULL,
+    error TEXT
+);
+"""
+
+CHANGE_COLUMNS = ("seq", "ticker", "date", "path", "enqueued_at")
+DEAD_LETTER_COLUMNS = CHANGE_COLUMNS + ("failed_at", "attempts", "error")
+
+
+class ChangeFeed:
+    """
+    Append-only feed of report saves (``_indexes/change_feed.db``) consumed by the index worker.
+
+    ``ReportTools`` appends one row per saved report (ticker, date, path) in the same
+    step that writes the report, before its write journal is committed, so a save is
+    never lost between storage and the indexes: a crash is replayed by the journal and
+    re-appends. Consumers ``read`` the oldest rows and ``ack`` them once their index
+    updates are written; an unacknowledged row is delivered again, so consumers must be
+    idempotent (index updates are). A change that keeps failing is moved to the
+    ``dead_letters`` table with its last error (``dead_letter``), so it no longer blocks
+    the changes behind it. The database runs in WAL mode, so producers and a consumer
+    in other processes do not block each other.
+    """
+
+    def __init__(self, knowledge_base_dir: Path, fsync: Optional[bool] = None):
+        """
+        Initialize Change Feed.
+
+        Args:
+            knowledge_base_dir: Root directory of the knowledge base
+            fsync: Sync every append to disk (defaults to KB_WRITE_FSYNC)
+        """
+        self.kb_dir = Path(knowledge_base_dir)
+        indexes_dir = self.kb_dir / "_indexes"
+        indexes_dir.mkdir(parents=True, exist_ok=True)
+        self.db_path = indexes_dir / FEED_DATABASE
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), isolation_level=None, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        sync = fsync_enabled() if fsync is None else fsync
+        self._conn.execute(f"PRAGMA synchronous={'FULL' if sync else 'NORMAL'}")
+        self._conn.executescript(SCHEMA)
+
+    def append(self, entries: Iterable[Dict[str, Any]]) -> int:
+        """
+        Append saved reports to the feed in one transaction.
+
+        Args:
+            entries: Dicts with ticker, date and path (relative to the knowledge base)
+
+        Returns:
+            Number of rows appended
+        """
+        now = time.time()
+        rows = [(e["ticker"], e["date"], e["path"], now) for e in entries]
+        if not rows:
+            return 0
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany("INSERT INTO changes (ticker, date, path, enqueued_at) VALUES (?, ?, ?, ?)", rows)
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return len(rows)
+
+    def read(self, limit: int = 100) -> List[Dict[str, Any]]:
+        """
+        Return the oldest unacknowledged changes.
+
+        Args:
+            limit: Maximum number of changes
+
+        Returns:
+            Dicts with seq, ticker, date, path and enqueued_at, oldest first
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT seq, ticker, date, path, enqueued_at FROM changes ORDER BY seq LIMIT ?", (limit,)
+            ).fetchall()
+        return [dict(zip(CHANGE_COLUMNS, row)) for row in rows]
+
+    def ack(self, last_seq: int) -> int:
+        """
+        Acknowledge every change up to and including a sequence number.
+
+        Args:
+            last_seq: Sequence number of the last applied change
+
+        Returns:
+            Number of changes removed from the feed
+        """
+        with self._lock:
+            return self._conn.execute("DELETE FROM changes WHERE seq <= ?", (last_seq,)).rowcount
+
+    def dead_letter(self, change: Dict[str, Any], error: str, attempts: int) -> bool:
+        """
+        Move a change that cannot be applied out of the feed into the dead-letter table.
+
+        Args:
+            change: Change as returned by ``read``
+            error: Last error raised while applying it
+            attempts: Number of failed attempts
+
+        Returns:
+            True if the change was still in the feed and has been moved
+        """
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                moved = self._conn.execute(
+                    "INSERT OR REPLACE INTO dead_letters "
+                    "SELECT seq, ticker, date, path, enqueued_at, ?, ?, ? FROM changes WHERE seq = ?",
+                    (time.time(), attempts, error, change["seq"])
+                ).rowcount > 0
+                self._conn.execute("DELETE FROM changes WHERE seq = ?", (change["seq"],))
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return moved
+
+    def dead_letters(self, limit: int = 100) -> List[Dict[str, Any]]:
+        """
+        Return changes moved to the dead-letter table, oldest first.
+
+        Args:
+            limit: Maximum number of changes
+
+        Returns:
+            Dicts with seq, ticker, date, path, enqueued_at, failed_at, attempts and error
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {', '.join(DEAD_LETTER_COLUMNS)} FROM dead_letters ORDER BY seq LIMIT ?", (limit,)
+            ).fetchall()
+        return [dict(zip(DEAD_LETTER_COLUMNS, row)) for row in rows]
+
+    def dead_letter_count(self) -> int:
+        """Return the number of changes in the dead-letter table."""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM dead_letters").fetchone()[0]
+
+    def pending(self) -> int:
+        """Return the number of unacknowledged changes."""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM changes").fetchone()[0]
+
+    def lag(self) -> Dict[str, Any]:
+        """
+        Return how far index updates are behind the saved reports.
+
+        Returns:
+            Dict with pending (changes), oldest_enqueued_at (epoch seconds or None) and
+            lag_seconds (age of the oldest pending change, 0 when caught up)
+        """
+        with self._lock:
+            pending, oldest = self._conn.execute("SELECT COUNT(*), MIN(enqueued_at) FROM changes").fetchone()
+        return {
+            "pending": pending,
+            "oldest_enqueued_at": oldest,
+            "lag_seconds": max(0.0, time.time() - oldest) if oldest is not None else 0.0,
+        }
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,224 @@
+"""Date Index - Month- and week-partitioned, date-ordered report index in _indexes/dates/"""
+
+import calendar
+import logging
+import re
+from collections import Counter
+from datetime import datetime, date as date_type, timedelta
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Iterable, Iterator
+
+from .index_graph import get_index_graph
+
+logger = logging.getLogger(__name__)
+
+MONTH_STEM = re.compile(r"^\d{4}_\d{2}$")
+WEEK_STEM = re.compile(r"^\d{4}_W\d{2}$")
+
+
+def month_key(date: str) -> str:
+    """Return the partition (YYYY-MM) of a YYYY-MM-DD date."""
+    return date[:7]
+
+
+def week_key(date: str) -> str:
+    """Return the ISO week (YYYY-Www) of a YYYY-MM-DD date."""
+    year, week, _ = date_type.fromisoformat(date[:10]).isocalendar()
+    return f"{year:04d}-W{week:02d}"
+
+
+def week_bounds(week: str) -> tuple:
+    """Return the first (Monday) and last (Sunday) YYYY-MM-DD dates of an ISO week."""
+    monday = datetime.strptime(f"{week}-1", "%G-W%V-%u").date()
+    return monday.isoformat(), (monday + timedelta(days=6)).isoformat()
+
+
+def months_between(start: str, end: str) -> List[str]:
+    """Return every YYYY-MM partition from start to end inclusive."""
+    year, month = int(start[:4]), int(start[5:7])
+    last = (int(end[:4]), int(end[5:7]))
+    months = []
+    while (year, month) <= last:
+        months.append(f"{year:04d}-{month:02d}")
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return months
+
+
+class DateIndex:
+    """
+    Date nodes listing every report of a month (``_indexes/dates/YYYY_MM.json``)
+    and of an ISO week (``_indexes/dates/YYYY_Www.json``).
+
+    Each node follows the date index format of the index graph and keeps its
+    ``reports`` sorted by date, so a date range query reads only the month nodes it
+    overlaps, in order, instead of walking ticker directories, and "what was
+    covered last week" is a single week node read::
+
+        {"node_id": "date_2026_01", "node_type": "date", "period": "month",
+         "date_range": "2026-01", "start_date": "2026-01-01", "end_date": "2026-01-31",
+         "reports": [{"ticker": "AAPL", "date": "2026-01-11",
+                      "file_path": "AAPL/2026/AAPL_2026-01-11.json", "summary": "..."}],
+         "stock_count": 8, "report_count": 12}
+
+    Week nodes have ``"period": "week"``, node ids like ``date_2026_W02`` and
+    ``date_range`` ``2026-W02``. Both kinds are updated together on ingest.
+    """
+
+    def __init__(self, knowledge_base_dir: Path):
+        """
+        Initialize Date Index.
+
+        Args:
+            knowledge_base_dir: Root directory of the knowledge base
+        """
+        self.kb_dir = Path(knowledge_base_dir)
+        self.dates_dir = self.kb_dir / "_indexes" / "dates"
+        self.graph = get_index_graph(self.kb_dir / "_indexes")
+
+    def node_path(self, period: str) -> Path:
+        """Return the node file of a YYYY-MM or YYYY-Www partition."""
+        return self.kb_dir / "_indexes" / self._relative_path(period)
+
+    @staticmethod
+    def _relative_path(period: str) -> str:
+        return f"dates/{period.replace('-', '_')}.json"
+
+    def _list_periods(self, pattern: re.Pattern) -> List[str]:
+        stems = (Path(p).stem for p in self.graph.paths("dates"))
+        return sorted(stem.replace("_", "-") for stem in stems if pattern.match(stem))
+
+    def exists(self) -> bool:
+        """Return True if any date node has been written."""
+        return bool(self.graph.paths("dates"))
+
+    def list_months(self) -> List[str]:
+        """Return every indexed YYYY-MM partition, oldest first."""
+        return self._list_periods(MONTH_STEM)
+
+    def list_weeks(self) -> List[str]:
+        """Return every indexed YYYY-Www partition, oldest first."""
+        return self._list_periods(WEEK_STEM)
+
+    def load_node(self, month: str) -> Optional[Dict[str, Any]]:
+        """Load the node of one month (read-only, shared with the resident index graph)."""
+        return self.graph.get(self._relative_path(month))
+
+    def load_week(self, date: str) -> Optional[Dict[str, Any]]:
+        """
+        Load the week node covering a date.
+
+        Args:
+            date: YYYY-MM-DD date or YYYY-Www week
+
+        Returns:
+            Week node, or None if no report was saved that week
+        """
+        week = date if "W" in date else week_key(date)
+        return self.graph.get(self._relative_path(week))
+
+    def add_reports(self, entries: Iterable[Dict[str, Any]], reset: bool = False) -> int:
+        """
+        Add or replace report entries, rewriting each touched month and week node once.
+
+        Args:
+            entries: Dicts with ticker, date, file_path and optional summary
+            reset: Discard all existing date nodes first (used by rebuild)
+
+        Returns:
+            Number of entries indexed
+        """
+        by_period: Dict[str, List[Dict[str, Any]]] = {}
+        count = 0
+        for entry in entries:
+            by_period.setdefault(month_key(entry["date"]), []).append(entry)
+            by_period.setdefault(week_key(entry["date"]), []).append(entry)
+            count += 1
+
+        with self.graph.update_lock, self.graph.batch():
+            if reset:
+                for period in self.list_months() + self.list_weeks():
+                    if period not in by_period:
+                        self.graph.remove(self._relative_path(period))
+
+            for period, period_entries in by_period.items():
+                node = None if reset else self.load_node(period)
+                reports = {(r["ticker"], r["date"]): r for r in (node or {}).get("reports", [])}
+                for entry in period_entries:
+                    reports[(entry["ticker"], entry["date"])] = {
+                        "ticker": entry["ticker"],
+                        "date": entry["date"],
+                        "file_path": entry["file_path"],
+                        "summary": entry.get("summary", ""),
+                    }
+                self._save_node(period, node or {}, list(reports.values()))
+
+        return count
+
+    def _save_node(self, period: str, node: Dict[str, Any], reports: List[Dict[str, Any]]) -> None:
+        reports.sort(key=lambda r: (r["date"], r["ticker"]))
+        tickers = {r["ticker"] for r in reports}
+        if "W" in period:
+            kind = "week"
+            start_date, end_date = week_bounds(period)
+            label = f"the week of {start_date}"
+        else:
+            kind = "month"
+            start_date = f"{period}-01"
+            end_date = f"{period}-{calendar.monthrange(int(period[:4]), int(period[5:7]))[1]:02d}"
+            label = datetime.strptime(period, "%Y-%m").strftime("%B %Y")
+        report_counts = Counter(r["ticker"] for r in reports)
+        most_covered = sorted(tickers, key=lambda t: (-report_counts[t], t))[:10]
+
+        node = dict(node)
+        node.update({
+            "node_id": f"date_{period.replace('-', '_')}",
+            "node_type": "date",
+            "period": kind,
+            "date_range": period,
+            "start_date": start_date,
+            "end_date": end_date,
+            "summary": f"Reports generated in {label} covering {len(tickers)} stocks: "
+                       f"{', '.join(most_covered)}{', ...' if len(tickers) > 10 else ''}.",
+            "reports": reports,
+            "stock_count": len(tickers),
+            "report_count": len(reports),
+            "last_updated": datetime.now().isoformat(),
+        })
+        self.graph.put(self._relative_path(period), node)
+
+    def range(
+        self,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        tickers: Optional[List[str]] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Yield report entries between two dates in date order.
+
+        Args:
+            start: First date (YYYY-MM-DD, inclusive); defaults to the oldest report
+            end: Last date (YYYY-MM-DD, inclusive); defaults to the newest report
+            tickers: Optional tickers to include
+
+        Yields:
+            Entries with ticker, date, file_path and summary
+        """
+        months = self.list_months()
+        if not months:
+            return
+        first = max(month_key(start), months[0]) if start else months[0]
+        last = min(month_key(end), months[-1]) if end else months[-1]
+        ticker_filter = {t.replace(":", "_").upper() for t in tickers} if tickers else None
+
+        for month in months_between(first, last):
+            node = self.load_node(month)
+            if not node:
+                continue
+            for entry in node.get("reports", []):
+                if start and entry["date"] < start:
+                    continue
+                if end and entry["date"] > end:
+                    break
+                if ticker_filter and entry["ticker"] not in ticker_filter:
+                    continue
+                yield entry
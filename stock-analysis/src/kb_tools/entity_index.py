@@ -0,0 +1,434 @@
+"""Entity Index - Trigram/prefix index resolving company names and aliases to tickers"""
+
+import math
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Iterable, Set, Tuple
+
+from .index_graph import ROOT_NODE, get_index_graph, poll_interval
+
+# Entry kinds, in the order they are preferred for equal scores
+TICKER_KIND = "ticker"
+NAME_KIND = "name"
+ALIAS_KIND = "alias"
+KIND_RANK = {TICKER_KIND: 0, NAME_KIND: 1, ALIAS_KIND: 2}
+
+# Trailing words dropped from company names to derive a short alias
+# ("Alibaba Group Holding Limited" -> "alibaba")
+CORPORATE_SUFFIXES = {
+    "inc", "incorporated", "corp", "corporation", "co", "company", "companies", "ltd", "limited",
+    "plc", "holding", "holdings", "group", "sa", "ag", "nv", "se", "llc", "lp", "adr", "class",
+    "a", "b", "the", "and",
+}
+
+# Longest name (in words) looked for when scanning free text
+MAX_SPAN_WORDS = 5
+
+# Minimum similarity of a fuzzy match found inside free text (typos, not loose matches)
+TEXT_MIN_SCORE = 0.6
+
+# Minimum similarity of a text word to a word of the name it fuzzy-matches
+WORD_MIN_SCORE = 0.7
+
+# Words dropped from free text before fuzzy matching: function words and the generic
+# words of questions, which share trigrams with names without naming a company
+STOPWORDS = {
+    "a", "about", "above", "after", "again", "against", "all", "also", "am", "an", "and", "any",
+    "are", "as", "at", "be", "been", "before", "being", "below", "between", "both", "but", "by",
+    "can", "could", "did", "do", "does", "doing", "down", "during", "each", "few", "for", "from",
+    "further", "had", "has", "have", "having", "he", "her", "here", "how", "i", "if", "in", "into",
+    "is", "it", "its", "just", "let", "me", "more", "most", "my", "no", "nor", "not", "now", "of",
+    "off", "on", "once", "only", "or", "other", "our", "out", "over", "own", "same", "she",
+    "should", "so", "some", "such", "than", "that", "the", "their", "them", "then", "there",
+    "these", "they", "this", "those", "through", "to", "too", "under", "until", "up", "us",
+    "very", "vs", "was", "we", "were", "what", "when", "where", "which", "while", "who", "whom",
+    "why", "will", "with", "would", "you", "your",
+}
+COMMON_WORDS = {
+    "analysis", "analyze", "american", "bank", "banks", "best", "business", "buy", "capital",
+    "companies", "company", "compare", "comparison", "consumer", "data", "digital", "earnings",
+    "energy", "financial", "first", "general", "give", "global", "good", "group", "growth",
+    "health", "industry", "industries", "international", "investment", "latest", "list", "look",
+    "market", "markets", "media", "national", "new", "news", "outlook", "overview", "performance",
+    "price", "recent", "report", "reports", "research", "risk", "risks", "sector", "sectors",
+    "sell", "semiconductor", "semiconductors", "services", "show", "stock", "stocks", "summary",
+    "systems", "tech", "technologies", "technology", "tell", "today", "trend", "trends",
+    "united", "valuation", "week", "world", "year",
+}
+
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+TICKER_TOKEN_PATTERN = re.compile(r"\b[A-Z][A-Z0-9]{0,5}(?:[:._][A-Z0-9]{1,6})?\b")
+
+ALIASES_SOURCE = "_aliases"
+
+
+def normalize(text: str) -> str:
+    """Lowercase text and reduce it to single-spaced alphanumeric words."""
+    return " ".join(WORD_PATTERN.findall(text.lower()))
+
+
+def trigrams(key: str) -> Set[str]:
+    """Return the trigrams of a normalized key, padded so word starts count."""
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _generic(word: str) -> bool:
+    """Return True for stopwords and common words, which never identify a company."""
+    return word in STOPWORDS or word in COMMON_WORDS
+
+
+def _word_similarity(a: str, b: str) -> float:
+    """Dice similarity of two words' trigrams."""
+    grams_a, grams_b = trigrams(a), trigrams(b)
+    return 2.0 * len(grams_a & grams_b) / (len(grams_a) + len(grams_b))
+
+
+def _names_word(positions: Iterable[int], words: List[str], key: str) -> bool:
+    """Return True if a text span contains a distinctive word of a name, or a misspelling of one."""
+    name_words = [w for w in key.split() if not _generic(w) and w not in CORPORATE_SUFFIXES]
+    return any(
+        _word_similarity(words[i], name_word) >= WORD_MIN_SCORE
+        for i in positions for name_word in name_words
+    )
+
+
+def name_aliases(company_name: str) -> List[str]:
+    """
+    Derive short aliases of a company name.
+
+    Args:
+        company_name: Full company name (e.g. "Alibaba Group Holding Limited")
+
+    Returns:
+        Normalized aliases: the name without corporate suffixes ("alibaba") and, for
+        names of three or more words, their initials ("amd" for Advanced Micro Devices)
+    """
+    words = normalize(company_name).split()
+    while words and words[-1] in CORPORATE_SUFFIXES:
+        words.pop()
+    while words and words[0] == "the":
+        words.pop(0)
+    aliases = []
+    if words:
+        aliases.append(" ".join(words))
+    if len(words) >= 3:
+        aliases.append("".join(w[0] for w in words))
+    return aliases
+
+
+class EntityIndex:
+    """
+    Every ticker, company name and alias of the knowledge base, for fast lookup.
+
+    Entries come from the root node's stock list and the stock nodes (``ticker``,
+    ``company_name`` and an optional ``aliases`` list), plus names registered with
+    ``add_aliases``. Exact names are a dictionary lookup; misspelled or partial
+    names are matched through trigram postings and ranked by Dice similarity, with
+    prefixes of a name ("alib" -> "alibaba") scored high.
+
+    The index follows the graph: at most every KB_INDEX_POLL_INTERVAL seconds (or
+    after ``mark_stale``) changed stock and root nodes are re-read.
+    """
+
+    def __init__(self, indexes_dir: Path):
+        """
+        Initialize Entity Index.
+
+        Args:
+            indexes_dir: The knowledge base's ``_indexes`` directory
+        """
+        self.indexes_dir = Path(indexes_dir)
+        self.poll_interval = poll_interval()
+        self._lock = threading.RLock()
+        # entry id -> (normalized key, ticker, display name, kind); None once removed
+        self._entries: List[Optional[Tuple[str, str, str, str]]] = []
+        self._gram_counts: List[int] = []
+        self._removed = 0
+        self._exact: Dict[str, Set[int]] = {}
+        self._postings: Dict[str, Set[int]] = {}
+        self._by_source: Dict[str, List[int]] = {}
+        self._versions: Dict[str, int] = {}
+        self._last_sync = 0.0
+        self._stale = True
+
+    def mark_stale(self) -> None:
+        """Re-read changed nodes on the next lookup instead of waiting for the poll interval."""
+        self._stale = True
+
+    def add_aliases(self, aliases: Dict[str, str]) -> None:
+        """
+        Register extra names (e.g. {"google": "GOOGL"}) alongside those in the graph.
+
+        Args:
+            aliases: Mapping of name or alias to ticker
+        """
+        with self._lock:
+            entries = [
+                (normalize(name), ticker.replace(":", "_").upper(), name, ALIAS_KIND)
+                for name, ticker in aliases.items()
+            ]
+            existing = [self._entries[i] for i in self._by_source.get(ALIASES_SOURCE, [])]
+            self._set_source(ALIASES_SOURCE, existing + entries)
+
+    def sync(self, force: bool = False) -> int:
+        """
+        Re-read the stock and root nodes that changed since the last sync.
+
+        Args:
+            force: Sync even if the poll interval has not elapsed
+
+        Returns:
+            Number of nodes (re)indexed or dropped
+        """
+        with self._lock:
+            if not (force or self._stale or time.monotonic() - self._last_sync >= self.poll_interval):
+                return 0
+            graph = get_index_graph(self.indexes_dir)
+            current = graph.entries("stocks")
+            current.update({p: e for p, e in graph.entries("").items() if p == ROOT_NODE})
+
+            changed = 0
+            for relative_path, (version, node) in current.items():
+                if self._versions.get(relative_path) != version:
+                    self._set_source(relative_path, self._node_entries(node))
+                    self._versions[relative_path] = version
+                    changed += 1
+            for relative_path in [p for p in self._versions if p not in current]:
+                self._set_source(relative_path, [])
+                del self._versions[relative_path]
+                changed += 1
+
+            self._last_sync = time.monotonic()
+            self._stale = False
+            return changed
+
+    @staticmethod
+    def _node_entries(node: Dict[str, Any]) -> List[Tuple[str, str, str, str]]:
+        """Entries of a stock node, or of every stock listed by the root node."""
+        listed = node.get("stocks", []) if node.get("node_type") == "root" else [node]
+        entries = []
+        for stock in listed:
+            if not isinstance(stock, dict) or not stock.get("ticker"):
+                continue
+            ticker = str(stock["ticker"]).replace(":", "_").upper()
+            name = str(stock.get("company_name") or ticker)
+            entries.append((normalize(ticker), ticker, name, TICKER_KIND))
+            if "_" in ticker:
+                # Exchange-qualified tickers also answer to the bare symbol ("HKEX_700" -> "700")
+                entries.append((normalize(ticker.split("_", 1)[1]), ticker, name, TICKER_KIND))
+            if name != ticker:
+                entries.append((normalize(name), ticker, name, NAME_KIND))
+                entries += [(alias, ticker, name, ALIAS_KIND) for alias in name_aliases(name)]
+            entries += [(normalize(str(a)), ticker, name, ALIAS_KIND) for a in stock.get("aliases", []) if a]
+        return [entry for entry in dict.fromkeys(entries) if entry[0]]
+
+    def _set_source(self, source: str, entries: Iterable[Tuple[str, str, str, str]]) -> None:
+        """Replace the entries that came from one node (caller holds the lock)."""
+        for entry_id in self._by_source.pop(source, []):
+            key = self._entries[entry_id][0]
+            self._entries[entry_id] = None
+            self._exact[key].discard(entry_id)
+            if not self._exact[key]:
+                del self._exact[key]
+            for gram in trigrams(key):
+                postings = self._postings[gram]
+                postings.discard(entry_id)
+                if not postings:
+                    del self._postings[gram]
+            self._removed += 1
+
+        entry_ids = []
+        for entry in entries:
+            entry_id = len(self._entries)
+            self._entries.append(entry)
+            self._gram_counts.append(len(trigrams(entry[0])))
+            self._exact.setdefault(entry[0], set()).add(entry_id)
+            for gram in trigrams(entry[0]):
+                self._postings.setdefault(gram, set()).add(entry_id)
+            entry_ids.append(entry_id)
+        if entry_ids:
+            self._by_source[source] = entry_ids
+        if self._removed > 1000 and self._removed * 2 > len(self._entries):
+            self._compact()
+
+    def _compact(self) -> None:
+        """Renumber live entries so removed ones stop taking memory (caller holds the lock)."""
+        sources = {source: [self._entries[i] for i in ids] for source, ids in self._by_source.items()}
+        self._entries, self._gram_counts = [], []
+        self._exact, self._postings, self._by_source = {}, {}, {}
+        self._removed = 0
+        for source, entries in sources.items():
+            self._set_source(source, entries)
+
+    def lookup(self, name: str, limit: int = 5, min_score: float = 0.3) -> List[Dict[str, Any]]:
+        """
+        Resolve a ticker, company name or alias, tolerating typos and partial names.
+
+        Args:
+            name: Name to resolve (e.g. "Alibaba", "tencent holdings", "NVDA", "alibba")
+            limit: Maximum number of tickers returned
+            min_score: Minimum similarity (0-1) of a match
+
+        Returns:
+            Best match per ticker, best first: ticker, name (company name), matched
+            (the indexed name that matched) and score (1.0 for an exact match)
+        """
+        self.sync()
+        key = normalize(name)
+        if not key:
+            return []
+        with self._lock:
+            scores = self._score(key, min_score=min_score)
+            best: Dict[str, Tuple[float, int, str, str]] = {}
+            for entry_id, score in scores.items():
+                entry_key, ticker, display, kind = self._entries[entry_id]
+                candidate = (score, -KIND_RANK[kind], display, entry_key)
+                if ticker not in best or candidate[:2] > best[ticker][:2]:
+                    best[ticker] = candidate
+        ranked = sorted(best.items(), key=lambda item: (-item[1][0], -item[1][1], item[0]))
+        return [
+            {"ticker": ticker, "name": display, "matched": matched, "score": round(score, 4)}
+            for ticker, (score, _, display, matched) in ranked[:limit]
+        ]
+
+    def _score(self, key: str, prefix: bool = True, min_score: float = 0.0) -> Dict[int, float]:
+        """
+        Similarity of entries sharing trigrams with the key (caller holds the lock).
+
+        An entry scoring ``min_score`` must share at least ``need`` trigrams with the
+        key, so it appears in one of the key's ``len(grams) - need + 1`` rarest
+        trigrams; only those postings are scanned for candidates.
+        """
+        exact = self._exact.get(key)
+        if exact:
+            return {entry_id: 1.0 for entry_id in exact}
+        grams = sorted(trigrams(key), key=lambda gram: len(self._postings.get(gram, ())))
+        need = max(1, math.ceil(min_score * len(grams) / (2.0 - min_score))) if min_score > 0 else 1
+        candidates: Set[int] = set()
+        for gram in grams[:len(grams) - need + 1]:
+            candidates.update(self._postings.get(gram, ()))
+
+        postings = [self._postings.get(gram, set()) for gram in grams]
+        # Dice >= min_score bounds the entry's trigram count relative to the key's
+        longest = len(grams) * (2.0 - min_score) / min_score if min_score > 0 else float("inf")
+        scores = {}
+        for entry_id in candidates:
+            if self._gram_counts[entry_id] > longest and not prefix:
+                continue
+            shared = sum(1 for gram_postings in postings if entry_id in gram_postings)
+            score = 2.0 * shared / (len(grams) + self._gram_counts[entry_id])
+            entry_key = self._entries[entry_id][0]
+            if prefix and len(key) >= 3 and entry_key.startswith(key):
+                # Prefix of a name: the user stopped typing early
+                score = max(score, 0.6 + 0.35 * len(key) / len(entry_key))
+            if score >= min_score:
+                scores[entry_id] = score
+        return scores
+
+    def find_in_text(self, text: str, fuzzy: bool = True) -> List[Dict[str, Any]]:
+        """
+        Find the tickers mentioned in free text.
+
+        Explicit tickers count only when written in capitals ("ON" but not "on") and
+        known to the index; names and aliases match case-insensitively, longest
+        first. With ``fuzzy``, the words left over are matched against names with a
+        strict similarity threshold to catch misspellings: stopwords and common
+        words ("the", "general", "semiconductor") are dropped first, and a word or
+        word pair only matches a name when one of its words is a word of that name
+        (or a misspelling of one) other than a stopword or common word, so "the
+        general market" does not find General Electric.
+
+        Args:
+            text: Free text (e.g. a user question)
+            fuzzy: Also look for misspelled names
+
+        Returns:
+            One match per ticker in order of appearance: ticker, name, matched, score
+        """
+        self.sync()
+        found: Dict[str, Tuple[int, Dict[str, Any]]] = {}
+
+        def record(position: int, entry_ids: Iterable[int], score: float) -> None:
+            for entry_id in entry_ids:
+                key, ticker, display, _ = self._entries[entry_id]
+                previous = found.get(ticker)
+                if previous is None or score > previous[1]["score"]:
+                    first = min(position, previous[0]) if previous else position
+                    found[ticker] = (first, {"ticker": ticker, "name": display, "matched": key, "score": score})
+
+        with self._lock:
+            for match in TICKER_TOKEN_PATTERN.finditer(text):
+                entry_ids = [
+                    i for i in self._exact.get(normalize(match.group()), ())
+                    if self._entries[i][3] == TICKER_KIND
+                ]
+                record(match.start(), entry_ids, 1.0)
+
+            word_matches = list(WORD_PATTERN.finditer(text.lower()))
+            words = [m.group() for m in word_matches]
+            used = [False] * len(words)
+
+            def spans(lengths: Iterable[int]):
+                for span in lengths:
+                    for start in range(len(words) - span + 1):
+                        if not any(used[start:start + span]):
+                            yield start, span, " ".join(words[start:start + span])
+
+            for start, span, key in spans(range(min(MAX_SPAN_WORDS, len(words)), 0, -1)):
+                if any(used[start:start + span]):
+                    continue
+                entry_ids = [i for i in self._exact.get(key, ()) if self._entries[i][3] != TICKER_KIND]
+                if entry_ids:
+                    record(word_matches[start].start(), entry_ids, 1.0)
+                    used[start:start + span] = [True] * span
+
+            if fuzzy:
+                # Word pairs and words of the remaining text, without stopwords and common words
+                kept = [i for i, word in enumerate(words) if not used[i] and not _generic(word)]
+                candidates = [(kept[k], kept[k + 1]) for k in range(len(kept) - 1)
+                              if all(used[i] or _generic(words[i]) for i in range(kept[k] + 1, kept[k + 1]))]
+                candidates += [(i,) for i in kept]
+                for positions in candidates:
+                    key = " ".join(words[i] for i in positions)
+                    if len(key) < 5 or any(used[i] for i in positions):
+                        continue
+                    scores = {
+                        i: s for i, s in self._score(key, prefix=False, min_score=TEXT_MIN_SCORE).items()
+                        if self._entries[i][3] != TICKER_KIND and _names_word(positions, words, self._entries[i][0])
+                    }
+                    if scores:
+                        best = max(scores.values())
+                        record(word_matches[positions[0]].start(), [i for i, s in scores.items() if s == best], round(best, 4))
+                        for i in positions:
+                            used[i] = True
+
+        return [match for _, match in sorted(found.values(), key=lambda item: item[0])]
+
+    def stats(self) -> Dict[str, int]:
+        """Return the number of indexed names, tickers and trigrams."""
+        self.sync()
+        with self._lock:
+            live = [e for e in self._entries if e is not None]
+            return {
+                "names": len(live),
+                "tickers": len({e[1] for e in live}),
+                "trigrams": len(self._postings),
+            }
+
+
+_indexes: Dict[str, EntityIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_entity_index(indexes_dir: Path) -> EntityIndex:
+    """Return the process-wide entity index of one ``_indexes`` directory."""
+    key = os.path.realpath(indexes_dir)
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = _indexes[key] = EntityIndex(Path(indexes_dir))
+        return index
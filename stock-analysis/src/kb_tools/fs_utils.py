@@ -0,0 +1,178 @@
+"""Filesystem helpers shared by the knowledge base tools"""
+
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Any
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    FCNTL_AVAILABLE = False
+
+try:
+    import msvcrt
+    MSVCRT_AVAILABLE = True
+except ImportError:
+    MSVCRT_AVAILABLE = False
+
+# Windows process query constants (see process_alive)
+PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+STILL_ACTIVE = 259
+ERROR_ACCESS_DENIED = 5
+
+
+def atomic_write_bytes(file_path: Path, data: bytes) -> None:
+    """
+    Write bytes to a file atomically (temp file in the same directory + rename).
+
+    Args:
+        file_path: Destination path
+        data: Content to write
+    """
+    file_path = Path(file_path)
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+
+    fd, temp_name = tempfile.mkstemp(dir=file_path.parent, prefix=f".{file_path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(temp_name, file_path)
+    except BaseException:
+        if os.path.exists(temp_name):
+            os.unlink(temp_name)
+        raise
+
+
+def fsync_dir(directory: Path) -> None:
+    """
+    Flush a directory entry to disk so that renames inside it survive a crash.
+
+    Args:
+        directory: Directory to flush (no-op on platforms without directory fsync)
+    """
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def atomic_write_json(file_path: Path, data: Any, indent: int = 2) -> None:
+    """
+    Serialize data as JSON and write it atomically.
+
+    Args:
+        file_path: Destination path
+        data: JSON-serializable data
+        indent: Indentation level (None for compact output)
+    """
+    separators = (",", ":") if indent is None else None
+    content = json.dumps(data, indent=indent, ensure_ascii=False, separators=separators)
+    atomic_write_bytes(file_path, content.encode("utf-8"))
+
+
+def process_alive(pid: int) -> bool:
+    """
+    Return True if another process with this pid is running (used to skip live journals).
+
+    Args:
+        pid: Process id recorded by a writer
+
+    Returns:
+        False for the calling process and for pids that no longer exist
+    """
+    if pid == os.getpid():
+        return False
+    if os.name == "nt":
+        return _windows_process_alive(pid)
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except (PermissionError, OSError):
+        return True
+    return True
+
+
+def _windows_process_alive(pid: int) -> bool:
+    """
+    Check a pid with OpenProcess/GetExitCodeProcess (os.kill on Windows would signal it).
+
+    Args:
+        pid: Process id recorded by a writer
+
+    Returns:
+        True if the process is running or cannot be queried for lack of access
+    """
+    import ctypes
+    from ctypes import wintypes
+
+    kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+    kernel32.OpenProcess.restype = wintypes.HANDLE
+    kernel32.OpenProcess.argtypes = (wintypes.DWORD, wintypes.BOOL, wintypes.DWORD)
+    kernel32.GetExitCodeProcess.argtypes = (wintypes.HANDLE, ctypes.POINTER(wintypes.DWORD))
+    kernel32.CloseHandle.argtypes = (wintypes.HANDLE,)
+
+    handle = kernel32.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+    if not handle:
+        # Access denied means the process exists; anything else (invalid pid) means it is gone
+        return ctypes.get_last_error() == ERROR_ACCESS_DENIED
+    try:
+        exit_code = wintypes.DWORD()
+        if not kernel32.GetExitCodeProcess(handle, ctypes.byref(exit_code)):
+            return True
+        return exit_code.value == STILL_ACTIVE
+    finally:
+        kernel32.CloseHandle(handle)
+
+
+class FileLock:
+    """
+    Exclusive inter-process lock on a file.
+
+    Uses fcntl.flock on POSIX and msvcrt.locking on Windows. On a platform with
+    neither the lock is a no-op and only the in-process locks of the callers apply.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._file = None
+
+    def __enter__(self):
+        if FCNTL_AVAILABLE or MSVCRT_AVAILABLE:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, "a+")
+            if FCNTL_AVAILABLE:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+            else:
+                self._lock_windows()
+        return self
+
+    def _lock_windows(self) -> None:
+        """Lock the first byte of the file, waiting as long as another process holds it."""
+        self._file.seek(0)
+        while True:
+            try:
+                # LK_LOCK itself retries for about 10 seconds before raising
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_LOCK, 1)
+                return
+            except OSError:
+                continue
+
+    def __exit__(self, *exc):
+        if self._file:
+            if FCNTL_AVAILABLE:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            else:
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+            self._file.close()
+            self._file = None
@@ -0,0 +1,234 @@
+"""Graph Adjacency - Precomputed links between index nodes and multi-hop traversal"""
+
+from collections import deque
+from datetime import date as date_type
+from typing import Optional, Dict, Any, List, Iterable, Tuple, Callable
+
+# Edge types, named after what the edge points to
+STOCK_EDGE = "stock"
+TOPIC_EDGE = "topic"
+DATE_EDGE = "date"
+RELATED_STOCK_EDGE = "related_stock"
+RELATED_TOPIC_EDGE = "related_topic"
+EDGE_TYPES = (STOCK_EDGE, TOPIC_EDGE, DATE_EDGE, RELATED_STOCK_EDGE, RELATED_TOPIC_EDGE)
+
+DIRECTIONS = ("out", "in", "both")
+
+Edge = Tuple[str, str]  # (edge type, target node_id)
+
+
+def stock_node_id(ticker: str) -> str:
+    """Return the node_id of a ticker's stock node."""
+    return f"{ticker.replace(':', '_').upper()}_stock_index"
+
+
+def topic_node_id(topic: str) -> str:
+    """Return the node_id of a topic given its node_id or name."""
+    if topic.startswith("topic_"):
+        return topic
+    return f"topic_{topic.lower().replace(' ', '_')}"
+
+
+def date_node_id(date: str) -> str:
+    """Return the node_id of the month node covering a YYYY-MM[-DD] date."""
+    return f"date_{date[:7].replace('-', '_')}"
+
+
+def week_node_id(date: str) -> Optional[str]:
+    """Return the node_id of the ISO week node covering a YYYY-MM-DD date (None if not a full date)."""
+    try:
+        year, week, _ = date_type.fromisoformat(date[:10]).isocalendar()
+    except ValueError:
+        return None
+    return f"date_{year:04d}_W{week:02d}"
+
+
+def _stock_targets(entries: Iterable[Any]) -> List[str]:
+    targets = []
+    for entry in entries or []:
+        if isinstance(entry, dict):
+            if entry.get("stock_index_id"):
+                targets.append(entry["stock_index_id"])
+            elif entry.get("ticker"):
+                targets.append(stock_node_id(entry["ticker"]))
+        elif isinstance(entry, str) and entry:
+            targets.append(entry if entry.endswith("_stock_index") else stock_node_id(entry))
+    return targets
+
+
+def _topic_targets(entries: Iterable[Any]) -> List[str]:
+    targets = []
+    for entry in entries or []:
+        if isinstance(entry, dict):
+            name = entry.get("node_id") or entry.get("topic_index_id") or entry.get("topic_name")
+        else:
+            name = entry
+        if isinstance(name, str) and name:
+            targets.append(topic_node_id(name))
+    return targets
+
+
+def node_edges(node: Dict[str, Any]) -> List[Edge]:
+    """
+    Extract the outgoing edges of an index node from its link lists.
+
+    Root nodes link to their ``stocks`` and ``topics``; stock nodes to their
+    ``related_stocks``, ``related_topics`` and the month and week nodes of their reports;
+    topic nodes to their ``stocks``/``related_stocks`` and ``related_topics``; date
+    nodes to the stocks of their reports.
+
+    Args:
+        node: Index node
+
+    Returns:
+        Unique (edge type, target node_id) pairs in link order
+    """
+    node_type = node.get("node_type")
+    edges: List[Edge] = []
+    if node_type == "root":
+        edges += [(STOCK_EDGE, t) for t in _stock_targets(node.get("stocks"))]
+        edges += [(TOPIC_EDGE, t) for t in _topic_targets(node.get("topics"))]
+    elif node_type == "stock":
+        edges += [(RELATED_STOCK_EDGE, t) for t in _stock_targets(node.get("related_stocks"))]
+        edges += [(RELATED_TOPIC_EDGE, t) for t in _topic_targets(node.get("related_topics"))]
+        report_dates = [r["date"] for r in node.get("reports", []) if r.get("date")]
+        edges += [(DATE_EDGE, date_node_id(d)) for d in report_dates]
+        edges += [(DATE_EDGE, w) for w in map(week_node_id, report_dates) if w]
+    elif node_type == "topic":
+        edges += [(STOCK_EDGE, t) for t in _stock_targets(node.get("stocks"))]
+        edges += [(RELATED_STOCK_EDGE, t) for t in _stock_targets(node.get("related_stocks"))]
+        edges += [(RELATED_TOPIC_EDGE, t) for t in _topic_targets(node.get("related_topics"))]
+    elif node_type == "date":
+        edges += [(STOCK_EDGE, stock_node_id(r["ticker"])) for r in node.get("reports", []) if r.get("ticker")]
+
+    own_id = node.get("node_id")
+    return [edge for edge in dict.fromkeys(edges) if edge[1] != own_id]
+
+
+class Adjacency:
+    """
+    In-memory adjacency lists of the index graph, keyed by node_id.
+
+    Outgoing edges are stored per source node (keyed by the node's path, so a
+    rewritten or deleted node replaces exactly its own edges), with a reverse map
+    for incoming edges.
+    """
+
+    def __init__(self):
+        """Initialize an empty adjacency."""
+        self._out: Dict[str, Tuple[str, List[Edge]]] = {}  # path -> (node_id, edges)
+        self._by_id: Dict[str, str] = {}  # node_id -> path
+        self._in: Dict[str, Dict[Edge, None]] = {}  # target -> {(edge type, source): None}
+
+    def set_node(self, relative_path: str, node: Dict[str, Any]) -> None:
+        """Replace the outgoing edges of the node stored at a path."""
+        self.remove_node(relative_path)
+        node_id = node.get("node_id")
+        if not node_id:
+            return
+        edges = node_edges(node)
+        self._out[relative_path] = (node_id, edges)
+        self._by_id[node_id] = relative_path
+        for edge_type, target in edges:
+            self._in.setdefault(target, {})[(edge_type, node_id)] = None
+
+    def remove_node(self, relative_path: str) -> None:
+        """Drop the outgoing edges of the node stored at a path."""
+        previous = self._out.pop(relative_path, None)
+        if previous is None:
+            return
+        node_id, edges = previous
+        if self._by_id.get(node_id) == relative_path:
+            del self._by_id[node_id]
+        for edge_type, target in edges:
+            incoming = self._in.get(target)
+            if incoming is not None:
+                incoming.pop((edge_type, node_id), None)
+                if not incoming:
+                    del self._in[target]
+
+    def clear(self) -> None:
+        """Drop every edge."""
+        self._out.clear()
+        self._by_id.clear()
+        self._in.clear()
+
+    def adjacent(self, node_ids: Iterable[str]) -> Dict[str, List[Tuple[str, str, str]]]:
+        """
+        Return the edges touching nodes.
+
+        Args:
+            node_ids: Node identifiers
+
+        Returns:
+            Dictionary of node_id to (edge type, other node_id, "out" or "in") tuples
+        """
+        result = {}
+        for node_id in node_ids:
+            edges = []
+            path = self._by_id.get(node_id)
+            if path is not None:
+                edges += [(edge_type, target, "out") for edge_type, target in self._out[path][1]]
+            edges += [(edge_type, source, "in") for edge_type, source in self._in.get(node_id, {})]
+            result[node_id] = edges
+        return result
+
+
+def traverse(
+    adjacent: Callable[[List[str]], Dict[str, List[Tuple[str, str, str]]]],
+    start: str,
+    depth: int = 1,
+    edge_types: Optional[Iterable[str]] = None,
+    direction: str = "both",
+    max_nodes: int = 50
+) -> Tuple[Dict[str, Dict[str, Any]], List[Dict[str, Any]], bool]:
+    """
+    Breadth-first walk from a node, one adjacency lookup per hop.
+
+    Args:
+        adjacent: Function returning the edges of a list of node_ids (see ``Adjacency.adjacent``)
+        start: Node to start from
+        depth: Maximum number of hops
+        edge_types: Only follow these edge types (default: all)
+        direction: Follow outgoing ("out"), incoming ("in") or all ("both") edges
+        max_nodes: Stop after reaching this many nodes besides the start
+
+    Returns:
+        (reached, edges, truncated): reached maps node_id to {"depth", "via", "from"}
+        for every node reached (the start has depth 0), edges lists each followed
+        edge as {"from", "to", "type"} in the direction it is stored, and truncated
+        is True if ``max_nodes`` stopped the walk
+
+    Raises:
+        ValueError: If an edge type or the direction is unknown
+    """
+    if direction not in DIRECTIONS:
+        raise ValueError(f"Unknown direction {direction!r}, expected one of {', '.join(DIRECTIONS)}")
+    allowed = set(edge_types) if edge_types else set(EDGE_TYPES)
+    unknown = allowed - set(EDGE_TYPES)
+    if unknown:
+        raise ValueError(f"Unknown edge types {sorted(unknown)}, expected some of {', '.join(EDGE_TYPES)}")
+
+    reached: Dict[str, Dict[str, Any]] = {start: {"depth": 0, "via": None, "from": None}}
+    edges: List[Dict[str, Any]] = []
+    seen_edges = set()
+    frontier = deque([start])
+    for hop in range(1, max(depth, 0) + 1):
+        if not frontier:
+            break
+        next_frontier = deque()
+        for node_id, links in adjacent(list(frontier)).items():
+            for edge_type, other, edge_direction in links:
+                if edge_type not in allowed or (direction != "both" and edge_direction != direction):
+                    continue
+                if other not in reached:
+                    if len(reached) > max_nodes:
+                        return reached, edges, True
+                    reached[other] = {"depth": hop, "via": edge_type, "from": node_id}
+                    next_frontier.append(other)
+                source, target = (node_id, other) if edge_direction == "out" else (other, node_id)
+                if (source, target, edge_type) not in seen_edges:
+                    seen_edges.add((source, target, edge_type))
+                    edges.append({"from": source, "to": target, "type": edge_type})
+        frontier = next_frontier
+    return reached, edges, False
@@ -0,0 +1,649 @@
+"""Index Graph - Resident copy of the graph index nodes in _indexes/"""
+
+import atexit
+import base64
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Tuple
+
+from .fs_utils import atomic_write_bytes, fsync_dir, process_alive
+from .graph_adjacency import Adjacency
+from .report_codec import decode_report
+from .report_writer import ReportWriter, fsync_enabled
+
+logger = logging.getLogger(__name__)
+
+ROOT_NODE = "root.json"
+NODE_DIRS = ("stocks", "topics", "dates")
+DEFAULT_POLL_INTERVAL = 1.0
+DEFAULT_FLUSH_INTERVAL = 0.0
+
+# Flushes in progress, under _indexes/ (replayed if the writing process died)
+JOURNAL_DIR = "_journal"
+JOURNAL_SUFFIX = ".journal"
+
+# Node stores: one JSON file per node, or one SQLite database (see sqlite_index_store)
+FILES_STORE = "files"
+SQLITE_STORE = "sqlite"
+SQLITE_DATABASE = "nodes.db"
+
+
+def poll_interval() -> float:
+    """Return KB_INDEX_POLL_INTERVAL: seconds between checks for index files changed on disk."""
+    configured = os.getenv("KB_INDEX_POLL_INTERVAL")
+    if configured:
+        try:
+            return max(0.0, float(configured))
+        except ValueError:
+            logger.warning(f"Invalid KB_INDEX_POLL_INTERVAL={configured!r}, using default")
+    return DEFAULT_POLL_INTERVAL
+
+
+def flush_interval() -> float:
+    """Return KB_INDEX_FLUSH_INTERVAL: seconds node writes may be held back and coalesced (0 writes through)."""
+    configured = os.getenv("KB_INDEX_FLUSH_INTERVAL")
+    if configured:
+        try:
+            return max(0.0, float(configured))
+        except ValueError:
+            logger.warning(f"Invalid KB_INDEX_FLUSH_INTERVAL={configured!r}, using default")
+    return DEFAULT_FLUSH_INTERVAL
+
+
+def default_index_store(indexes_dir: Path) -> str:
+    """
+    Return the index node store: KB_INDEX_STORE if set, otherwise "sqlite" when the
+    knowledge base already has a node database, else "files".
+    """
+    configured = os.getenv("KB_INDEX_STORE", "").strip().lower()
+    if configured in (FILES_STORE, SQLITE_STORE):
+        return configured
+    if configured:
+        logger.warning(f"Unknown KB_INDEX_STORE={configured!r}, detecting from the knowledge base")
+    if (Path(indexes_dir) / SQLITE_DATABASE).exists():
+        return SQLITE_STORE
+    return FILES_STORE
+
+
+def node_text(node: Dict[str, Any]) -> str:
+    """Text of a node that index search matches against."""
+    text_fields = [
+        node.get("summary", ""),
+        node.get("topic_name", ""),
+        node.get("ticker", ""),
+        node.get("company_name", ""),
+    ]
+    return " ".join(str(f) for f in text_fields if f)
+
+
+def node_date(node: Dict[str, Any]) -> Optional[str]:
+    """Date a node is listed under: a date node's first day or month, or a stock's latest report date."""
+    return node.get("start_date") or node.get("date_range") or node.get("latest_report_date") or None
+
+
+def node_matches(
+    node: Dict[str, Any],
+    node_type: Optional[str] = None,
+    ticker: Optional[str] = None,
+    start: Optional[str] = None,
+    end: Optional[str] = None
+) -> bool:
+    """
+    Check a node against listing filters.
+
+    Dates are compared as text, so "2026-01" as ``end`` includes "2026-01-31" and as
+    ``start`` includes every day of January.
+    """
+    if node_type and node.get("node_type") != node_type:
+        return False
+    if ticker and node.get("ticker") != ticker:
+        return False
+    if start or end:
+        date = node_date(node)
+        if not date or (start and date < start) or (end and date > end + "\uffff"):
+            return False
+    return True
+
+
+class IndexGraph:
+    """
+    Every graph node (``root.json``, ``stocks/``, ``topics/``, ``dates/``) held in memory.
+
+    The graph is loaded once and then served from a dictionary keyed by the node's
+    path relative to ``_indexes/``. Changes made by other processes are picked up by
+    polling: at most every ``poll_interval`` seconds a read rescans the node
+    directories and reloads files whose mtime or size changed. Writers in this
+    process go through ``put``/``remove``, which update the file and the resident
+    node together, so their changes are visible immediately.
+
+    Nodes are shared between callers and must be treated as read-only.
+
+    Writes can be held back and coalesced: inside ``batch()``, or for up to
+    ``flush_interval`` seconds when it is set, ``put``/``remove`` only update the
+    resident node and mark it dirty, so a node changed many times is written once.
+    Batches are tracked per thread: a thread outside any batch writes through while
+    another thread's batch is open (unless the node is already dirty), and the dirty
+    nodes are flushed when the last open batch exits. Writers that read, modify and
+    put shared nodes (root, stock, topic) hold ``update_lock`` around the whole change.
+    ``flush`` writes every dirty node in one journaled group: the new contents are
+    recorded in ``_indexes/_journal/`` first, so a flush interrupted by a crash is
+    completed from the journal on the next load instead of leaving some nodes old and
+    some new. Changes not yet flushed are lost if the process dies; pending changes
+    are flushed at exit.
+    """
+
+    def __init__(
+        self,
+        indexes_dir: Path,
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+        fsync: Optional[bool] = None
+    ):
+        """
+        Initialize Index Graph.
+
+        Args:
+            indexes_dir: The knowledge base's ``_indexes`` directory
+            poll_interval: Seconds between rescans for external changes (0 rescans on every read)
+            flush_interval: Seconds writes may stay buffered before a background flush
+                (0 writes through, except inside ``batch()``)
+            fsync: Flush the journal and node files to disk (defaults to KB_WRITE_FSYNC)
+        """
+        self.indexes_dir = Path(indexes_dir)
+        self.journal_dir = self.indexes_dir / JOURNAL_DIR
+        self.poll_interval = poll_interval
+        self.flush_interval = flush_interval
+        self.fsync = fsync_enabled() if fsync is None else fsync
+        self._writer = ReportWriter(self.indexes_dir, fsync=self.fsync)
+        self._nodes: Dict[str, Tuple[int, int, Dict[str, Any]]] = {}
+        self._loaded = False
+        self._last_poll = 0.0
+        self._lock = threading.RLock()
+        self.reloads = 0
+
+        # Links between resident nodes, updated with every node loaded, written or dropped
+        self._adjacency = Adjacency()
+
+        # Write-behind state: relative path -> (node, indent), or None to delete
+        self._dirty: Dict[str, Optional[Tuple[Dict[str, Any], Optional[int]]]] = {}
+        self._batches = threading.local()
+        self._open_batches = 0
+        self._generation = 0
+        self._timer: Optional[threading.Timer] = None
+        self.flushes = 0
+        self.coalesced = 0
+
+        # Serializes read-modify-write of nodes across the threads of this process
+        self.update_lock = threading.RLock()
+
+    def get(self, relative_path: str) -> Optional[Dict[str, Any]]:
+        """
+        Return a node by its path relative to ``_indexes/`` (e.g. "stocks/AAPL.json").
+
+        Args:
+            relative_path: Node file path relative to the indexes directory
+
+        Returns:
+            Shared, read-only node or None if it does not exist
+        """
+        with self._lock:
+            self._poll()
+            entry = self._nodes.get(relative_path)
+            return entry[2] if entry else None
+
+    def entries(self, directory: Optional[str] = None) -> Dict[str, Tuple[int, Dict[str, Any]]]:
+        """
+        Return resident nodes with their file versions.
+
+        Args:
+            directory: Only nodes in this directory ("stocks", "topics", "dates"),
+                or "" for the root node; None returns every node
+
+        Returns:
+            Dictionary of relative path to (file mtime in ns, shared read-only node)
+        """
+        with self._lock:
+            self._poll()
+            return {
+                path: (entry[0], entry[2]) for path, entry in self._nodes.items()
+                if directory is None or self._directory(path) == directory
+            }
+
+    def nodes(self, directory: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Return resident nodes by relative path.
+
+        Args:
+            directory: Only nodes in this directory ("stocks", "topics", "dates"),
+                or "" for the root node; None returns every node
+
+        Returns:
+            Dictionary of relative path to shared, read-only node
+        """
+        return {path: node for path, (_, node) in self.entries(directory).items()}
+
+    def paths(self, directory: Optional[str] = None) -> List[str]:
+        """Return the relative paths of resident nodes, sorted (see ``nodes``)."""
+        return sorted(self.entries(directory))
+
+    def query(
+        self,
+        node_type: Optional[str] = None,
+        ticker: Optional[str] = None,
+        start: Optional[str] = None,
+        end: Optional[str] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Return resident nodes matching listing filters.
+
+        Args:
+            node_type: Node type (root, stock, topic, date)
+            ticker: Normalized ticker
+            start: Earliest node date (YYYY-MM or YYYY-MM-DD)
+            end: Latest node date (a month includes all of its days)
+
+        Returns:
+            Dictionary of relative path to shared, read-only node, sorted by path
+        """
+        return {
+            path: node for path, node in sorted(self.nodes().items())
+            if node_matches(node, node_type, ticker, start, end)
+        }
+
+    def adjacent(self, node_ids: List[str]) -> Dict[str, List[Tuple[str, str, str]]]:
+        """
+        Return the edges touching nodes (see ``graph_adjacency.Adjacency.adjacent``).
+
+        Args:
+            node_ids: Node identifiers
+
+        Returns:
+            Dictionary of node_id to (edge type, other node_id, "out" or "in") tuples
+        """
+        with self._lock:
+            self._poll()
+            return self._adjacency.adjacent(node_ids)
+
+    def put(self, relative_path: str, node: Dict[str, Any], indent: Optional[int] = 2) -> Dict[str, Any]:
+        """
+        Write a node to disk atomically and make it the resident version.
+
+        The resident node is parsed back from the written bytes, so later changes
+        to ``node`` by the caller do not leak into the graph.
+
+        Args:
+            relative_path: Node file path relative to the indexes directory
+            node: JSON-serializable node
+            indent: JSON indentation (None for compact output)
+
+        Returns:
+            The resident (read-only) node
+
+        Raises:
+            IOError: If the file cannot be written
+            TypeError: If the node is not JSON-serializable
+        """
+        with self._lock:
+            if self._deferring(relative_path):
+                # Compact round trip (C encoder) to detach the node; formatted once at flush
+                resident = json.loads(json.dumps(node, ensure_ascii=False, separators=(",", ":")))
+                self._defer(relative_path, (resident, indent))
+                self._generation += 1
+                # Negative versions mark nodes not written yet; they change on every put
+                self._nodes[relative_path] = (-self._generation, 0, resident)
+                self._adjacency.set_node(relative_path, resident)
+                return resident
+
+            content = self._encode(node, indent)
+            resident = json.loads(content)
+            file_path = self.indexes_dir / relative_path
+            atomic_write_bytes(file_path, content)
+            stat = file_path.stat()
+            self._nodes[relative_path] = (stat.st_mtime_ns, stat.st_size, resident)
+            self._adjacency.set_node(relative_path, resident)
+            return resident
+
+    def remove(self, relative_path: str) -> bool:
+        """
+        Delete a node file and drop it from the graph.
+
+        Args:
+            relative_path: Node file path relative to the indexes directory
+
+        Returns:
+            True if a node was removed
+        """
+        with self._lock:
+            removed = self._nodes.pop(relative_path, None) is not None
+            self._adjacency.remove_node(relative_path)
+            if self._deferring(relative_path):
+                self._defer(relative_path, None)
+                return removed
+            try:
+                (self.indexes_dir / relative_path).unlink()
+                removed = True
+            except FileNotFoundError:
+                pass
+            return removed
+
+    @contextmanager
+    def batch(self):
+        """
+        Hold back node writes until the outermost ``batch`` exits, then flush them once.
+
+        Example:
+            with graph.batch():
+                for report in reports:
+                    ...  # any number of put() calls per node
+        """
+        depth = self._batch_depth()
+        with self._lock:
+            self._batches.depth = depth + 1
+            if depth == 0:
+                self._open_batches += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._batches.depth = depth
+                if depth == 0:
+                    self._open_batches -= 1
+                last = self._open_batches == 0
+            if depth == 0 and last:
+                self.flush()
+
+    def pending(self) -> int:
+        """Return the number of dirty nodes waiting to be flushed."""
+        with self._lock:
+            return len(self._dirty)
+
+    def flush(self) -> int:
+        """
+        Write every dirty node, each once, as one journaled group.
+
+        Returns:
+            Number of node files written or deleted
+
+        Raises:
+            IOError: If the journal or a node file cannot be written (dirty nodes are kept)
+        """
+        with self._lock:
+            if self._timer:
+                self._timer.cancel()
+                self._timer = None
+            if not self._dirty:
+                return 0
+            dirty = {
+                relative_path: self._encode(*pending) if pending is not None else None
+                for relative_path, pending in self._dirty.items()
+            }
+            journal_path = self._begin(dirty)
+            try:
+                self._apply(dirty)
+            except BaseException:
+                # The nodes stay dirty and the retry writes a new journal; replaying this
+                # one later could overwrite newer contents
+                journal_path.unlink(missing_ok=True)
+                raise
+            self._dirty.clear()
+            for relative_path, content in dirty.items():
+                entry = self._nodes.get(relative_path)
+                if content is not None and entry:
+                    stat = (self.indexes_dir / relative_path).stat()
+                    self._nodes[relative_path] = (stat.st_mtime_ns, stat.st_size, entry[2])
+            self._writer.commit(journal_path)
+            self.flushes += 1
+            logger.debug(f"Flushed {len(dirty)} index node(s)")
+            return len(dirty)
+
+    def _batch_depth(self) -> int:
+        """Return how many batches the calling thread has open."""
+        return getattr(self._batches, "depth", 0)
+
+    def _deferring(self, relative_path: str) -> bool:
+        # A node dirty from another thread's batch stays deferred so writes land in order
+        return self._batch_depth() > 0 or self.flush_interval > 0 or relative_path in self._dirty
+
+    @staticmethod
+    def _encode(node: Dict[str, Any], indent: Optional[int]) -> bytes:
+        separators = (",", ":") if indent is None else None
+        return json.dumps(node, indent=indent, ensure_ascii=False, separators=separators).encode("utf-8")
+
+    def _defer(self, relative_path: str, pending: Optional[Tuple[Dict[str, Any], Optional[int]]]) -> None:
+        """Mark a node dirty (caller holds the lock) and arm the background flush."""
+        if relative_path in self._dirty:
+            self.coalesced += 1
+        self._dirty[relative_path] = pending
+        if self._open_batches == 0 and self.flush_interval > 0 and self._timer is None:
+            self._timer = threading.Timer(self.flush_interval, self._flush_in_background)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _flush_in_background(self) -> None:
+        with self._lock:
+            self._timer = None
+            if self._open_batches:
+                return
+        try:
+            self.flush()
+        except (IOError, OSError) as e:
+            logger.error(f"Background index flush failed, will retry on next write: {e}")
+
+    def _begin(self, dirty: Dict[str, Optional[bytes]]) -> Path:
+        """Durably record the contents of a flush before any node file is touched."""
+        self.journal_dir.mkdir(parents=True, exist_ok=True)
+        body = "\n".join(json.dumps({
+            "path": relative_path,
+            "data": base64.b64encode(content).decode("ascii") if content is not None else None,
+        }) for relative_path, content in dirty.items()).encode("utf-8")
+        trailer = json.dumps({"count": len(dirty), "sha256": hashlib.sha256(body).hexdigest()})
+
+        name = f"{time.time_ns():020d}-{os.getpid()}{JOURNAL_SUFFIX}"
+        journal_path = self.journal_dir / name
+        fd, temp_name = tempfile.mkstemp(dir=self.journal_dir, prefix=f".{name}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(body + b"\n" + trailer.encode("utf-8") + b"\n")
+                if self.fsync:
+                    f.flush()
+                    os.fsync(f.fileno())
+            os.replace(temp_name, journal_path)
+        except BaseException:
+            if os.path.exists(temp_name):
+                os.unlink(temp_name)
+            raise
+        if self.fsync:
+            fsync_dir(self.journal_dir)
+        return journal_path
+
+    def _apply(self, dirty: Dict[str, Optional[bytes]]) -> None:
+        """Write (temp files, one fsync pass, renames) and delete node files."""
+        self._writer.apply([
+            {"path": relative_path, "data": content}
+            for relative_path, content in dirty.items() if content is not None
+        ])
+        for relative_path, content in dirty.items():
+            if content is None:
+                (self.indexes_dir / relative_path).unlink(missing_ok=True)
+
+    def _recover(self) -> int:
+        """Complete flushes interrupted by a crash (caller holds the lock)."""
+        if not self.journal_dir.exists():
+            return 0
+        recovered = 0
+        for journal_path in sorted(self.journal_dir.glob(f"*{JOURNAL_SUFFIX}")):
+            pid = journal_path.stem.rsplit("-", 1)[-1]
+            if pid.isdigit() and process_alive(int(pid)):
+                continue  # another process is flushing right now
+            dirty = self._read_journal(journal_path)
+            if dirty is not None:
+                self._apply(dirty)
+                recovered += len(dirty)
+                logger.info(f"Completed interrupted index flush {journal_path.name} ({len(dirty)} nodes)")
+            journal_path.unlink(missing_ok=True)
+        return recovered
+
+    @staticmethod
+    def _read_journal(journal_path: Path) -> Optional[Dict[str, Optional[bytes]]]:
+        try:
+            content = journal_path.read_bytes()
+        except FileNotFoundError:
+            return None
+        body, _, trailer = content.rstrip(b"\n").rpartition(b"\n")
+        try:
+            check = json.loads(trailer)
+            if hashlib.sha256(body).hexdigest() != check["sha256"]:
+                raise ValueError("checksum mismatch")
+            dirty: Dict[str, Optional[bytes]] = {}
+            for line in body.splitlines():
+                entry = json.loads(line)
+                dirty[entry["path"]] = base64.b64decode(entry["data"]) if entry["data"] is not None else None
+            if len(dirty) != check["count"]:
+                raise ValueError("entry count mismatch")
+        except (ValueError, KeyError, TypeError) as e:
+            # A damaged journal was never complete, so none of its files were touched
+            logger.warning(f"Discarding damaged index journal {journal_path}: {e}")
+            return None
+        return dirty
+
+    def refresh(self) -> int:
+        """
+        Rescan the node directories now, regardless of the poll interval.
+
+        Returns:
+            Number of nodes loaded, reloaded or dropped
+        """
+        with self._lock:
+            return self._rescan()
+
+    def _poll(self) -> None:
+        if not self._loaded or time.monotonic() - self._last_poll >= self.poll_interval:
+            self._rescan()
+
+    def _rescan(self) -> int:
+        """Reload changed node files and drop deleted ones (caller holds the lock)."""
+        if not self._loaded:
+            self._recover()
+        # Dirty nodes are newer in memory than on disk
+        seen = set(self._dirty)
+        changed = 0
+        for relative_path, stat in self._scan():
+            if relative_path in self._dirty:
+                continue
+            seen.add(relative_path)
+            entry = self._nodes.get(relative_path)
+            if entry and entry[0] == stat.st_mtime_ns and entry[1] == stat.st_size:
+                continue
+            try:
+                with open(self.indexes_dir / relative_path, "rb") as f:
+                    node = decode_report(f.read())
+            except FileNotFoundError:
+                seen.discard(relative_path)
+                continue
+            except (json.JSONDecodeError, IOError) as e:
+                logger.warning(f"Error reading index file {self.indexes_dir / relative_path}: {e}")
+                continue
+            self._nodes[relative_path] = (stat.st_mtime_ns, stat.st_size, node)
+            self._adjacency.set_node(relative_path, node)
+            changed += 1
+
+        for relative_path in [p for p in self._nodes if p not in seen]:
+            del self._nodes[relative_path]
+            self._adjacency.remove_node(relative_path)
+            changed += 1
+
+        if self._loaded:
+            self.reloads += changed
+        self._loaded = True
+        self._last_poll = time.monotonic()
+        return changed
+
+    def _scan(self):
+        """Yield (relative path, stat) for every node file on disk."""
+        try:
+            yield ROOT_NODE, (self.indexes_dir / ROOT_NODE).stat()
+        except FileNotFoundError:
+            pass
+        for directory in NODE_DIRS:
+            try:
+                with os.scandir(self.indexes_dir / directory) as entries:
+                    for entry in entries:
+                        if entry.name.endswith(".json") and not entry.name.startswith("."):
+                            try:
+                                yield f"{directory}/{entry.name}", entry.stat()
+                            except FileNotFoundError:
+                                continue
+            except FileNotFoundError:
+                continue
+
+    @staticmethod
+    def _directory(relative_path: str) -> str:
+        return relative_path.rsplit("/", 1)[0] if "/" in relative_path else ""
+
+
+_graphs: Dict[str, Any] = {}
+_graphs_lock = threading.Lock()
+
+
+def get_index_graph(indexes_dir: Path, store: Optional[str] = None):
+    """
+    Return the process-wide node store of one ``_indexes`` directory.
+
+    Every IndexTools, DateIndex and KBArchive of a knowledge base shares the same
+    instance, so a node written through one is immediately visible to the others.
+    The store is an IndexGraph over JSON files or a SQLiteIndexStore, chosen by
+    ``default_index_store``. For the files store, the poll and flush intervals are
+    read from KB_INDEX_POLL_INTERVAL (default: 1 second) and KB_INDEX_FLUSH_INTERVAL
+    (default: 0, write-through) when the graph is created.
+
+    Args:
+        indexes_dir: The knowledge base's ``_indexes`` directory
+        store: "files" or "sqlite" to open if no store is open yet (default:
+            ``default_index_store``)
+    """
+    key = os.path.realpath(indexes_dir)
+    with _graphs_lock:
+        graph = _graphs.get(key)
+        if graph is None:
+            if (store or default_index_store(indexes_dir)) == SQLITE_STORE:
+                from .sqlite_index_store import SQLiteIndexStore
+                graph = SQLiteIndexStore(Path(indexes_dir))
+            else:
+                graph = IndexGraph(
+                    Path(indexes_dir), poll_interval=poll_interval(), flush_interval=flush_interval()
+                )
+            _graphs[key] = graph
+        return graph
+
+
+def release_index_graph(indexes_dir: Path) -> None:
+    """
+    Flush and forget the shared store of an ``_indexes`` directory, so the next
+    ``get_index_graph`` opens the store again (e.g. after converting it).
+    """
+    with _graphs_lock:
+        graph = _graphs.pop(os.path.realpath(indexes_dir), None)
+    if graph is not None:
+        graph.flush()
+        if hasattr(graph, "close"):
+            graph.close()
+
+
+@atexit.register
+def flush_all() -> None:
+    """Flush the pending writes of every graph (also run at interpreter exit)."""
+    with _graphs_lock:
+        graphs = list(_graphs.values())
+    for graph in graphs:
+        try:
+            graph.flush()
+        except (IOError, OSError, sqlite3.Error) as e:
+            logger.error(f"Could not flush index graph {graph.indexes_dir}: {e}")
@@ -2,14 +2,29 @@
 
 import json
 import logging
+import os
+import sqlite3
 from pathlib import Path
 from typing import Optional, Dict, Any, List
 from datetime import datetime
-import tempfile
-import shutil
+
+from .bm25 import BM25Corpus
+from .entity_index import get_entity_index
+from .graph_adjacency import traverse
+from .index_graph import (
+    FILES_STORE, SQLITE_DATABASE, SQLITE_STORE, IndexGraph, get_index_graph, node_text, release_index_graph
+)
+from .vector_index import NODE_KIND, get_vector_index
 
 logger = logging.getLogger(__name__)
 
+# Directory (relative to _indexes/) holding each node type
+NODE_TYPE_DIRS = {"root": "", "topic": "topics", "stock": "stocks", "date": "dates"}
+
+
+def _node_dir(relative_path: str) -> str:
+    return relative_path.rsplit("/", 1)[0] if "/" in relative_path else ""
+
 
 class IndexTools:
     """Tools for managing graph-based index nodes in the knowledge base."""
@@ -23,58 +38,127 @@ class IndexTools:
         """
         self.kb_dir = Path(knowledge_base_dir)
         self.indexes_dir = self.kb_dir / "_indexes"
+        
+        # BM25 statistics over node text, refreshed per node when its file changes
+        self._node_corpus = BM25Corpus()
+        self._node_versions: Dict[str, int] = {}
         self.indexes_dir.mkdir(parents=True, exist_ok=True)
         
         # Ensure subdirectories exist
         (self.indexes_dir / "topics").mkdir(exist_ok=True)
         (self.indexes_dir / "stocks").mkdir(exist_ok=True)
         (self.indexes_dir / "dates").mkdir(exist_ok=True)
+        
+        # Resident graph shared by every IndexTools of this knowledge base
+        self.graph = get_index_graph(self.indexes_dir)
+        
+        # Ticker/company name lookup built from the root and stock nodes
+        self.entities = get_entity_index(self.indexes_dir)
     
-    def read_index(self, node_id: Optional[str] = None, node_path: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    def batch(self):
+        """
+        Coalesce index node writes until the block exits, then write each changed node once.
+        
+        Example:
+            with index_tools.batch():
+                index_tools.update_index("root", {...})
+                index_tools.update_index("root", {...})  # root.json is written once
+        """
+        return self.graph.batch()
+    
+    def updates(self):
+        """
+        Serialize read-modify-write of index nodes with the other writers in this process.
+        
+        Every writer that reads a shared node (root, stock, topic) and puts it back holds
+        this reentrant lock around the whole change. Take it before opening a batch.
+        
+        Example:
+            with index_tools.updates(), index_tools.batch():
+                root = index_tools.read_index(node_id="root", copy=True)
+                ...
+                index_tools.update_index("root", root)
+        """
+        return self.graph.update_lock
+    
+    def flush(self) -> int:
+        """
+        Write all buffered index node changes to disk now.
+        
+        Returns:
+            Number of node files written or deleted
+        """
+        return self.graph.flush()
+    
+    @staticmethod
+    def node_path(node_id: str) -> Optional[str]:
+        """
+        Return the index file (relative to _indexes/) of a node id.
+        
+        Args:
+            node_id: Unique node identifier (e.g., "AAPL_stock_index", "root")
+            
+        Returns:
+            Relative path or None if the node_id format is unknown
+        """
+        if node_id == "root":
+            return "root.json"
+        if node_id.endswith("_stock_index"):
+            ticker = node_id.replace("_stock_index", "")
+            return f"stocks/{ticker}.json"
+        if node_id.startswith("topic_"):
+            topic_name = node_id.replace("topic_", "")
+            return f"topics/{topic_name}.json"
+        if node_id.startswith("date_"):
+            date_str = node_id.replace("date_", "").replace("-", "_")
+            return f"dates/{date_str}.json"
+        return None
+    
+    def read_index(
+        self,
+        node_id: Optional[str] = None,
+        node_path: Optional[str] = None,
+        copy: bool = False
+    ) -> Optional[Dict[str, Any]]:
         """
         Read an index node from the knowledge base.
         
         Args:
             node_id: Unique node identifier (e.g., "AAPL_stock_index", "root")
             node_path: Relative path to index file (e.g., "stocks/AAPL.json", "root.json")
+            copy: Return a deep copy that the caller may modify
             
         Returns:
-            Index node dictionary or None if not found
+            Index node dictionary or None if not found. Unless ``copy`` is set, the
+            node is shared with the resident index graph and must not be modified.
         """
         if node_path:
-            file_path = self.indexes_dir / node_path
+            relative_path = Path(node_path).as_posix()
         elif node_id:
-            # Determine path from node_id
-            if node_id == "root":
-                file_path = self.indexes_dir / "root.json"
-            elif node_id.endswith("_stock_index"):
-                ticker = node_id.replace("_stock_index", "")
-                file_path = self.indexes_dir / "stocks" / f"{ticker}.json"
-            elif node_id.startswith("topic_"):
-                topic_name = node_id.replace("topic_", "")
-                file_path = self.indexes_dir / "topics" / f"{topic_name}.json"
-            elif node_id.startswith("date_"):
-                date_str = node_id.replace("date_", "").replace("-", "_")
-                file_path = self.indexes_dir / "dates" / f"{date_str}.json"
-            else:
+            relative_path = self.node_path(node_id)
+            if relative_path is None:
                 logger.warning(f"Unknown node_id format: {node_id}")
                 return None
         else:
             logger.error("Either node_id or node_path must be provided")
             return None
         
-        if not file_path.exists():
-            logger.debug(f"Index file not found: {file_path}")
-            return None
-        
-        try:
-            with open(file_path, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except (json.JSONDecodeError, IOError) as e:
-            logger.error(f"Error reading index file {file_path}: {e}")
+        node = self.graph.get(relative_path)
+        if node is None:
+            logger.debug(f"Index file not found: {self.indexes_dir / relative_path}")
             return None
+        if copy:
+            # Nodes are plain JSON, so a compact round trip is an exact (and fast) deep copy
+            return json.loads(json.dumps(node, ensure_ascii=False, separators=(",", ":")))
+        return node
     
-    def search_index(self, query_text: str, node_type: Optional[str] = None, max_results: int = 10) -> List[Dict[str, Any]]:
+    def search_index(
+        self,
+        query_text: str,
+        node_type: Optional[str] = None,
+        max_results: int = 10,
+        method: str = "bm25"
+    ) -> List[Dict[str, Any]]:
         """
         Search index nodes by text query.
         
@@ -82,69 +166,258 @@ class IndexTools:
             query_text: Search query
             node_type: Optional filter by node type (root, topic, stock, date)
             max_results: Maximum number of results to return
+            method: "bm25" ranks literal term matches; "semantic" ranks by cosine
+                similarity of embeddings (requires numpy)
             
         Returns:
             List of matching index nodes with relevance scores
+            
+        Raises:
+            ValueError: If the method is unknown
+            ImportError: If the semantic method is used without numpy
         """
+        if method == "semantic":
+            return self._semantic_search_index(query_text, node_type, max_results)
+        if method != "bm25":
+            raise ValueError(f"Unknown search method {method!r}, expected 'bm25' or 'semantic'")
+        
         results = []
-        query_lower = query_text.lower()
-        
-        # Search all index files
-        search_paths = []
-        if node_type is None or node_type == "root":
-            search_paths.append(self.indexes_dir / "root.json")
-        if node_type is None or node_type == "topic":
-            search_paths.extend(self.indexes_dir.glob("topics/*.json"))
-        if node_type is None or node_type == "stock":
-            search_paths.extend(self.indexes_dir.glob("stocks/*.json"))
-        if node_type is None or node_type == "date":
-            search_paths.extend(self.indexes_dir.glob("dates/*.json"))
-        
-        for file_path in search_paths:
-            if not file_path.exists():
-                continue
-            
-            try:
-                with open(file_path, "r", encoding="utf-8") as f:
-                    node = json.load(f)
-                    
-                # Simple text matching for now (can be enhanced with embeddings later)
-                relevance_score = self._calculate_relevance(node, query_lower)
-                if relevance_score > 0:
-                    results.append({
-                        "node_id": node.get("node_id"),
-                        "node_type": node.get("node_type"),
-                        "relevance_score": relevance_score,
-                        "summary": node.get("summary", ""),
-                        "node": node
-                    })
-            except (json.JSONDecodeError, IOError) as e:
-                logger.warning(f"Error reading index file {file_path}: {e}")
+        
+        # The SQLite store ranks nodes with its FTS5 index
+        if getattr(self.graph, "fts", False):
+            directory = NODE_TYPE_DIRS.get(node_type, node_type) if node_type is not None else None
+            for _, relevance_score, node in self.graph.search_text(query_text, directory, max_results):
+                results.append({
+                    "node_id": node.get("node_id"),
+                    "node_type": node.get("node_type"),
+                    "relevance_score": round(relevance_score, 6),
+                    "summary": node.get("summary", ""),
+                    "node": node
+                })
+            return results
+        
+        # Search the resident graph instead of re-reading index files
+        graph_nodes = self.graph.entries()
+        nodes = {}
+        for relative_path, (version, node) in graph_nodes.items():
+            if node_type is not None and NODE_TYPE_DIRS.get(node_type) != _node_dir(relative_path):
                 continue
+            nodes[str(self.indexes_dir / relative_path)] = self._index_search_node(relative_path, version, node)
+        
+        # Forget nodes whose files were deleted
+        live = {str(self.indexes_dir / p) for p in graph_nodes}
+        for key in [k for k in self._node_versions if k not in live]:
+            self._node_corpus.remove(key)
+            del self._node_versions[key]
+        
+        # BM25 over node text; IDF and length statistics cover every node seen so far
+        for key, relevance_score in self._node_corpus.score(query_text, keys=nodes).items():
+            node = nodes[key]
+            results.append({
+                "node_id": node.get("node_id"),
+                "node_type": node.get("node_type"),
+                "relevance_score": round(relevance_score, 6),
+                "summary": node.get("summary", ""),
+                "node": node
+            })
         
         # Sort by relevance and return top results
         results.sort(key=lambda x: x["relevance_score"], reverse=True)
         return results[:max_results]
     
-    def _calculate_relevance(self, node: Dict[str, Any], query: str) -> float:
-        """Calculate relevance score for a node against a query."""
-        score = 0.0
-        text_fields = [
-            node.get("summary", ""),
-            node.get("topic_name", ""),
-            node.get("ticker", ""),
-            node.get("company_name", ""),
-        ]
-        
-        combined_text = " ".join(str(f) for f in text_fields).lower()
-        query_words = query.split()
-        
-        for word in query_words:
-            if word in combined_text:
-                score += 1.0
-        
-        # Normalize by query length
-        return score / max(len(query_words), 1)
+    def resolve_ticker(self, name: str, limit: int = 5) -> List[Dict[str, Any]]:
+        """
+        Resolve a company name, alias or ticker to tickers in the knowledge base.
+        
+        Args:
+            name: Name to resolve; misspellings and partial names are tolerated
+                (e.g. "Alibaba", "tencent", "nvda", "alibba")
+            limit: Maximum number of candidates
+            
+        Returns:
+            Candidates best first, each with ticker, name, matched and score (1.0 = exact)
+        """
+        return self.entities.lookup(name, limit=limit)
+    
+    def find_tickers(self, text: str) -> List[Dict[str, Any]]:
+        """
+        Find the tickers of the knowledge base mentioned in free text.
+        
+        Args:
+            text: Free text such as a user question
+            
+        Returns:
+            One match per ticker in order of appearance (ticker, name, matched, score)
+        """
+        return self.entities.find_in_text(text)
+    
+    def list_nodes(
+        self,
+        node_type: Optional[str] = None,
+        ticker: Optional[str] = None,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        List index nodes matching filters (an indexed query on the SQLite store).
+        
+        Args:
+            node_type: Optional node type (root, topic, stock, date)
+            ticker: Optional ticker symbol
+            start_date: Optional earliest node date (YYYY-MM or YYYY-MM-DD): a date
+                node's month or a stock's latest report date
+            end_date: Optional latest node date (a month includes all of its days)
+            
+        Returns:
+            List of shared, read-only nodes sorted by path
+        """
+        if ticker:
+            ticker = ticker.replace(":", "_").upper()
+        return list(self.graph.query(node_type, ticker, start_date, end_date).values())
+    
+    def neighbors(
+        self,
+        node_id: str = "root",
+        depth: int = 1,
+        edge_types: Optional[List[str]] = None,
+        direction: str = "both",
+        max_nodes: int = 50
+    ) -> Dict[str, Any]:
+        """
+        Walk the index graph from a node in one call, using the precomputed adjacency.
+        
+        Edges come from the nodes' link lists: root -> stock/topic, stock ->
+        related_stock/related_topic/date (months of its reports), topic ->
+        stock/related_stock/related_topic, date -> stock. Following edges "in" as
+        well finds e.g. the stocks linking to a topic.
+        
+        Args:
+            node_id: Node to start from (e.g. "root", "AAPL_stock_index", "topic_technology")
+            depth: Maximum number of hops
+            edge_types: Only follow these edge types (stock, topic, date, related_stock,
+                related_topic); default all
+            direction: "out", "in" or "both"
+            max_nodes: Maximum number of nodes returned besides the start
+            
+        Returns:
+            Dictionary with the start node_id, the reached nodes (node_id, node_type,
+            depth, via edge type, from node_id, summary and identifying fields;
+            "missing" for links to nodes that do not exist), the followed edges and
+            whether max_nodes truncated the walk
+            
+        Raises:
+            ValueError: If an edge type or the direction is unknown
+        """
+        reached, edges, truncated = traverse(
+            self.graph.adjacent, node_id, depth=depth, edge_types=edge_types,
+            direction=direction, max_nodes=max_nodes
+        )
+        nodes = []
+        for reached_id, hop in reached.items():
+            relative_path = self.node_path(reached_id)
+            node = self.graph.get(relative_path) if relative_path else None
+            entry = {"node_id": reached_id, **hop}
+            if node is None:
+                entry["missing"] = True
+            else:
+                entry["node_type"] = node.get("node_type")
+                for field in ("ticker", "company_name", "topic_name", "date_range", "latest_report_date"):
+                    if node.get(field):
+                        entry[field] = node[field]
+                entry["summary"] = node.get("summary", "")
+            nodes.append(entry)
+        return {"start": node_id, "nodes": nodes, "edges": edges, "truncated": truncated}
+    
+    def convert_store(self, store: str) -> int:
+        """
+        Move every index node to another node store and remove the old one.
+        
+        Args:
+            store: "files" (one JSON file per node) or "sqlite" (_indexes/nodes.db)
+            
+        Returns:
+            Number of nodes converted
+            
+        Raises:
+            ValueError: If the store is unknown
+            
+        Note:
+            Other tools of this knowledge base created before the conversion keep the
+            old store; create them again afterwards.
+        """
+        if store not in (FILES_STORE, SQLITE_STORE):
+            raise ValueError(f"Unknown index store {store!r}, expected '{FILES_STORE}' or '{SQLITE_STORE}'")
+        current = FILES_STORE if isinstance(self.graph, IndexGraph) else SQLITE_STORE
+        if current == store:
+            return 0
+        
+        self.graph.flush()
+        nodes = {path: json.loads(json.dumps(node)) for path, node in self.graph.nodes().items()}
+        if store == SQLITE_STORE:
+            from .sqlite_index_store import SQLiteIndexStore
+            target = SQLiteIndexStore(self.indexes_dir)
+        else:
+            target = IndexGraph(self.indexes_dir)
+        with target.batch():
+            for relative_path, node in nodes.items():
+                target.put(relative_path, node)
+        
+        # Remove the old store only once the new one holds every node
+        release_index_graph(self.indexes_dir)
+        if store == SQLITE_STORE:
+            target.close()
+            for relative_path in nodes:
+                (self.indexes_dir / relative_path).unlink(missing_ok=True)
+        else:
+            for name in (SQLITE_DATABASE, f"{SQLITE_DATABASE}-wal", f"{SQLITE_DATABASE}-shm"):
+                (self.indexes_dir / name).unlink(missing_ok=True)
+        
+        if os.getenv("KB_INDEX_STORE", store).strip().lower() != store:
+            logger.warning(f"KB_INDEX_STORE is set to another store; unset it to open the {store} store")
+        self.graph = get_index_graph(self.indexes_dir, store=store)
+        self.entities.mark_stale()
+        logger.info(f"Converted {len(nodes)} index nodes to the {store} store")
+        return len(nodes)
+    
+    def _semantic_search_index(self, query_text: str, node_type: Optional[str], max_results: int) -> List[Dict[str, Any]]:
+        """Rank nodes by embedding similarity, embedding nodes that changed since the last search."""
+        vector_index = get_vector_index(self.kb_dir)
+        graph_nodes = self.graph.entries()
+        vector_index.sync_nodes(graph_nodes, self._node_text)
+        
+        def accept(record: Dict[str, Any]) -> bool:
+            return record["node_path"] in graph_nodes and \
+                (node_type is None or NODE_TYPE_DIRS.get(node_type) == _node_dir(record["node_path"]))
+        
+        results = []
+        for record, score in vector_index.search(query_text, top_k=max_results, kind=NODE_KIND, accept=accept):
+            node = graph_nodes[record["node_path"]][1]
+            results.append({
+                "node_id": node.get("node_id"),
+                "node_type": node.get("node_type"),
+                "relevance_score": round(score, 6),
+                "summary": node.get("summary", ""),
+                "node": node
+            })
+        return results
+    
+    def _index_search_node(self, relative_path: str, version: int, node: Dict[str, Any]) -> Dict[str, Any]:
+        """(Re)index a node's text in the BM25 corpus if its file changed."""
+        key = str(self.indexes_dir / relative_path)
+        if self._node_versions.get(key) != version:
+            self._node_corpus.add(key, self._node_text(node))
+            self._node_versions[key] = version
+        return node
+    
+    @staticmethod
+    def _node_text(node: Dict[str, Any]) -> str:
+        """Text of a node that search_index matches against."""
+        return node_text(node)
+    
+    def _node_written(self, relative_path: str) -> None:
+        """Let the entity index pick up a changed root or stock node on its next lookup."""
+        if relative_path == "root.json" or relative_path.startswith("stocks/"):
+            self.entities.mark_stale()
     
     def update_index(self, node_id: str, updates: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """
@@ -157,45 +430,31 @@ class IndexTools:
         Returns:
             Updated index node or None if update failed
         """
-        node = self.read_index(node_id=node_id)
-        if not node:
-            logger.warning(f"Cannot update non-existent node: {node_id}")
-            return None
-        
-        # Merge updates
-        node.update(updates)
-        node["last_updated"] = datetime.now().isoformat()
-        
-        # Determine file path
-        if node_id == "root":
-            file_path = self.indexes_dir / "root.json"
-        elif node_id.endswith("_stock_index"):
-            ticker = node_id.replace("_stock_index", "")
-            file_path = self.indexes_dir / "stocks" / f"{ticker}.json"
-        elif node_id.startswith("topic_"):
-            topic_name = node_id.replace("topic_", "")
-            file_path = self.indexes_dir / "topics" / f"{topic_name}.json"
-        elif node_id.startswith("date_"):
-            date_str = node_id.replace("date_", "").replace("-", "_")
-            file_path = self.indexes_dir / "dates" / f"{date_str}.json"
-        else:
+        relative_path = self.node_path(node_id)
+        if relative_path is None:
             logger.error(f"Unknown node_id format: {node_id}")
             return None
         
-        # Atomic write
-        try:
-            with tempfile.NamedTemporaryFile(mode='w', encoding='utf-8', dir=file_path.parent, delete=False) as f:
-                json.dump(node, f, indent=2, ensure_ascii=False)
-                temp_path = Path(f.name)
+        with self.updates():
+            node = self.graph.get(relative_path)
+            if not node:
+                logger.warning(f"Cannot update non-existent node: {node_id}")
+                return None
             
-            shutil.move(str(temp_path), str(file_path))
-            logger.info(f"Updated index node: {node_id}")
-            return node
-        except (IOError, json.JSONEncodeError) as e:
-            logger.error(f"Error updating index node {node_id}: {e}")
-            if temp_path.exists():
-                temp_path.unlink()
-            return None
+            # Merge updates into a new top-level dict; the resident node stays untouched
+            node = dict(node)
+            node.update(updates)
+            node["last_updated"] = datetime.now().isoformat()
+            
+            # Write-through: the file and the resident node are replaced together
+            try:
+                node = self.graph.put(relative_path, node)
+                self._node_written(relative_path)
+                logger.info(f"Updated index node: {node_id}")
+                return node
+            except (IOError, TypeError, ValueError, sqlite3.Error) as e:
+                logger.error(f"Error updating index node {node_id}: {e}")
+                return None
     
     def create_index_node(self, node_type: str, node_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """
@@ -228,32 +487,26 @@ class IndexTools:
         # Determine file path
         node_id = node_data["node_id"]
         if node_type == "root":
-            file_path = self.indexes_dir / "root.json"
+            relative_path = "root.json"
         elif node_type == "stock":
             ticker = node_data.get("ticker", "").upper()
-            file_path = self.indexes_dir / "stocks" / f"{ticker}.json"
+            relative_path = f"stocks/{ticker}.json"
         elif node_type == "topic":
             topic_name = node_data.get("topic_name", "").lower().replace(" ", "_")
-            file_path = self.indexes_dir / "topics" / f"{topic_name}.json"
+            relative_path = f"topics/{topic_name}.json"
         elif node_type == "date":
             date_str = node_data.get("date_range", "").replace("-", "_")
-            file_path = self.indexes_dir / "dates" / f"{date_str}.json"
+            relative_path = f"dates/{date_str}.json"
         else:
             logger.error(f"Unknown node_type: {node_type}")
             return None
         
-        # Atomic write
+        # Write-through: the file and the resident node are created together
         try:
-            with tempfile.NamedTemporaryFile(mode='w', encoding='utf-8', dir=file_path.parent, delete=False) as f:
-                json.dump(node_data, f, indent=2, ensure_ascii=False)
-                temp_path = Path(f.name)
-            
-            shutil.move(str(temp_path), str(file_path))
+            self.graph.put(relative_path, node_data)
+            self._node_written(relative_path)
             logger.info(f"Created index node: {node_id}")
             return node_data
-        except (IOError, json.JSONEncodeError) as e:
+        except (IOError, TypeError, ValueError, sqlite3.Error) as e:
             logger.error(f"Error creating index node {node_id}: {e}")
-            if temp_path.exists():
-                temp_path.unlink()
             return None
-
@@ -0,0 +1,457 @@
+"""Inverted Index - On-disk term postings for keyword/topic report search"""
+
+import bisect
+import json
+import logging
+import os
+import re
+import shutil
+import zlib
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Iterable, Tuple, Set
+
+from .fs_utils import FileLock, atomic_write_json
+
+logger = logging.getLogger(__name__)
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Number of posting shards terms are hashed into
+POSTING_SHARDS = 1024
+# Change log appended to a posting shard; folded into the shard once it outgrows it
+LOG_SUFFIX = ".log"
+COMPACT_MIN_BYTES = 64 * 1024
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase alphanumeric tokens."""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def _collect_text(value: Any, parts: List[str]) -> None:
+    """Recursively collect keys and scalar values from a JSON value."""
+    if isinstance(value, dict):
+        for key, item in value.items():
+            parts.append(str(key))
+            _collect_text(item, parts)
+    elif isinstance(value, list):
+        for item in value:
+            _collect_text(item, parts)
+    elif value is not None:
+        parts.append(str(value))
+
+
+def report_sections(report: Dict[str, Any]) -> Dict[str, str]:
+    """
+    Split a report into searchable section texts.
+
+    Each top-level key of ``report["analysis"]`` becomes its own section. Reports
+    whose analysis could not be parsed fall back to a single ``raw_content`` section.
+
+    Args:
+        report: Report dictionary
+
+    Returns:
+        Mapping of section name to section text
+    """
+    analysis = report.get("analysis", {})
+    sections = {}
+
+    if isinstance(analysis, dict):
+        for section_name, value in analysis.items():
+            parts = [section_name]
+            _collect_text(value, parts)
+            sections[section_name] = " ".join(parts)
+    elif analysis:
+        sections["raw_content"] = str(analysis)
+
+    header = " ".join(str(report.get(k, "")) for k in ("ticker", "analysis_date", "model"))
+    sections["report"] = header
+    return sections
+
+
+def report_tokens(report: Dict[str, Any]) -> List[str]:
+    """Return the sorted unique tokens the index records for a report (see ``report_sections``)."""
+    return sorted({token for text in report_sections(report).values() for token in tokenize(text)})
+
+
+def matches_term(tokens: List[str], term: str) -> bool:
+    """
+    Return True if a search term matches a report.
+
+    A term matches when each of its tokens is a prefix of one of the report's tokens
+    ("tech" matches "technology", "revenue growth" needs both words). The index
+    lookup and the full scan use the same rule.
+
+    Args:
+        tokens: Sorted report tokens (see ``report_tokens``)
+        term: Search term or phrase
+
+    Returns:
+        False for terms without tokens
+    """
+    term_tokens = tokenize(term)
+    for token in term_tokens:
+        position = bisect.bisect_left(tokens, token)
+        if position == len(tokens) or not tokens[position].startswith(token):
+            return False
+    return bool(term_tokens)
+
+
+def doc_key_for(ticker: str, date: str) -> str:
+    """Build the posting key used for a report."""
+    return f"{ticker}/{date}"
+
+
+class InvertedIndex:
+    """
+    Term -> report postings stored under ``_indexes/terms/``.
+
+    Postings are sharded by a hash of the term, so a lookup only loads the shards of
+    its terms. Each posting records the term frequency per report section. Saving
+    reports does not rewrite shards: each touched shard gets one line appended to its
+    change log (the batch's postings, and the reports whose old postings are dropped),
+    and a shard is compacted into its JSON file once its log outgrows it. Report
+    metadata is kept per ticker, and the corpus-wide totals in one small stats file::
+
+        terms/postings/1a3.json  {"apple": {"AAPL/2025-01-10": {"meta": 2, "risks": 1}}}
+        terms/postings/1a3.log   {"remove": ["AAPL/2025-01-10"], "add": {"apple": {...}}}
+        terms/lexicon/a.json     ["aapl", "apple", ...]
+        terms/docs/AAPL.json     {"AAPL/2025-01-10": {"ticker": ..., "date": ...,
+                                                      "file_path": ..., "sections": {...},
+                                                      "shards": [...]}}
+        terms/_stats.json        {"version": 2, "doc_count": 1,
+                                  "section_lengths": {"risks": 212, ...}}
+
+    The lexicon lists the indexed terms by first character, so a prefix lookup
+    ("tech" matches "technology") finds its terms without loading every shard; it is
+    only rewritten when new terms appear (terms whose postings are all dropped stay
+    listed until the next rebuild). ``sections`` holds the token count
+    of each section and ``_stats.json`` the corpus-wide totals; both are kept up to
+    date on every add so BM25 length normalization never needs a pass over the
+    reports. Writers hold a lock file (``terms/.lock``) around each update, so
+    concurrent adds from other threads or processes are not lost. An index in the older layout (``terms/_docs.json``) is not reported as
+    existing, so it is rebuilt on first use.
+    """
+
+    STATS_FILE = "_stats.json"
+    LOCK_FILE = ".lock"
+    LAYOUT_VERSION = 2
+
+    def __init__(self, knowledge_base_dir: Path):
+        """
+        Initialize Inverted Index.
+
+        Args:
+            knowledge_base_dir: Root directory of the knowledge base
+        """
+        self.kb_dir = Path(knowledge_base_dir)
+        self.terms_dir = self.kb_dir / "_indexes" / "terms"
+        self.postings_dir = self.terms_dir / "postings"
+        self.lexicon_dir = self.terms_dir / "lexicon"
+        self.docs_dir = self.terms_dir / "docs"
+
+    def exists(self) -> bool:
+        """Return True if the index has been built (in the current layout)."""
+        return self._read_json(self.terms_dir / self.STATS_FILE).get("version") == self.LAYOUT_VERSION
+
+    @staticmethod
+    def _shard_name(term: str) -> str:
+        return f"{zlib.crc32(term.encode('utf-8')) % POSTING_SHARDS:03x}"
+
+    @staticmethod
+    def _lexicon_name(term: str) -> str:
+        return term[0] if term else "_"
+
+    def _read_json(self, file_path: Path) -> Any:
+        if not file_path.exists():
+            return {}
+        try:
+            with open(file_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (json.JSONDecodeError, IOError) as e:
+            logger.warning(f"Error reading index shard {file_path}: {e}")
+            return {}
+
+    def _load_stats(self) -> Dict[str, Any]:
+        stats = self._read_json(self.terms_dir / self.STATS_FILE)
+        return {"doc_count": stats.get("doc_count", 0), "section_lengths": stats.get("section_lengths", {})}
+
+    def _load_ticker_docs(self, ticker: str) -> Dict[str, Dict[str, Any]]:
+        return self._read_json(self.docs_dir / f"{ticker}.json")
+
+    def _load_lexicon(self, name: str) -> List[str]:
+        return self._read_json(self.lexicon_dir / f"{name}.json") or []
+
+    @staticmethod
+    def _apply_stats(stats: Dict[str, Any], doc: Dict[str, Any], sign: int) -> None:
+        """Add (sign=1) or remove (sign=-1) one document's lengths from the statistics."""
+        stats["doc_count"] = stats.get("doc_count", 0) + sign
+        totals = stats.setdefault("section_lengths", {})
+        for section_name, length in doc.get("sections", {}).items():
+            totals[section_name] = totals.get(section_name, 0) + sign * length
+            if totals[section_name] <= 0:
+                del totals[section_name]
+
+    def _load_shard(self, shard: str) -> Dict[str, Dict[str, Dict[str, int]]]:
+        """Load a shard's compacted postings and replay its change log on top."""
+        postings = self._read_json(self.postings_dir / f"{shard}.json")
+        try:
+            with open(self.postings_dir / f"{shard}{LOG_SUFFIX}", "rb") as f:
+                lines = f.read().splitlines()
+        except FileNotFoundError:
+            return postings
+        for line in lines:
+            try:
+                change = json.loads(line)
+            except ValueError:
+                break  # partial line of an append in progress or interrupted
+            removed = set(change.get("remove", []))
+            if removed:
+                for term in list(postings):
+                    for doc_key in removed.intersection(postings[term]):
+                        del postings[term][doc_key]
+                    if not postings[term]:
+                        del postings[term]
+            for term, term_postings in change.get("add", {}).items():
+                postings.setdefault(term, {}).update(term_postings)
+        return postings
+
+    def get_doc(self, doc_key: str) -> Optional[Dict[str, Any]]:
+        """Return the stored metadata (ticker, date, file_path) of an indexed report."""
+        return self._load_ticker_docs(doc_key.split("/", 1)[0]).get(doc_key)
+
+    def get_docs(self, doc_keys: Optional[Iterable[str]] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Return metadata of indexed reports, keyed by doc key.
+
+        Args:
+            doc_keys: Only these reports (reads just their tickers' files); None returns every report
+
+        Returns:
+            Mapping of doc key to report metadata
+        """
+        if doc_keys is None:
+            tickers = [p.stem for p in self.docs_dir.glob("*.json")] if self.docs_dir.exists() else []
+        else:
+            doc_keys = set(doc_keys)
+            tickers = {doc_key.split("/", 1)[0] for doc_key in doc_keys}
+        docs = {}
+        for ticker in tickers:
+            docs.update(self._load_ticker_docs(ticker))
+        if doc_keys is not None:
+            docs = {doc_key: doc for doc_key, doc in docs.items() if doc_key in doc_keys}
+        return docs
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return corpus statistics: report count and total tokens per section."""
+        return self._load_stats()
+
+    def add_report(self, report: Dict[str, Any], file_path: str) -> None:
+        """
+        Add or replace a single report in the index.
+
+        Args:
+            report: Report dictionary
+            file_path: Report path relative to the knowledge base root
+        """
+        self.add_reports([(report, file_path)])
+
+    def add_reports(self, items: Iterable[Tuple[Dict[str, Any], str]], reset: bool = False) -> int:
+        """
+        Add or replace a batch of reports, rewriting each touched shard once.
+
+        Args:
+            items: Iterable of (report, relative file path) pairs
+            reset: Discard all existing postings first (used by rebuild)
+
+        Returns:
+            Number of reports indexed
+        """
+        with FileLock(self.terms_dir / self.LOCK_FILE):
+            return self._add_reports(items, reset)
+
+    def _add_reports(self, items: Iterable[Tuple[Dict[str, Any], str]], reset: bool) -> int:
+        """Update the touched shards, doc files, lexicon and stats (caller holds the lock file)."""
+        stats = {"doc_count": 0, "section_lengths": {}} if reset else self._load_stats()
+        ticker_docs: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        # Per shard: postings added by this batch, and doc keys whose old postings are dropped
+        additions: Dict[str, Dict[str, Dict[str, Dict[str, int]]]] = {}
+        removals: Dict[str, Set[str]] = {}
+
+        def docs_of(ticker: str) -> Dict[str, Dict[str, Any]]:
+            if ticker not in ticker_docs:
+                ticker_docs[ticker] = {} if reset else self._load_ticker_docs(ticker)
+            return ticker_docs[ticker]
+
+        count = 0
+        for report, file_path in items:
+            ticker = report.get("ticker", "").replace(":", "_").upper()
+            date = report.get("analysis_date", "")
+            if not ticker or not date:
+                continue
+            doc_key = doc_key_for(ticker, date)
+            docs = docs_of(ticker)
+
+            # Drop stale postings if this report was indexed before
+            previous = docs.get(doc_key)
+            if previous:
+                self._apply_stats(stats, previous, -1)
+                for name in previous.get("shards", []):
+                    removals.setdefault(name, set()).add(doc_key)
+                    for postings in additions.get(name, {}).values():
+                        postings.pop(doc_key, None)
+
+            section_lengths = {}
+            touched = set()
+            for section_name, text in report_sections(report).items():
+                tokens = tokenize(text)
+                section_lengths[section_name] = len(tokens)
+                counts: Dict[str, int] = {}
+                for token in tokens:
+                    counts[token] = counts.get(token, 0) + 1
+                for token, tf in counts.items():
+                    name = self._shard_name(token)
+                    additions.setdefault(name, {}).setdefault(token, {}).setdefault(doc_key, {})[section_name] = tf
+                    touched.add(name)
+
+            docs[doc_key] = {
+                "ticker": ticker,
+                "date": date,
+                "file_path": file_path,
+                "sections": section_lengths,
+                "shards": sorted(touched),
+            }
+            self._apply_stats(stats, docs[doc_key], 1)
+            count += 1
+
+        if reset:
+            if self.terms_dir.exists():
+                for stale in self.terms_dir.iterdir():
+                    if stale.is_dir():
+                        shutil.rmtree(stale)
+                    elif stale.name != self.LOCK_FILE:
+                        stale.unlink()
+            for name, postings in additions.items():
+                atomic_write_json(self.postings_dir / f"{name}.json", postings, indent=None)
+        else:
+            for name in set(additions) | set(removals):
+                self._append_delta(name, removals.get(name, set()), additions.get(name, {}))
+
+        for ticker, docs in ticker_docs.items():
+            atomic_write_json(self.docs_dir / f"{ticker}.json", docs, indent=None)
+        self._update_lexicon({term for postings in additions.values() for term in postings}, reset)
+        # Written last: its version marks the index as built
+        atomic_write_json(self.terms_dir / self.STATS_FILE, dict(stats, version=self.LAYOUT_VERSION), indent=None)
+
+        logger.debug(f"Indexed {count} report(s) into {len(set(additions) | set(removals))} posting shard(s)")
+        return count
+
+    def _append_delta(
+        self,
+        name: str,
+        removed: Set[str],
+        added: Dict[str, Dict[str, Dict[str, int]]]
+    ) -> None:
+        """Append one change line to a shard's log, compacting the shard once the log outgrows it."""
+        log_path = self.postings_dir / f"{name}{LOG_SUFFIX}"
+        line = json.dumps({"remove": sorted(removed), "add": added}, ensure_ascii=False, separators=(",", ":"))
+        self.postings_dir.mkdir(parents=True, exist_ok=True)
+        with open(log_path, "ab+") as f:
+            # A writer that died mid-append leaves a partial last line; cut it off first
+            f.seek(0)
+            content = f.read()
+            if content and not content.endswith(b"\n"):
+                f.truncate(content.rfind(b"\n") + 1)
+            f.write(line.encode("utf-8") + b"\n")
+            log_size = f.tell()
+
+        base_path = self.postings_dir / f"{name}.json"
+        base_size = base_path.stat().st_size if base_path.exists() else 0
+        if log_size > max(COMPACT_MIN_BYTES, base_size):
+            atomic_write_json(base_path, self._load_shard(name), indent=None)
+            log_path.unlink()
+
+    def _update_lexicon(self, terms: Set[str], reset: bool) -> None:
+        """Add terms to the lexicon files of their first characters."""
+        by_name: Dict[str, Set[str]] = {}
+        for term in terms:
+            by_name.setdefault(self._lexicon_name(term), set()).add(term)
+        for name, name_terms in by_name.items():
+            lexicon = set() if reset else set(self._load_lexicon(name))
+            if not name_terms <= lexicon:
+                atomic_write_json(self.lexicon_dir / f"{name}.json", sorted(lexicon | name_terms), indent=None)
+
+    def lookup(self, phrase: str) -> Dict[str, Dict[str, int]]:
+        """
+        Find reports containing every token of a phrase.
+
+        Tokens are matched as prefixes of indexed terms, so "tech" matches
+        "technology".
+
+        Args:
+            phrase: Search term or phrase
+
+        Returns:
+            Mapping of doc key to per-section hit counts
+        """
+        tokens = tokenize(phrase)
+        if not tokens:
+            return {}
+
+        loaded: Dict[str, Any] = {}
+        result: Optional[Dict[str, Dict[str, int]]] = None
+
+        for token in tokens:
+            matches: Dict[str, Dict[str, int]] = {}
+            for postings in self._expand(token, loaded).values():
+                for doc_key, sections in postings.items():
+                    doc_hits = matches.setdefault(doc_key, {})
+                    for section_name, tf in sections.items():
+                        doc_hits[section_name] = doc_hits.get(section_name, 0) + tf
+
+            if result is None:
+                result = matches
+            else:
+                result = {k: v for k, v in result.items() if k in matches}
+            if not result:
+                return {}
+
+        return result or {}
+
+    def _expand(self, token: str, loaded: Dict[str, Any]) -> Dict[str, Dict[str, Dict[str, int]]]:
+        """Return the postings of every indexed term starting with a token."""
+        lexicon_key = f"lexicon/{self._lexicon_name(token)}"
+        if lexicon_key not in loaded:
+            loaded[lexicon_key] = self._load_lexicon(self._lexicon_name(token))
+        lexicon = loaded[lexicon_key]
+
+        result = {}
+        for position in range(bisect.bisect_left(lexicon, token), len(lexicon)):
+            term = lexicon[position]
+            if not term.startswith(token):
+                break
+            name = self._shard_name(term)
+            if name not in loaded:
+                loaded[name] = self._load_shard(name)
+            if term in loaded[name]:
+                result[term] = loaded[name][term]
+        return result
+
+    def term_postings(self, tokens: Iterable[str]) -> Dict[str, Dict[str, Dict[str, int]]]:
+        """
+        Return per-section postings for every indexed term matching one of the tokens.
+
+        Tokens are matched as prefixes, as in ``lookup``.
+
+        Args:
+            tokens: Query tokens (see ``tokenize``)
+
+        Returns:
+            Mapping of indexed term to {doc key: {section: tf}}
+        """
+        loaded: Dict[str, Any] = {}
+        result: Dict[str, Dict[str, Dict[str, int]]] = {}
+        for token in tokens:
+            result.update(self._expand(token, loaded))
+        return result
@@ -0,0 +1,338 @@
+"""KB Archive - Streaming export and import of a knowledge base as JSONL or tar"""
+
+import copy
+import gzip
+import io
+import json
+import logging
+import sys
+import tarfile
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Iterator, Tuple
+
+from .index_graph import get_index_graph
+from .report_tools import ReportTools
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_VERSION = 1
+JSONL_FORMAT = "jsonl"
+TAR_FORMAT = "tar"
+ARCHIVE_FORMATS = (JSONL_FORMAT, TAR_FORMAT)
+
+DEFAULT_BATCH_SIZE = 200
+PROGRESS_INTERVAL = 1000
+
+# Graph index nodes carried in archives. Search, date and metrics indexes are derived
+# from the reports and rebuilt after an import instead.
+ROOT_NODE = "root.json"
+GRAPH_NODE_DIRS = ("stocks", "topics")
+
+# (kind, relative path, payload): kind is "report" or "index"; payload is a report or node dict
+ArchiveRecord = Tuple[str, str, Dict[str, Any]]
+
+
+def detect_format(path: str) -> str:
+    """Return the archive format implied by a file name (tar for .tar/.tar.gz/.tgz, else jsonl)."""
+    name = str(path).lower()
+    if name.endswith((".tar", ".tar.gz", ".tgz")):
+        return TAR_FORMAT
+    return JSONL_FORMAT
+
+
+@contextmanager
+def _open_stream(path: str, mode: str):
+    """Open a binary stream, with "-" meaning stdin/stdout and .gz meaning gzip (JSONL only)."""
+    if str(path) == "-":
+        yield sys.stdout.buffer if mode == "wb" else sys.stdin.buffer
+        return
+    if str(path).endswith(".gz"):
+        with gzip.open(path, mode) as f:
+            yield f
+        return
+    with open(path, mode) as f:
+        yield f
+
+
+class KBArchive:
+    """
+    Streams a knowledge base to and from a single archive.
+
+    Reports are written decoded, so an archive can be imported whatever codec,
+    storage mode or backend either side uses. Records are processed one at a time
+    and imports are saved in batches, so memory use does not grow with the size of
+    the knowledge base.
+
+    JSONL archives hold one record per line after a header line::
+
+        {"type": "header", "format": "kb-archive", "version": 1, "exported_at": "..."}
+        {"type": "report", "path": "AAPL/2026/AAPL_2026-01-15.json", "report": {...}}
+        {"type": "index", "path": "stocks/AAPL.json", "node": {...}}
+
+    Tar archives hold the same records as ``reports/<path>`` and ``indexes/<path>``
+    JSON members.
+    """
+
+    def __init__(self, report_tools: ReportTools):
+        """
+        Initialize KB Archive.
+
+        Args:
+            report_tools: Report tools of the knowledge base to export from or import into
+        """
+        self.report_tools = report_tools
+        self.kb_dir = report_tools.kb_dir
+        self.indexes_dir = self.kb_dir / "_indexes"
+        self.graph = get_index_graph(self.indexes_dir)
+
+    def iter_records(self, tickers: Optional[List[str]] = None, include_indexes: bool = True) -> Iterator[ArchiveRecord]:
+        """
+        Stream the records of an export: every report, then the graph index nodes.
+
+        Args:
+            tickers: Only export these tickers (and only their stock nodes)
+            include_indexes: Include root, stock and topic index nodes
+
+        Yields:
+            (kind, relative path, payload) tuples
+        """
+        for ticker, date_str, _, report in self.report_tools.iter_reports(tickers):
+            yield "report", f"{ticker}/{date_str[:4]}/{ticker}_{date_str}.json", report
+
+        if not include_indexes:
+            return
+        # Pick up nodes written by other processes since the last poll
+        self.graph.refresh()
+        nodes = self.graph.nodes()
+        for relative_path in self._graph_node_paths(nodes, tickers):
+            yield "index", relative_path, nodes[relative_path]
+
+    @staticmethod
+    def _graph_node_paths(nodes: Dict[str, Any], tickers: Optional[List[str]]) -> List[str]:
+        if tickers:
+            names = [f"stocks/{t.replace(':', '_').upper()}.json" for t in tickers]
+            return [n for n in names if n in nodes]
+        paths = [ROOT_NODE] if ROOT_NODE in nodes else []
+        for directory in GRAPH_NODE_DIRS:
+            paths.extend(sorted(p for p in nodes if p.startswith(f"{directory}/")))
+        return paths
+
+    def export(
+        self,
+        output: str,
+        archive_format: Optional[str] = None,
+        tickers: Optional[List[str]] = None,
+        include_indexes: bool = True
+    ) -> Dict[str, int]:
+        """
+        Write the knowledge base to an archive.
+
+        Args:
+            output: Archive path ("-" for stdout); a .gz suffix compresses it
+            archive_format: "jsonl" or "tar" (defaults to the output file name)
+            tickers: Only export these tickers
+            include_indexes: Include the graph index nodes
+
+        Returns:
+            Counts of exported reports and index nodes
+        """
+        archive_format = archive_format or detect_format(output)
+        if archive_format not in ARCHIVE_FORMATS:
+            raise ValueError(f"Unknown archive format {archive_format!r}; expected one of {ARCHIVE_FORMATS}")
+
+        stats = {"reports": 0, "index_nodes": 0}
+        records = self.iter_records(tickers, include_indexes)
+
+        if archive_format == JSONL_FORMAT:
+            with _open_stream(output, "wb") as f:
+                header = {"type": "header", "format": "kb-archive", "version": ARCHIVE_VERSION,
+                          "exported_at": datetime.now().isoformat()}
+                f.write(json.dumps(header).encode("utf-8") + b"\n")
+                for kind, relative_path, payload in records:
+                    line = {"type": kind, "path": relative_path, "node" if kind == "index" else "report": payload}
+                    f.write(json.dumps(line, ensure_ascii=False, default=str).encode("utf-8") + b"\n")
+                    self._count(stats, kind, "Exported")
+        else:
+            compressed = str(output).endswith((".gz", ".tgz"))
+            if str(output) == "-":
+                tar = tarfile.open(fileobj=sys.stdout.buffer, mode="w|gz" if compressed else "w|")
+            else:
+                tar = tarfile.open(output, mode="w|gz" if compressed else "w|")
+            with tar:
+                for kind, relative_path, payload in records:
+                    data = json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8")
+                    member = tarfile.TarInfo(f"{'indexes' if kind == 'index' else 'reports'}/{relative_path}")
+                    member.size = len(data)
+                    member.mtime = int(datetime.now().timestamp())
+                    tar.addfile(member, io.BytesIO(data))
+                    self._count(stats, kind, "Exported")
+
+        logger.info(f"Exported {stats['reports']} reports and {stats['index_nodes']} index nodes to {output}")
+        return stats
+
+    @staticmethod
+    def _count(stats: Dict[str, int], kind: str, verb: str) -> None:
+        key = "index_nodes" if kind == "index" else "reports"
+        stats[key] += 1
+        if key == "reports" and stats[key] % PROGRESS_INTERVAL == 0:
+            logger.info(f"{verb} {stats[key]} reports...")
+
+    def read_records(self, source: str, archive_format: Optional[str] = None) -> Iterator[ArchiveRecord]:
+        """
+        Stream the records of an archive.
+
+        Args:
+            source: Archive path ("-" for stdin)
+            archive_format: "jsonl" or "tar" (defaults to the file name)
+
+        Yields:
+            (kind, relative path, payload) tuples
+        """
+        archive_format = archive_format or detect_format(source)
+        if archive_format == JSONL_FORMAT:
+            with _open_stream(source, "rb") as f:
+                for line_number, line in enumerate(f, 1):
+                    if not line.strip():
+                        continue
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError as e:
+                        logger.warning(f"Skipping invalid archive line {line_number}: {e}")
+                        continue
+                    kind = record.get("type")
+                    if kind == "report":
+                        yield "report", record.get("path", ""), record.get("report")
+                    elif kind == "index":
+                        yield "index", record.get("path", ""), record.get("node")
+                    elif kind != "header":
+                        logger.warning(f"Skipping unknown archive record type {kind!r} on line {line_number}")
+            return
+
+        if archive_format != TAR_FORMAT:
+            raise ValueError(f"Unknown archive format {archive_format!r}; expected one of {ARCHIVE_FORMATS}")
+        fileobj = sys.stdin.buffer if str(source) == "-" else None
+        with tarfile.open(None if fileobj else source, mode="r|*", fileobj=fileobj) as tar:
+            for member in tar:
+                if not member.isfile():
+                    continue
+                kind, _, relative_path = member.name.partition("/")
+                if kind not in ("reports", "indexes"):
+                    logger.warning(f"Skipping unexpected archive member {member.name}")
+                    continue
+                try:
+                    payload = json.load(tar.extractfile(member))
+                except json.JSONDecodeError as e:
+                    logger.warning(f"Skipping invalid archive member {member.name}: {e}")
+                    continue
+                yield ("index" if kind == "indexes" else "report"), relative_path, payload
+
+    def import_archive(
+        self,
+        source: str,
+        archive_format: Optional[str] = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        include_indexes: bool = True
+    ) -> Dict[str, int]:
+        """
+        Load an archive into the knowledge base.
+
+        Reports are saved with ``save_reports`` in batches without touching the
+        search, date or metrics indexes, which are rebuilt once after the last batch.
+        Imported reports replace stored reports of the same ticker and date. Stock and
+        topic nodes from the archive replace local ones, and root stock listings are
+        merged.
+
+        Args:
+            source: Archive path ("-" for stdin)
+            archive_format: "jsonl" or "tar" (defaults to the file name)
+            batch_size: Reports saved per journaled batch
+            include_indexes: Import graph index nodes from the archive
+
+        Returns:
+            Counts of imported reports and index nodes, and skipped records
+        """
+        stats = {"reports": 0, "index_nodes": 0, "skipped": 0}
+        batch: List[Dict[str, Any]] = []
+        stock_nodes = []
+        self.graph.refresh()
+
+        # Index nodes (imported, then relinked) are written once, when the batch exits
+        with self.graph.update_lock, self.graph.batch():
+            for kind, relative_path, payload in self.read_records(source, archive_format):
+                if kind == "report":
+                    if not isinstance(payload, dict) or not payload.get("ticker") or not payload.get("analysis_date"):
+                        logger.warning(f"Skipping archived report without ticker/analysis_date: {relative_path}")
+                        stats["skipped"] += 1
+                        continue
+                    batch.append(payload)
+                    if len(batch) >= batch_size:
+                        self.report_tools.save_reports(batch, update_indexes=False)
+                        batch = []
+                    self._count(stats, kind, "Imported")
+                elif include_indexes:
+                    if not self._import_node(relative_path, payload):
+                        stats["skipped"] += 1
+                        continue
+                    if relative_path.startswith("stocks/"):
+                        stock_nodes.append(relative_path)
+                    stats["index_nodes"] += 1
+
+            if batch:
+                self.report_tools.save_reports(batch, update_indexes=False)
+
+            # Stock nodes may list file paths in the exporting KB's codec
+            for relative_path in stock_nodes:
+                self._relink_stock_node(relative_path)
+
+        if stats["reports"]:
+            logger.info("Rebuilding search, date, topic, metrics and vector indexes...")
+            self.report_tools.rebuild_search_index()
+            self.report_tools.rebuild_date_index()
+            self.report_tools.rebuild_topic_index()
+            if self.report_tools.metrics_store:
+                self.report_tools.rebuild_metrics()
+            if self.report_tools.has_vector_index():
+                self.report_tools.rebuild_vector_index()
+
+        logger.info(
+            f"Imported {stats['reports']} reports and {stats['index_nodes']} index nodes "
+            f"({stats['skipped']} skipped) from {source}"
+        )
+        return stats
+
+    def _import_node(self, relative_path: str, node: Any) -> bool:
+        """Write one graph index node, merging the root node's stock listing."""
+        directory = relative_path.split("/", 1)[0] if "/" in relative_path else ""
+        if not isinstance(node, dict) or ".." in relative_path.split("/") or \
+                (relative_path != ROOT_NODE and directory not in GRAPH_NODE_DIRS):
+            logger.warning(f"Skipping archived index node {relative_path!r}")
+            return False
+
+        existing = self.graph.get(relative_path) if relative_path == ROOT_NODE else None
+        if existing:
+            stocks = {s.get("ticker"): s for s in existing.get("stocks", [])}
+            stocks.update({s.get("ticker"): s for s in node.get("stocks", [])})
+            topics = existing.get("topics", [])
+            topics = topics + [t for t in node.get("topics", []) if t not in topics]
+            node = dict(existing, stocks=list(stocks.values()), stock_count=len(stocks),
+                        topics=topics, last_updated=datetime.now().isoformat())
+        self.graph.put(relative_path, node)
+        return True
+
+    def _relink_stock_node(self, relative_path: str) -> None:
+        """Point a stock node's report entries at the files stored in this knowledge base."""
+        node = self.graph.get(relative_path)
+        if node is None:
+            return
+        node = copy.deepcopy(node)
+        ticker = node.get("ticker") or Path(relative_path).stem
+        changed = False
+        for entry in node.get("reports", []):
+            manifest_entry = self.report_tools.manifest_store.entry(ticker, entry.get("date", ""))
+            if manifest_entry and entry.get("file_path") != manifest_entry["path"]:
+                entry["file_path"] = manifest_entry["path"]
+                changed = True
+        if changed:
+            self.graph.put(relative_path, node)
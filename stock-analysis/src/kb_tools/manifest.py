@@ -0,0 +1,253 @@
+"""Ticker Manifest - Per-ticker listing of stored reports"""
+
+import hashlib
+import json
+import logging
+from pathlib import Path
+from typing import Optional, Dict, Any, Iterator, List, Tuple
+
+from .fs_utils import atomic_write_json
+from .report_cache import get_report_cache
+from .report_codec import DELTA_SUFFIX, iter_report_files, report_date_from_filename, section_offsets_for
+from .segment_log import SegmentLog
+
+logger = logging.getLogger(__name__)
+
+
+class ManifestStore:
+    """
+    Reads and maintains ``{ticker}/manifest.json`` files.
+
+    A manifest lists every report stored for a ticker so that "latest report" and
+    date listings never have to walk the year directories::
+
+        {
+          "ticker": "AAPL",
+          "latest_date": "2026-01-15",
+          "reports": {
+            "2026-01-15": {"path": "AAPL/2026/AAPL_2026-01-15.json",
+                           "size": 10423, "sha256": "...",
+                           "sections": {"valuation": [8120, 1840], ...}}
+          }
+        }
+
+    ``sections`` holds the byte offset and length of each analysis section in the
+    report file, used for section-projected reads.
+    """
+
+    FILE_NAME = "manifest.json"
+    VERSION = 1
+
+    def __init__(self, knowledge_base_dir: Path, segments: Optional[SegmentLog] = None):
+        """
+        Initialize Manifest Store.
+
+        Args:
+            knowledge_base_dir: Root directory of the knowledge base
+            segments: Segment log holding the reports, if the KB uses the segments backend
+        """
+        self.kb_dir = Path(knowledge_base_dir)
+        self.segments = segments
+        self.report_cache = get_report_cache()
+
+    def manifest_path(self, ticker: str) -> Path:
+        """Return the manifest path for a normalized ticker."""
+        return self.kb_dir / ticker / self.FILE_NAME
+
+    def load(self, ticker: str) -> Optional[Dict[str, Any]]:
+        """
+        Load a ticker manifest.
+
+        Args:
+            ticker: Normalized ticker symbol
+
+        Returns:
+            Manifest dictionary or None if missing/unreadable. It is shared with the
+            report cache and must not be modified.
+        """
+        file_path = self.manifest_path(ticker)
+        if not file_path.exists():
+            return None
+        try:
+            return self.report_cache.load(file_path)
+        except (json.JSONDecodeError, IOError) as e:
+            logger.warning(f"Error reading manifest {file_path}: {e}")
+            return None
+
+    def _save(self, ticker: str, manifest: Dict[str, Any]) -> None:
+        dates = manifest.get("reports", {})
+        manifest["latest_date"] = max(dates) if dates else None
+        atomic_write_json(self.manifest_path(ticker), manifest)
+
+    def record(self, ticker: str, date: str, relative_path: str, data: bytes, **extra: Any) -> Dict[str, Any]:
+        """
+        Add or replace the entry for one report and rewrite the manifest atomically.
+
+        Args:
+            ticker: Normalized ticker symbol
+            date: Analysis date (YYYY-MM-DD)
+            relative_path: Report path relative to the knowledge base root
+            data: Exact bytes written to the report file
+            **extra: Additional fields stored on the entry
+
+        Returns:
+            The stored entry
+        """
+        return self.record_many(ticker, [(date, relative_path, data, extra)])[date]
+
+    def record_many(
+        self,
+        ticker: str,
+        reports: List[Tuple[str, str, bytes, Dict[str, Any]]]
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Add or replace several entries of one ticker with a single manifest rewrite.
+
+        Args:
+            ticker: Normalized ticker symbol
+            reports: (date, relative path, file bytes, extra entry fields) per report
+
+        Returns:
+            Stored entries keyed by date
+        """
+        cached = self.load(ticker) or {"ticker": ticker, "version": self.VERSION}
+        # Entries are replaced, never changed in place, so copying the two outer dicts suffices
+        manifest = dict(cached, reports=dict(cached.get("reports", {})))
+        stored = {}
+        for date, relative_path, data, extra in reports:
+            entry = {
+                "path": relative_path,
+                "size": len(data),
+                "sha256": hashlib.sha256(data).hexdigest(),
+            }
+            entry.update(extra)
+            manifest["reports"][date] = entry
+            stored[date] = entry
+        self._save(ticker, manifest)
+        return stored
+
+    def entry(self, ticker: str, date: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Return the entry for one report (the most recent one if no date is given).
+
+        Args:
+            ticker: Normalized ticker symbol
+            date: Analysis date (YYYY-MM-DD), optional
+
+        Returns:
+            Entry dictionary with its date under "date", or None if not listed
+        """
+        if date is None:
+            return self.latest(ticker)
+        manifest = self.load(ticker)
+        if not manifest or date not in manifest.get("reports", {}):
+            return None
+        entry = dict(manifest["reports"][date])
+        entry["date"] = date
+        return entry
+
+    def latest(self, ticker: str) -> Optional[Dict[str, Any]]:
+        """
+        Return the entry of the most recent report, with its date under "date".
+
+        Args:
+            ticker: Normalized ticker symbol
+
+        Returns:
+            Entry dictionary or None if the manifest is missing or empty
+        """
+        manifest = self.load(ticker)
+        if not manifest or not manifest.get("latest_date"):
+            return None
+        date = manifest["latest_date"]
+        entry = dict(manifest["reports"].get(date, {}))
+        entry["date"] = date
+        return entry
+
+    def list_dates(self, ticker: str) -> Optional[List[str]]:
+        """Return report dates for a ticker, newest first, or None without a manifest."""
+        manifest = self.load(ticker)
+        if manifest is None:
+            return None
+        return sorted(manifest.get("reports", {}), reverse=True)
+
+    def rebuild(self, ticker: str) -> Dict[str, Any]:
+        """
+        Rebuild a ticker manifest from the report files on disk.
+
+        Args:
+            ticker: Normalized ticker symbol
+
+        Returns:
+            The rebuilt manifest
+        """
+        reports = {}
+        for date, relative_path in self._stored_reports(ticker):
+            data = self.segments.read(relative_path) if self.segments else (self.kb_dir / relative_path).read_bytes()
+            entry = {
+                "path": relative_path,
+                "size": len(data),
+                "sha256": hashlib.sha256(data).hexdigest(),
+            }
+            if relative_path.endswith(DELTA_SUFFIX):
+                entry["base"] = json.loads(data)["base_date"]
+            else:
+                offsets = section_offsets_for(data)
+                if offsets:
+                    entry["sections"] = offsets
+            reports[date] = entry
+
+        manifest = {"ticker": ticker, "version": self.VERSION, "reports": reports}
+        self._save(ticker, manifest)
+        logger.info(f"Rebuilt manifest for {ticker} ({len(reports)} reports)")
+        return manifest
+
+    def _stored_reports(self, ticker: str) -> Iterator[Tuple[str, str]]:
+        """Yield (date, relative path) for every report stored for a ticker."""
+        if self.segments:
+            for key in self.segments.keys(prefix=f"{ticker}/"):
+                date = report_date_from_filename(key.rsplit("/", 1)[-1])
+                if date:
+                    yield date, key
+            return
+
+        ticker_dir = self.kb_dir / ticker
+        for year_dir in sorted(ticker_dir.iterdir()) if ticker_dir.exists() else []:
+            if not year_dir.is_dir():
+                continue
+            for date, report_file in iter_report_files(year_dir):
+                yield date, report_file.relative_to(self.kb_dir).as_posix()
+
+    def _stored_size(self, relative_path: str) -> Optional[int]:
+        if self.segments:
+            return self.segments.size(relative_path)
+        file_path = self.kb_dir / relative_path
+        return file_path.stat().st_size if file_path.exists() else None
+
+    def check(self, ticker: str) -> List[str]:
+        """
+        Compare a manifest against the files on disk.
+
+        Args:
+            ticker: Normalized ticker symbol
+
+        Returns:
+            List of human-readable problems (empty if consistent)
+        """
+        manifest = self.load(ticker)
+        if manifest is None:
+            return [f"{ticker}: manifest missing"]
+
+        problems = []
+        for date, entry in manifest.get("reports", {}).items():
+            size = self._stored_size(entry["path"])
+            if size is None:
+                problems.append(f"{ticker} {date}: file missing ({entry['path']})")
+            elif size != entry.get("size"):
+                problems.append(f"{ticker} {date}: size mismatch ({entry['path']})")
+
+        for date, relative_path in self._stored_reports(ticker):
+            if date not in manifest.get("reports", {}):
+                problems.append(f"{ticker} {date}: not in manifest ({relative_path.rsplit('/', 1)[-1]})")
+
+        return problems
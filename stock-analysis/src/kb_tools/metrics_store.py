@@ -0,0 +1,531 @@
+"""Metrics Store - Append-only columnar store of numeric report fields"""
+
+import json
+import logging
+import os
+import shutil
+import threading
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Iterable, Tuple
+
+from .fs_utils import FileLock, atomic_write_json
+
+logger = logging.getLogger(__name__)
+
+# Optional dependency for the columnar metrics store
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+# Analysis sections whose numeric fields are extracted
+METRIC_SECTIONS = ("price_snapshot", "fundamentals", "valuation")
+
+AGGREGATES = ("mean", "median", "min", "max", "std", "sum", "count", "first", "last", "change", "pct_change")
+
+TICKER_COLUMN = "_ticker.i4"
+DATE_COLUMN = "_date.i4"
+METRIC_SUFFIX = ".f8"
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def extract_metrics(report: Dict[str, Any]) -> Dict[str, float]:
+    """
+    Extract numeric fields from a report as dotted metric names.
+
+    Every numeric leaf reachable through nested objects of the price_snapshot,
+    fundamentals and valuation sections is returned, e.g.
+    ``price_snapshot.returns.return_1m_pct`` or ``valuation.multiples.pe_forward``.
+    Values inside lists are ignored.
+
+    Args:
+        report: Report dictionary
+
+    Returns:
+        Mapping of metric name to value
+    """
+    analysis = report.get("analysis", {})
+    metrics: Dict[str, float] = {}
+    if not isinstance(analysis, dict):
+        return metrics
+
+    def walk(value: Any, prefix: str) -> None:
+        if isinstance(value, dict):
+            for key, item in value.items():
+                walk(item, f"{prefix}.{key}")
+        elif _is_number(value):
+            metrics[prefix] = float(value)
+
+    for section in METRIC_SECTIONS:
+        walk(analysis.get(section), section)
+    return metrics
+
+
+def _require_numpy() -> None:
+    if not NUMPY_AVAILABLE:
+        raise ImportError("The metrics store requires 'numpy'. Please install: pip install numpy")
+
+
+class MetricsStore:
+    """
+    Columnar time series of numeric report fields under ``_indexes/metrics/``.
+
+    Each report is one row. Rows are appended to raw little-endian column files,
+    one per metric plus the ticker and date keys::
+
+        metrics/meta.json          {"rows": 1200, "tickers": [...], "metrics": [...]}
+        metrics/_ticker.i4         int32 ticker id per row
+        metrics/_date.i4           int32 days since 1970-01-01 per row
+        metrics/price_snapshot.current_price.f8
+                                   float64 per row (NaN where a report lacks the field)
+
+    ``meta.json`` is rewritten after the columns, so bytes past its row count (from an
+    interrupted append) are ignored and truncated on the next write. Saving a report
+    again appends a new row; queries keep the last row for each (ticker, date) and
+    ``compact`` drops the superseded ones. Writes hold ``_indexes/metrics.lock`` (next
+    to the directory, which ``compact`` swaps out) so several processes can append.
+    """
+
+    META_FILE = "meta.json"
+    VERSION = 1
+
+    def __init__(self, knowledge_base_dir: Path):
+        """
+        Initialize Metrics Store.
+
+        Args:
+            knowledge_base_dir: Root directory of the knowledge base
+
+        Raises:
+            ImportError: If numpy is not installed
+        """
+        _require_numpy()
+        self.kb_dir = Path(knowledge_base_dir)
+        self.metrics_dir = self.kb_dir / "_indexes" / "metrics"
+        self._lock = threading.Lock()
+        self._file_lock = FileLock(self.kb_dir / "_indexes" / "metrics.lock")
+        self._table: Optional[Tuple[int, Dict[str, Any]]] = None
+
+    def exists(self) -> bool:
+        """Return True if the store has been built."""
+        return (self.metrics_dir / self.META_FILE).exists()
+
+    def _load_meta(self) -> Dict[str, Any]:
+        meta_path = self.metrics_dir / self.META_FILE
+        if not meta_path.exists():
+            return {"version": self.VERSION, "rows": 0, "tickers": [], "metrics": []}
+        with open(meta_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _column_path(self, name: str) -> Path:
+        return self.metrics_dir / name
+
+    @staticmethod
+    def _metric_file(metric: str) -> str:
+        return f"{metric}{METRIC_SUFFIX}"
+
+    def _truncate(self, file_name: str, rows: int, itemsize: int) -> None:
+        """Cut a column back to the committed row count, creating it if missing."""
+        path = self._column_path(file_name)
+        with open(path, "ab") as f:
+            f.truncate(rows * itemsize)
+
+    def append(self, report: Dict[str, Any]) -> int:
+        """
+        Append the metrics of one report.
+
+        Args:
+            report: Report dictionary
+
+        Returns:
+            Number of rows appended (0 or 1)
+        """
+        return self.append_many([report])
+
+    def append_many(self, reports: Iterable[Dict[str, Any]]) -> int:
+        """
+        Append the metrics of a batch of reports, writing each column once.
+
+        Args:
+            reports: Report dictionaries
+
+        Returns:
+            Number of rows appended
+        """
+        rows_to_add: List[Tuple[str, str, Dict[str, float]]] = []
+        for report in reports:
+            ticker = report.get("ticker", "").replace(":", "_").upper()
+            date = report.get("analysis_date", "")
+            if ticker and date:
+                rows_to_add.append((ticker, date, extract_metrics(report)))
+        if not rows_to_add:
+            return 0
+
+        with self._lock, self._file_lock:
+            self.metrics_dir.mkdir(parents=True, exist_ok=True)
+            meta = self._load_meta()
+            rows = meta["rows"]
+            ticker_ids = {t: i for i, t in enumerate(meta["tickers"])}
+            metric_names = list(meta["metrics"])
+            for _, _, values in rows_to_add:
+                for metric in values:
+                    if metric not in metric_names:
+                        metric_names.append(metric)
+
+            # Discard bytes from an interrupted append and back-fill new metrics
+            self._truncate(TICKER_COLUMN, rows, 4)
+            self._truncate(DATE_COLUMN, rows, 4)
+            for metric in metric_names:
+                self._truncate(self._metric_file(metric), rows if metric in meta["metrics"] else 0, 8)
+                if metric not in meta["metrics"] and rows:
+                    with open(self._column_path(self._metric_file(metric)), "ab") as f:
+                        np.full(rows, np.nan, dtype="<f8").tofile(f)
+
+            for ticker, _, _ in rows_to_add:
+                if ticker not in ticker_ids:
+                    ticker_ids[ticker] = len(ticker_ids)
+
+            new_tickers = np.array([ticker_ids[t] for t, _, _ in rows_to_add], dtype="<i4")
+            new_dates = np.array([d for _, d, _ in rows_to_add], dtype="datetime64[D]").astype("<i4")
+            self._append_column(TICKER_COLUMN, new_tickers)
+            self._append_column(DATE_COLUMN, new_dates)
+            for metric in metric_names:
+                column = np.array([values.get(metric, np.nan) for _, _, values in rows_to_add], dtype="<f8")
+                self._append_column(self._metric_file(metric), column)
+
+            meta.update({
+                "version": self.VERSION,
+                "rows": rows + len(rows_to_add),
+                "tickers": sorted(ticker_ids, key=ticker_ids.get),
+                "metrics": metric_names,
+            })
+            atomic_write_json(self.metrics_dir / self.META_FILE, meta)
+            self._table = None
+
+        logger.debug(f"Appended {len(rows_to_add)} row(s) to metrics store")
+        return len(rows_to_add)
+
+    def _append_column(self, file_name: str, values: "np.ndarray") -> None:
+        with open(self._column_path(file_name), "ab") as f:
+            values.tofile(f)
+
+    def rebuild(self, reports: Iterable[Dict[str, Any]]) -> int:
+        """
+        Discard the store and rebuild it from reports.
+
+        Args:
+            reports: Report dictionaries
+
+        Returns:
+            Number of rows written
+        """
+        with self._lock, self._file_lock:
+            if self.metrics_dir.exists():
+                shutil.rmtree(self.metrics_dir)
+            self._table = None
+        count = self.append_many(reports)
+        logger.info(f"Rebuilt metrics store ({count} reports)")
+        return count
+
+    def compact(self) -> int:
+        """
+        Rewrite the store keeping one row per (ticker, date), sorted by ticker and date.
+
+        Returns:
+            Number of rows dropped
+        """
+        with self._lock, self._file_lock:
+            # Read under the lock too, so rows appended meanwhile are not dropped
+            table = self._load_table()
+            before = table["rows"]
+            live = table["live"]
+            order = np.lexsort((table["date"][live], table["ticker"][live]))
+            index = live[order]
+            self._write_compacted(table, index)
+            self._table = None
+
+        dropped = before - len(index)
+        logger.info(f"Compacted metrics store, dropped {dropped} superseded row(s)")
+        return dropped
+
+    def _write_compacted(self, table: Dict[str, Any], index: "np.ndarray") -> None:
+        """Write selected rows to a fresh directory and swap it in."""
+        staging = self.metrics_dir.with_name("metrics.compact")
+        if staging.exists():
+            shutil.rmtree(staging)
+        staging.mkdir(parents=True)
+
+        table["ticker"][index].astype("<i4").tofile(staging / TICKER_COLUMN)
+        table["date"][index].astype("<i4").tofile(staging / DATE_COLUMN)
+        for metric in table["metrics"]:
+            np.asarray(table["columns"][metric][index], dtype="<f8").tofile(staging / self._metric_file(metric))
+        atomic_write_json(staging / self.META_FILE, {
+            "version": self.VERSION,
+            "rows": int(len(index)),
+            "tickers": table["tickers"],
+            "metrics": table["metrics"],
+        })
+
+        backup = self.metrics_dir.with_name("metrics.old")
+        if backup.exists():
+            shutil.rmtree(backup)
+        os.replace(self.metrics_dir, backup)
+        os.replace(staging, self.metrics_dir)
+        shutil.rmtree(backup)
+
+    def _read_column(self, file_name: str, dtype: str, rows: int) -> "np.ndarray":
+        path = self._column_path(file_name)
+        if rows == 0 or not path.exists():
+            return np.full(rows, np.nan, dtype=dtype) if dtype == "<f8" else np.zeros(rows, dtype=dtype)
+        return np.memmap(path, dtype=dtype, mode="r", shape=(rows,))
+
+    def _load_table(self) -> Dict[str, Any]:
+        """Map the committed columns, cached until meta.json changes."""
+        meta_path = self.metrics_dir / self.META_FILE
+        version = meta_path.stat().st_mtime_ns if meta_path.exists() else 0
+        cached = self._table
+        if cached and cached[0] == version:
+            return cached[1]
+
+        meta = self._load_meta()
+        rows = meta["rows"]
+        tickers = self._read_column(TICKER_COLUMN, "<i4", rows)
+        dates = self._read_column(DATE_COLUMN, "<i4", rows)
+
+        # Last row wins for each (ticker, date)
+        keys = tickers.astype(np.int64) << 32 | (dates.astype(np.int64) & 0xFFFFFFFF)
+        _, last_from_end = np.unique(keys[::-1], return_index=True)
+        live = np.sort(rows - 1 - last_from_end)
+
+        table = {
+            "rows": rows,
+            "tickers": meta["tickers"],
+            "metrics": meta["metrics"],
+            "ticker": tickers,
+            "date": dates,
+            "live": live,
+            "columns": {m: self._read_column(self._metric_file(m), "<f8", rows) for m in meta["metrics"]},
+        }
+        self._table = (version, table)
+        return table
+
+    def list_metrics(self) -> List[str]:
+        """Return the names of all stored metrics."""
+        return list(self._load_meta()["metrics"])
+
+    def list_tickers(self) -> List[str]:
+        """Return every ticker with at least one row."""
+        return sorted(self._load_meta()["tickers"])
+
+    def _select(
+        self,
+        table: Dict[str, Any],
+        tickers: Optional[List[str]],
+        start: Optional[str],
+        end: Optional[str]
+    ) -> "np.ndarray":
+        """Row indexes of live rows matching the filters, sorted by ticker then date."""
+        index = table["live"]
+        ticker_col = table["ticker"][index]
+        date_col = table["date"][index]
+        mask = np.ones(len(index), dtype=bool)
+
+        if tickers:
+            ids = {t: i for i, t in enumerate(table["tickers"])}
+            wanted = [ids[t] for t in (x.replace(":", "_").upper() for x in tickers) if t in ids]
+            mask &= np.isin(ticker_col, np.array(wanted, dtype="<i4"))
+        if start:
+            mask &= date_col >= np.datetime64(start, "D").astype("<i4")
+        if end:
+            mask &= date_col <= np.datetime64(end, "D").astype("<i4")
+
+        index = index[mask]
+        order = np.lexsort((table["date"][index], self._name_rank(table)[table["ticker"][index]]))
+        return index[order]
+    
+    @staticmethod
+    def _name_rank(table: Dict[str, Any]) -> "np.ndarray":
+        """Position of each ticker id in name order (ids follow insertion order)."""
+        if "name_rank" not in table:
+            names = np.array(table["tickers"], dtype=object)
+            rank = np.empty(len(names), dtype="<i4")
+            rank[np.argsort(names)] = np.arange(len(names), dtype="<i4")
+            table["name_rank"] = rank
+        return table["name_rank"]
+
+    def _metric_column(self, table: Dict[str, Any], metric: str) -> "np.ndarray":
+        if metric not in table["columns"]:
+            raise KeyError(f"Unknown metric: {metric}")
+        return table["columns"][metric]
+
+    def query(
+        self,
+        metrics: List[str],
+        tickers: Optional[List[str]] = None,
+        start: Optional[str] = None,
+        end: Optional[str] = None
+    ) -> Dict[str, "np.ndarray"]:
+        """
+        Return columns for the selected rows.
+
+        Args:
+            metrics: Metric names (see list_metrics)
+            tickers: Optional tickers to include
+            start: Optional first date (YYYY-MM-DD, inclusive)
+            end: Optional last date (YYYY-MM-DD, inclusive)
+
+        Returns:
+            Dictionary with "ticker" (str array), "date" (datetime64[D] array) and one
+            float64 array per metric, sorted by ticker then date
+
+        Raises:
+            KeyError: If a metric is unknown
+        """
+        table = self._load_table()
+        return self._columns(table, self._select(table, tickers, start, end), metrics)
+    
+    def _columns(self, table: Dict[str, Any], index: "np.ndarray", metrics: List[str]) -> Dict[str, "np.ndarray"]:
+        """Gather the key columns and requested metrics for the given rows."""
+        names = np.array(table["tickers"], dtype=object)
+        result = {
+            "ticker": names[table["ticker"][index]],
+            "date": table["date"][index].astype("datetime64[D]"),
+        }
+        for metric in metrics:
+            result[metric] = np.asarray(self._metric_column(table, metric)[index])
+        return result
+
+    def series(
+        self,
+        ticker: str,
+        metric: str,
+        start: Optional[str] = None,
+        end: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Return one metric over time for a ticker.
+
+        Args:
+            ticker: Ticker symbol
+            metric: Metric name
+            start: Optional first date (YYYY-MM-DD, inclusive)
+            end: Optional last date (YYYY-MM-DD, inclusive)
+
+        Returns:
+            List of {"date", "value"} in date order (reports without the field omitted)
+        """
+        data = self.query([metric], tickers=[ticker], start=start, end=end)
+        values = data[metric]
+        present = ~np.isnan(values)
+        return [
+            {"date": str(d), "value": float(v)}
+            for d, v in zip(data["date"][present], values[present])
+        ]
+
+    def aggregate(
+        self,
+        metric: str,
+        func: str = "mean",
+        by: str = "ticker",
+        tickers: Optional[List[str]] = None,
+        start: Optional[str] = None,
+        end: Optional[str] = None
+    ) -> Dict[str, Optional[float]]:
+        """
+        Aggregate a metric per ticker or per date.
+
+        Missing values are ignored. "first"/"last"/"change"/"pct_change" follow date
+        order within each ticker (with by="date" they follow ticker order).
+
+        Args:
+            metric: Metric name
+            func: One of AGGREGATES
+            by: "ticker" or "date"
+            tickers: Optional tickers to include
+            start: Optional first date (YYYY-MM-DD, inclusive)
+            end: Optional last date (YYYY-MM-DD, inclusive)
+
+        Returns:
+            Mapping of ticker (or date) to the aggregate, None where no value exists
+
+        Raises:
+            ValueError: If func or by is unknown
+            KeyError: If the metric is unknown
+        """
+        if func not in AGGREGATES:
+            raise ValueError(f"Unknown aggregate {func!r}; expected one of {AGGREGATES}")
+        if by not in ("ticker", "date"):
+            raise ValueError(f"Unknown grouping {by!r}; expected 'ticker' or 'date'")
+
+        data = self.query([metric], tickers=tickers, start=start, end=end)
+        values = data[metric]
+        groups = data["ticker"] if by == "ticker" else data["date"].astype(str)
+        if by == "date" and len(groups):
+            order = np.argsort(groups, kind="stable")
+            groups, values = groups[order], values[order]
+
+        result: Dict[str, Optional[float]] = {}
+        if not len(groups):
+            return result
+        boundaries = np.flatnonzero(groups[1:] != groups[:-1]) + 1
+        for group_values, key in zip(np.split(values, boundaries), groups[np.r_[0, boundaries]]):
+            result[str(key)] = self._reduce(group_values[~np.isnan(group_values)], func)
+        return result
+
+    @staticmethod
+    def _reduce(values: "np.ndarray", func: str) -> Optional[float]:
+        if func == "count":
+            return float(len(values))
+        if not len(values):
+            return None
+        if func == "first":
+            return float(values[0])
+        if func == "last":
+            return float(values[-1])
+        if func == "change":
+            return float(values[-1] - values[0])
+        if func == "pct_change":
+            return float((values[-1] - values[0]) / abs(values[0]) * 100) if values[0] else None
+        return float(getattr(np, func)(values))
+
+    def latest(
+        self,
+        metrics: List[str],
+        tickers: Optional[List[str]] = None,
+        as_of: Optional[str] = None
+    ) -> Dict[str, "np.ndarray"]:
+        """
+        Return each ticker's most recent row (optionally as of a date).
+
+        Args:
+            metrics: Metric names
+            tickers: Optional tickers to include
+            as_of: Optional last date considered (YYYY-MM-DD)
+
+        Returns:
+            Same layout as ``query``, one row per ticker
+        """
+        table = self._load_table()
+        if as_of is None:
+            # The latest row per ticker only changes on write; cache it with the table
+            if "latest" not in table:
+                table["latest"] = self._last_per_ticker(table, self._select(table, None, None, None))
+            index = table["latest"]
+            if tickers:
+                index = np.intersect1d(index, self._select(table, tickers, None, None))
+                index = index[np.lexsort((table["date"][index], self._name_rank(table)[table["ticker"][index]]))]
+        else:
+            index = self._last_per_ticker(table, self._select(table, tickers, None, as_of))
+        return self._columns(table, index, metrics)
+    
+    @staticmethod
+    def _last_per_ticker(table: Dict[str, Any], index: "np.ndarray") -> "np.ndarray":
+        """Keep the last of each ticker's rows from rows sorted by ticker then date."""
+        if not len(index):
+            return index
+        ticker_ids = table["ticker"][index]
+        return index[np.r_[np.flatnonzero(ticker_ids[1:] != ticker_ids[:-1]), len(index) - 1]]
@@ -28,7 +28,13 @@ except ImportError:
 class PerplexityResearchTool:
     """Tool for generating stock analysis reports using Perplexity API."""
     
-    def __init__(self, api_key: Optional[str] = None, knowledge_base_dir: Path = None, prompt_file: Optional[Path] = None):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        knowledge_base_dir: Path = None,
+        prompt_file: Optional[Path] = None,
+        report_tools=None
+    ):
         """
         Initialize Perplexity Research Tool.
         
@@ -36,6 +42,7 @@ class PerplexityResearchTool:
             api_key: Perplexity API key (defaults to PERPLEXITY_API_KEY env var)
             knowledge_base_dir: Knowledge base directory for storing reports
             prompt_file: Path to system prompt file
+            report_tools: ReportTools used to store reports (created per save if omitted)
         """
         self.api_key = api_key or os.getenv("PERPLEXITY_API_KEY")
         if not self.api_key:
@@ -54,6 +61,7 @@ class PerplexityResearchTool:
             )
         
         self.kb_dir = Path(knowledge_base_dir) if knowledge_base_dir else None
+        self.report_tools = report_tools
         
         # Load system prompt
         if prompt_file and prompt_file.exists():
@@ -175,6 +183,9 @@ class PerplexityResearchTool:
     
     def _save_report(self, report: Dict[str, Any]) -> Path:
         """Save report to knowledge base."""
+        if self.report_tools is not None:
+            return self.report_tools.save_report(report)
+        
         from .report_tools import ReportTools
         
         report_tools = ReportTools(self.kb_dir)
@@ -0,0 +1,249 @@
+"""Report Cache - Process-wide LRU cache of parsed knowledge base files"""
+
+import copy
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional, Dict, Any, Callable, Tuple
+
+from .report_codec import ZSTD_MAGIC, decode_report
+from .report_delta import apply_delta, base_file, is_delta
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+def decoded_size(data: Any, raw: Optional[bytes] = None) -> int:
+    """
+    Estimate the size of a parsed object as the length of its JSON text.
+
+    Args:
+        data: Parsed object
+        raw: Bytes it was decoded from; their length is used when they are JSON
+
+    Returns:
+        Estimated size in bytes
+    """
+    if raw is not None and raw[:4] != ZSTD_MAGIC:
+        return len(raw)
+    return len(json.dumps(data, ensure_ascii=False, separators=(",", ":"), default=str))
+
+
+
+class ReportCache:
+    """
+    Bounded LRU cache of parsed files keyed by (path, mtime, size).
+
+    An entry is only served while the file's mtime and size still match the values
+    recorded when it was parsed, so files rewritten on disk are re-read on next access.
+    The byte budget is measured in the estimated decoded size of the cached objects
+    (see ``decoded_size``), so compressed files and reconstructed delta reports are
+    charged for what they occupy once parsed rather than for their stored bytes.
+
+    Cached objects are shared between callers and must be treated as read-only;
+    pass ``copy=True`` to ``load`` when the result will be modified.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        Initialize Report Cache.
+
+        Args:
+            max_bytes: Maximum total decoded size of cached entries
+        """
+        self.max_bytes = max_bytes
+        # key -> (mtime or version, stored size, parsed object, decoded size)
+        self._entries: "OrderedDict[str, Tuple[Any, int, Any, int]]" = OrderedDict()
+        self._current_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def load(self, file_path: Path, copy: bool = False) -> Any:
+        """
+        Return the parsed content of a file, reading it only on a cache miss.
+
+        JSON and msgpack-zstd encoded files are detected automatically.
+
+        Args:
+            file_path: Path to the file
+            copy: Return a deep copy that the caller may modify
+
+        Returns:
+            Parsed content
+
+        Raises:
+            IOError: If the file cannot be read
+            json.JSONDecodeError: If the file is not valid JSON
+        """
+        key = str(file_path)
+        stat = os.stat(key)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] == stat.st_mtime_ns and entry[1] == stat.st_size:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._copy(entry[2]) if copy else entry[2]
+            self.misses += 1
+
+        with open(key, "rb") as f:
+            raw = f.read()
+        data = decode_report(raw)
+
+        self._store(key, stat.st_mtime_ns, stat.st_size, data, decoded_size(data, raw))
+        return self._copy(data) if copy else data
+
+    def load_report(self, file_path: Path, copy: bool = False) -> Any:
+        """
+        Load a report file, reconstructing delta files from their snapshot.
+
+        The reconstructed report is cached under the delta file's own key, so a
+        delta costs one patch application per cache miss.
+
+        Args:
+            file_path: Report or delta file
+            copy: Return a deep copy that the caller may modify
+
+        Returns:
+            Report dictionary
+
+        Raises:
+            IOError: If the file or its snapshot cannot be read
+            json.JSONDecodeError: If JSON content is invalid
+        """
+        key = str(file_path)
+        document = self.load(file_path)
+        if not is_delta(document):
+            return self._copy(document) if copy else document
+
+        materialized_key = key + "#materialized"
+        stat = os.stat(key)
+        with self._lock:
+            entry = self._entries.get(materialized_key)
+            if entry and entry[0] == stat.st_mtime_ns and entry[1] == stat.st_size:
+                self._entries.move_to_end(materialized_key)
+                return self._copy(entry[2]) if copy else entry[2]
+
+        report = apply_delta(self.load(base_file(file_path, document)), document["ops"])
+        self._store(materialized_key, stat.st_mtime_ns, stat.st_size, report, decoded_size(report))
+        return self._copy(report) if copy else report
+
+    def load_record(
+        self,
+        key: str,
+        version: Any,
+        size: int,
+        read: Callable[[], Any],
+        decode: bool = True
+    ) -> Any:
+        """
+        Return a cached record that is not a plain file (e.g. a segment log record).
+
+        Args:
+            key: Cache key, distinct from any file path
+            version: Value identifying the record's current contents (e.g. its location)
+            size: Stored size of the record, checked with ``version`` on a hit (the budget
+                is charged the decoded size)
+            read: Called on a miss to fetch the record
+            decode: Decode the bytes returned by ``read``; False caches its result as is
+
+        Returns:
+            Parsed record (shared, read-only)
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] == version and entry[1] == size:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[2]
+            self.misses += 1
+
+        data = read()
+        if decode:
+            raw, data = data, decode_report(data)
+            cost = decoded_size(data, raw)
+        else:
+            cost = decoded_size(data)
+        self._store(key, version, size, data, cost)
+        return data
+
+    def _store(self, key: str, mtime_ns: Any, size: int, data: Any, cost: int) -> None:
+        """Insert an entry and evict least recently used entries over budget."""
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous:
+                self._current_bytes -= previous[3]
+
+            if cost > self.max_bytes:
+                return
+
+            self._entries[key] = (mtime_ns, size, data, cost)
+            self._current_bytes += cost
+
+            while self._current_bytes > self.max_bytes and self._entries:
+                _, (_, _, _, evicted_cost) = self._entries.popitem(last=False)
+                self._current_bytes -= evicted_cost
+                self.evictions += 1
+
+    @staticmethod
+    def _copy(data: Any) -> Any:
+        return copy.deepcopy(data)
+
+    def invalidate(self, file_path: Path) -> None:
+        """Drop a single file from the cache."""
+        with self._lock:
+            for key in (str(file_path), str(file_path) + "#materialized"):
+                entry = self._entries.pop(key, None)
+                if entry:
+                    self._current_bytes -= entry[3]
+
+    def clear(self) -> None:
+        """Drop every cached entry (counters are kept)."""
+        with self._lock:
+            self._entries.clear()
+            self._current_bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and current memory usage."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._current_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
+
+
+_shared_cache: Optional[ReportCache] = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_report_cache() -> ReportCache:
+    """
+    Return the process-wide report cache.
+
+    The byte budget is read from the KB_REPORT_CACHE_MAX_BYTES environment variable
+    the first time the cache is created (default: 64 MiB).
+    """
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            max_bytes = DEFAULT_MAX_BYTES
+            configured = os.getenv("KB_REPORT_CACHE_MAX_BYTES")
+            if configured:
+                try:
+                    max_bytes = int(configured)
+                except ValueError:
+                    logger.warning(f"Invalid KB_REPORT_CACHE_MAX_BYTES={configured!r}, using default")
+            _shared_cache = ReportCache(max_bytes=max_bytes)
+        return _shared_cache
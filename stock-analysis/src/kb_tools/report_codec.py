@@ -0,0 +1,255 @@
+"""Report Codec - Report serialization formats and per-section byte offsets"""
+
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Optional dependencies for the compressed binary format
+try:
+    import msgpack
+    import zstandard
+    BINARY_CODEC_AVAILABLE = True
+except ImportError:
+    BINARY_CODEC_AVAILABLE = False
+
+SectionOffsets = Dict[str, List[int]]
+
+JSON_CODEC = "json"
+JSON_COMPACT_CODEC = "json-compact"
+MSGPACK_ZSTD_CODEC = "msgpack-zstd"
+CODECS = (JSON_CODEC, JSON_COMPACT_CODEC, MSGPACK_ZSTD_CODEC)
+
+JSON_SUFFIX = ".json"
+MSGPACK_ZSTD_SUFFIX = ".msgpack.zst"
+# Delta files (see report_delta) are checked first since they also end in .json
+DELTA_SUFFIX = ".delta.json"
+REPORT_SUFFIXES = (DELTA_SUFFIX, JSON_SUFFIX, MSGPACK_ZSTD_SUFFIX)
+
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+
+def _dump(value: Any, indent: Optional[int], depth: int) -> str:
+    """Serialize a value as it would appear nested ``depth`` levels deep."""
+    if indent is None:
+        return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+    text = json.dumps(value, indent=indent, ensure_ascii=False)
+    return text.replace("\n", "\n" + " " * (indent * depth))
+
+
+def encode_report_json(report: Dict[str, Any], indent: Optional[int] = 2) -> Tuple[bytes, SectionOffsets]:
+    """
+    Serialize a report to JSON and record where each analysis section lives.
+
+    The output is byte-for-byte identical to ``json.dumps(report, indent=indent,
+    ensure_ascii=False)`` (or the compact form when ``indent`` is None). The offsets
+    map every key of ``report["analysis"]`` to ``[start, length]`` of its value in the
+    encoded bytes, so a single section can later be read with one seek and parsed on
+    its own.
+
+    Args:
+        report: Report dictionary
+        indent: JSON indentation (None for compact output)
+
+    Returns:
+        Tuple of (encoded bytes, section offsets)
+    """
+    analysis = report.get("analysis")
+    if not report or not isinstance(analysis, dict) or not analysis:
+        return _dump(report, indent, 0).encode("utf-8"), {}
+
+    key_sep = ":" if indent is None else ": "
+
+    def newline(depth: int) -> str:
+        return "" if indent is None else "\n" + " " * (indent * depth)
+
+    chunks: List[bytes] = []
+    offsets: SectionOffsets = {}
+    position = 0
+
+    def emit(text: str) -> None:
+        nonlocal position
+        data = text.encode("utf-8")
+        chunks.append(data)
+        position += len(data)
+
+    emit("{")
+    items = list(report.items())
+    for i, (key, value) in enumerate(items):
+        emit(newline(1) + json.dumps(key, ensure_ascii=False) + key_sep)
+        if key == "analysis":
+            emit("{")
+            sections = list(value.items())
+            for j, (section_name, section_value) in enumerate(sections):
+                emit(newline(2) + json.dumps(section_name, ensure_ascii=False) + key_sep)
+                start = position
+                emit(_dump(section_value, indent, 2))
+                offsets[section_name] = [start, position - start]
+                if j < len(sections) - 1:
+                    emit(",")
+            emit(newline(1) + "}")
+        else:
+            emit(_dump(value, indent, 1))
+        if i < len(items) - 1:
+            emit(",")
+    emit(newline(0) + "}")
+
+    return b"".join(chunks), offsets
+
+
+def section_offsets_for(data: bytes) -> Optional[SectionOffsets]:
+    """
+    Recover section offsets for an existing JSON report file.
+
+    Works for files written with ``json.dump(indent=2)`` or in compact form; returns
+    None when the file layout cannot be reproduced exactly.
+
+    Args:
+        data: Raw file content
+
+    Returns:
+        Section offsets or None
+    """
+    try:
+        report = json.loads(data.decode("utf-8"))
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return None
+    if not isinstance(report, dict):
+        return None
+
+    for indent in (2, None):
+        encoded, offsets = encode_report_json(report, indent=indent)
+        if encoded == data:
+            return offsets
+    return None
+
+
+def read_sections(file_path: Path, offsets: SectionOffsets, sections: List[str]) -> Dict[str, Any]:
+    """
+    Read individual analysis sections from a report file without parsing the rest.
+
+    Args:
+        file_path: Report file path
+        offsets: Section offsets recorded when the file was written
+        sections: Names of the sections to read (unknown names are skipped)
+
+    Returns:
+        Mapping of section name to parsed section value
+    """
+    result = {}
+    with open(file_path, "rb") as f:
+        for name in sections:
+            if name not in offsets:
+                continue
+            start, length = offsets[name]
+            f.seek(start)
+            result[name] = json.loads(f.read(length).decode("utf-8"))
+    return result
+
+
+def default_codec() -> str:
+    """Return the codec selected by the KB_REPORT_CODEC environment variable (default: json)."""
+    codec = os.getenv("KB_REPORT_CODEC", JSON_CODEC).strip().lower()
+    if codec not in CODECS:
+        logger.warning(f"Unknown KB_REPORT_CODEC={codec!r}, using {JSON_CODEC}")
+        return JSON_CODEC
+    return codec
+
+
+def codec_suffix(codec: str) -> str:
+    """Return the report file suffix used by a codec."""
+    return MSGPACK_ZSTD_SUFFIX if codec == MSGPACK_ZSTD_CODEC else JSON_SUFFIX
+
+
+def encode_report(report: Dict[str, Any], codec: str = JSON_CODEC) -> Tuple[bytes, SectionOffsets]:
+    """
+    Serialize a report with the given codec.
+
+    Args:
+        report: Report dictionary
+        codec: One of CODECS
+
+    Returns:
+        Tuple of (encoded bytes, section offsets). Offsets are empty for binary codecs,
+        whose sections cannot be read independently.
+
+    Raises:
+        ValueError: If the codec is unknown
+        ImportError: If the codec's optional dependencies are not installed
+    """
+    if codec == JSON_CODEC:
+        return encode_report_json(report, indent=2)
+    if codec == JSON_COMPACT_CODEC:
+        return encode_report_json(report, indent=None)
+    if codec == MSGPACK_ZSTD_CODEC:
+        if not BINARY_CODEC_AVAILABLE:
+            raise ImportError(
+                "The msgpack-zstd report codec requires 'msgpack' and 'zstandard'. "
+                "Please install: pip install msgpack zstandard"
+            )
+        packed = msgpack.packb(report, use_bin_type=True)
+        return zstandard.ZstdCompressor(level=3).compress(packed), {}
+    raise ValueError(f"Unknown report codec: {codec}")
+
+
+def decode_report(data: bytes) -> Any:
+    """
+    Parse report bytes, detecting the format from the content.
+
+    Args:
+        data: Raw file content (JSON or zstd-compressed msgpack)
+
+    Returns:
+        Parsed report
+
+    Raises:
+        json.JSONDecodeError: If JSON content is invalid
+        IOError: If binary content cannot be decoded
+    """
+    if data[:4] == ZSTD_MAGIC:
+        if not BINARY_CODEC_AVAILABLE:
+            raise IOError("Report is stored as msgpack-zstd but 'msgpack'/'zstandard' are not installed")
+        try:
+            packed = zstandard.ZstdDecompressor().decompress(data)
+            return msgpack.unpackb(packed, raw=False)
+        except (zstandard.ZstdError, ValueError, msgpack.UnpackException) as e:
+            raise IOError(f"Corrupt msgpack-zstd report: {e}") from e
+    try:
+        return json.loads(data.decode("utf-8"))
+    except UnicodeDecodeError as e:
+        raise IOError(f"Report is neither JSON nor msgpack-zstd: {e}") from e
+
+
+def report_date_from_filename(filename: str) -> Optional[str]:
+    """
+    Extract the analysis date from a report file name such as AAPL_2026-01-15.json.
+
+    Args:
+        filename: Report file name
+
+    Returns:
+        Date string or None if the name is not a report file
+    """
+    for suffix in REPORT_SUFFIXES:
+        if filename.endswith(suffix):
+            stem = filename[:-len(suffix)]
+            # Tickers may contain underscores (HKEX_9988), dates never do
+            if "_" in stem:
+                return stem.rsplit("_", 1)[1]
+    return None
+
+
+def iter_report_files(year_dir: Path):
+    """
+    Yield (date, path) for every report file in a year directory, whatever its format.
+
+    Args:
+        year_dir: Directory such as knowledge_base/AAPL/2026
+    """
+    for file_path in year_dir.iterdir():
+        date = report_date_from_filename(file_path.name)
+        if date and file_path.is_file():
+            yield date, file_path
@@ -0,0 +1,141 @@
+"""Report Delta - Structural JSON diffs between report versions"""
+
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from .report_codec import decode_report
+
+DELTA_FORMAT = "json-delta"
+DEFAULT_SNAPSHOT_INTERVAL = 10
+
+# Delta files larger than this fraction of the full report are stored as snapshots
+MAX_DELTA_RATIO = 0.5
+
+# ["set", path, value] or ["del", path]; path items are dict keys or list indexes
+DeltaOp = List[Any]
+
+
+def snapshot_interval() -> int:
+    """Return KB_DELTA_SNAPSHOT_INTERVAL: reports per snapshot, including the snapshot."""
+    configured = os.getenv("KB_DELTA_SNAPSHOT_INTERVAL", "")
+    return max(1, int(configured)) if configured.isdigit() else DEFAULT_SNAPSHOT_INTERVAL
+
+
+def diff(old: Any, new: Any, path: Tuple = ()) -> List[DeltaOp]:
+    """
+    Compute the operations turning ``old`` into ``new``.
+
+    Objects are compared key by key and lists of equal length item by item; any
+    other change replaces the value at that path.
+
+    Args:
+        old: Previous value
+        new: New value
+
+    Returns:
+        List of delta operations (empty if the values are equal)
+    """
+    if old == new and type(old) is type(new):
+        return []
+    if isinstance(old, dict) and isinstance(new, dict):
+        ops: List[DeltaOp] = [["del", list(path + (key,))] for key in old if key not in new]
+        for key, value in new.items():
+            if key in old:
+                ops.extend(diff(old[key], value, path + (key,)))
+            else:
+                ops.append(["set", list(path + (key,)), value])
+        return ops
+    if isinstance(old, list) and isinstance(new, list) and len(old) == len(new):
+        ops = []
+        for i, (old_item, new_item) in enumerate(zip(old, new)):
+            ops.extend(diff(old_item, new_item, path + (i,)))
+        return ops
+    return [["set", list(path), new]]
+
+
+def apply_delta(base: Any, ops: List[DeltaOp]) -> Any:
+    """
+    Apply delta operations without modifying ``base``.
+
+    Only containers along changed paths are copied; unchanged subtrees are shared
+    with ``base``, so the result must be treated as read-only like cached reports.
+
+    Args:
+        base: Base value (e.g. a snapshot report)
+        ops: Operations from ``diff``
+
+    Returns:
+        The reconstructed value
+    """
+    root: Dict[str, Any] = {"value": base}
+    copied = {id(root)}
+
+    def writable(parent: Any, key: Any) -> Any:
+        child = parent[key]
+        if id(child) not in copied:
+            child = dict(child) if isinstance(child, dict) else list(child)
+            parent[key] = child
+            copied.add(id(child))
+        return child
+
+    for op in ops:
+        keys = ["value"] + list(op[1])
+        node = root
+        for key in keys[:-1]:
+            node = writable(node, key)
+        if op[0] == "del":
+            del node[keys[-1]]
+        else:
+            node[keys[-1]] = op[2]
+    return root["value"]
+
+
+def encode_delta(base_path: str, base_date: str, ops: List[DeltaOp]) -> bytes:
+    """
+    Serialize a delta document.
+
+    Args:
+        base_path: Snapshot path relative to the knowledge base root
+        base_date: Snapshot analysis date
+        ops: Operations turning the snapshot into this report
+
+    Returns:
+        Compact JSON bytes
+    """
+    document = {"format": DELTA_FORMAT, "base_date": base_date, "base_path": base_path, "ops": ops}
+    return json.dumps(document, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def is_delta(document: Any) -> bool:
+    """Return True if a decoded file is a delta document rather than a report."""
+    return isinstance(document, dict) and document.get("format") == DELTA_FORMAT
+
+
+def base_file(delta_path: Path, document: Dict[str, Any]) -> Path:
+    """Return the snapshot file a delta (stored at kb/TICKER/YEAR/) is based on."""
+    return Path(delta_path).parents[2] / document["base_path"]
+
+
+def read_report_file(file_path: Path) -> Optional[Dict[str, Any]]:
+    """
+    Read and, for delta files, reconstruct a report without going through the cache.
+
+    Args:
+        file_path: Report or delta file
+
+    Returns:
+        Report dictionary
+
+    Raises:
+        IOError: If the file or its snapshot cannot be read
+        json.JSONDecodeError: If JSON content is invalid
+    """
+    with open(file_path, "rb") as f:
+        document = decode_report(f.read())
+    if not is_delta(document):
+        return document
+    with open(base_file(file_path, document), "rb") as f:
+        base = decode_report(f.read())
+    return apply_delta(base, document["ops"])
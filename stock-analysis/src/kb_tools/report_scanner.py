@@ -0,0 +1,224 @@
+"""Report Scanner - Parallel full scans over report files"""
+
+import json
+import logging
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from itertools import islice
+from typing import Optional, Dict, Any, Callable, List, Tuple, Iterable, Iterator
+
+from .inverted_index import matches_term, report_tokens
+from .report_cache import get_report_cache
+from .report_delta import read_report_file
+
+logger = logging.getLogger(__name__)
+
+THREAD_EXECUTOR = "thread"
+PROCESS_EXECUTOR = "process"
+
+# (ticker, date, absolute path, relative path)
+ScanTask = Tuple[str, str, str, str]
+
+# Loads a report by its path relative to the knowledge base root
+ReportLoader = Callable[[str], Dict[str, Any]]
+
+# Report sections that topic excerpts are taken from
+TOPIC_SECTIONS = {
+    "risk": "risks",
+    "risks": "risks",
+    "valuation": "valuation",
+    "value": "valuation",
+    "catalyst": "catalysts",
+    "catalysts": "catalysts",
+}
+
+
+def excerpt_sections(topics: Optional[List[str]]) -> List[str]:
+    """Return the report sections needed to build the excerpt for these topics."""
+    if not topics:
+        return ["executive_summary"]
+    return sorted({TOPIC_SECTIONS[t.lower()] for t in topics if t.lower() in TOPIC_SECTIONS})
+
+
+def topic_excerpt(report: Dict[str, Any], topics: Optional[List[str]]) -> str:
+    """Generate an excerpt from the section relevant to the requested topics."""
+    excerpt = ""
+    analysis = report.get("analysis", {})
+    for topic in topics or []:
+        section = TOPIC_SECTIONS.get(topic.lower())
+        if section and section in analysis:
+            excerpt = str(analysis[section])[:200]
+    return excerpt
+
+
+def summary_excerpt(report: Dict[str, Any]) -> str:
+    """Return the start of the executive summary."""
+    analysis = report.get("analysis", {})
+    if not isinstance(analysis, dict):
+        return ""
+    return (analysis.get("executive_summary") or {}).get("summary", "")[:200]
+
+
+def _scan_file(
+    task: ScanTask,
+    search_terms: List[str],
+    topics: Optional[List[str]],
+    include_report: bool,
+    use_cache: bool,
+    loader: Optional[ReportLoader] = None
+) -> Optional[Dict[str, Any]]:
+    """
+    Read one report and match it against the search terms.
+
+    Module-level so that it can run in a process pool.
+    """
+    ticker, date, file_path, relative_path = task
+    try:
+        if loader is not None:
+            report = loader(relative_path)
+        elif use_cache:
+            report = get_report_cache().load_report(file_path)
+        else:
+            report = read_report_file(file_path)
+    except (json.JSONDecodeError, IOError) as e:
+        logger.warning(f"Error processing report {file_path}: {e}")
+        return None
+
+    if search_terms:
+        tokens = report_tokens(report)
+        hits = sum(1 for term in search_terms if matches_term(tokens, term))
+        if hits == 0:
+            return None
+        relevance_score = hits / len(search_terms)
+        excerpt = topic_excerpt(report, topics)
+    else:
+        relevance_score = 1.0
+        excerpt = summary_excerpt(report)
+
+    result = {
+        "ticker": ticker,
+        "date": date,
+        "file_path": relative_path,
+        "excerpt": excerpt,
+        "relevance_score": relevance_score,
+    }
+    if include_report:
+        result["report"] = report
+    return result
+
+
+def _scan_chunk(
+    tasks: List[ScanTask],
+    search_terms: List[str],
+    topics: Optional[List[str]],
+    include_report: bool,
+    use_cache: bool,
+    loader: Optional[ReportLoader] = None
+) -> List[Dict[str, Any]]:
+    """Scan a batch of files (one pool job) and return the matches."""
+    results = []
+    for task in tasks:
+        result = _scan_file(task, search_terms, topics, include_report, use_cache, loader)
+        if result:
+            results.append(result)
+    return results
+
+
+class ReportScanner:
+    """
+    Fans report reads and matching out over a thread or process pool.
+
+    Threads share the process-wide report cache and mostly overlap file I/O;
+    processes also parallelize JSON decoding and term matching, at the cost
+    of shipping matched reports back to the parent.
+    """
+
+    def __init__(self, workers: Optional[int] = None, executor: Optional[str] = None, chunk_size: int = 64):
+        """
+        Initialize Report Scanner.
+
+        Args:
+            workers: Number of workers (defaults to KB_SCAN_WORKERS, then the CPU count).
+                1 scans inline without a pool.
+            executor: "thread" or "process" (defaults to KB_SCAN_EXECUTOR, then thread)
+            chunk_size: Number of files handed to a worker per job
+        """
+        if workers is None:
+            configured = os.getenv("KB_SCAN_WORKERS")
+            workers = int(configured) if configured and configured.isdigit() else (os.cpu_count() or 1)
+        self.workers = max(1, workers)
+        self.executor = (executor or os.getenv("KB_SCAN_EXECUTOR", THREAD_EXECUTOR)).lower()
+        if self.executor not in (THREAD_EXECUTOR, PROCESS_EXECUTOR):
+            logger.warning(f"Unknown scan executor {self.executor!r}, using {THREAD_EXECUTOR}")
+            self.executor = THREAD_EXECUTOR
+        self.chunk_size = max(1, chunk_size)
+
+    def scan(
+        self,
+        tasks: Iterable[ScanTask],
+        search_terms: Optional[List[str]] = None,
+        topics: Optional[List[str]] = None,
+        include_report: bool = True,
+        loader: Optional[ReportLoader] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Scan report files and return the ones matching the search terms.
+
+        Args:
+            tasks: (ticker, date, absolute path, relative path) per report file
+            search_terms: Terms matched like the inverted index does (see
+                ``inverted_index.matches_term``). With no terms every readable report matches.
+            topics: Topics used to pick the excerpt section
+            include_report: Attach the full report under "report"
+            loader: Picklable callable loading a report by relative path, for reports
+                not stored as files (e.g. a SegmentLog's ``load_report``)
+
+        Returns:
+            Unsorted list of matching results
+        """
+        return list(self.iter_scan(tasks, search_terms, topics, include_report, loader))
+
+    def iter_scan(
+        self,
+        tasks: Iterable[ScanTask],
+        search_terms: Optional[List[str]] = None,
+        topics: Optional[List[str]] = None,
+        include_report: bool = True,
+        loader: Optional[ReportLoader] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Stream matches as worker chunks complete.
+
+        Tasks are consumed lazily and at most two chunks per worker are in flight, so
+        memory stays bounded by the chunk size rather than the number of reports
+        scanned. Arguments are the same as for ``scan`` (tasks may be any iterable).
+
+        Yields:
+            Matching results in task order
+        """
+        search_terms = search_terms or []
+        use_processes = self.executor == PROCESS_EXECUTOR
+
+        task_iter = iter(tasks)
+        chunks = iter(lambda: list(islice(task_iter, self.chunk_size)), [])
+
+        if self.workers == 1:
+            for chunk in chunks:
+                yield from _scan_chunk(chunk, search_terms, topics, include_report, True, loader)
+            return
+
+        pool_class = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+
+        with pool_class(max_workers=self.workers) as pool:
+            in_flight = deque()
+            for chunk in chunks:
+                in_flight.append(
+                    pool.submit(_scan_chunk, chunk, search_terms, topics, include_report, not use_processes, loader)
+                )
+                if len(in_flight) >= self.workers * 2:
+                    yield from in_flight.popleft().result()
+            while in_flight:
+                yield from in_flight.popleft().result()
+
+        logger.debug(f"Scanned reports with {self.workers} {self.executor} worker(s)")
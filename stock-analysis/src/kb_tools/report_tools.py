@@ -1,25 +1,153 @@
 """Report Tools - Read and search operations on report files"""
 
+import base64
+import heapq
 import json
 import logging
+import os
+import shutil
 from pathlib import Path
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Iterator, Tuple
 from datetime import datetime, timedelta
 
+from .bm25 import query_tokens, score_postings
+from .change_feed import ChangeFeed
+from .date_index import DateIndex
+from .topic_index import TopicIndex
+from .fs_utils import atomic_write_bytes, atomic_write_json
+from .inverted_index import InvertedIndex, tokenize
+from .manifest import ManifestStore
+from .metrics_store import MetricsStore, NUMPY_AVAILABLE
+from .screener import Screener
+from .vector_index import VectorIndex, get_vector_index
+from .report_cache import get_report_cache
+from .report_delta import (
+    MAX_DELTA_RATIO,
+    apply_delta,
+    diff,
+    encode_delta,
+    is_delta,
+    snapshot_interval,
+)
+from .report_writer import ReportWriter
+from .segment_log import FILES_BACKEND, SEGMENTS_BACKEND, SegmentLog, default_backend
+from .report_scanner import ReportScanner, excerpt_sections, summary_excerpt, topic_excerpt
+from .report_codec import (
+    decode_report,
+    default_codec,
+    codec_suffix,
+    DELTA_SUFFIX,
+    encode_report,
+    iter_report_files,
+    read_sections,
+    report_date_from_filename,
+    REPORT_SUFFIXES,
+)
+
 logger = logging.getLogger(__name__)
 
+FULL_STORAGE = "full"
+DELTA_STORAGE = "delta"
+SYNC_INDEX_UPDATES = "sync"
+BACKGROUND_INDEX_UPDATES = "background"
+LATEST_FILE = "latest.json"
+
 
 class ReportTools:
     """Tools for reading and searching stock analysis reports."""
     
-    def __init__(self, knowledge_base_dir: Path):
+    def __init__(
+        self,
+        knowledge_base_dir: Path,
+        codec: Optional[str] = None,
+        scan_workers: Optional[int] = None,
+        scan_executor: Optional[str] = None,
+        storage_mode: Optional[str] = None,
+        backend: Optional[str] = None,
+        index_updates: Optional[str] = None,
+        recover: bool = True
+    ):
         """
         Initialize Report Tools.
         
         Args:
             knowledge_base_dir: Root directory of the knowledge base
+            codec: Storage format for new reports (json, json-compact, msgpack-zstd).
+                Defaults to the KB_REPORT_CODEC environment variable, then json.
+                Reads detect the format of each file automatically.
+            scan_workers: Worker count for full scans (defaults to KB_SCAN_WORKERS, then CPU count)
+            scan_executor: "thread" or "process" pool for full scans (defaults to KB_SCAN_EXECUTOR)
+            storage_mode: "full" stores every report in full; "delta" stores periodic snapshots
+                plus JSON diffs against them (defaults to KB_REPORT_STORAGE, then full)
+            backend: "files" stores one file per report; "segments" appends reports to an
+                append-only segment log (defaults to KB_STORAGE_BACKEND, then the backend
+                the knowledge base already uses)
+            index_updates: "sync" updates the search, date, topic, metrics and vector
+                indexes while saving; "background" only appends saves to the change feed
+                for the index worker (defaults to KB_INDEX_UPDATES, then sync)
+            recover: Replay write journals left by crashed writers (off for read-only
+                helpers such as rebuild workers)
         """
         self.kb_dir = Path(knowledge_base_dir)
+        self.codec = codec or default_codec()
+        self.storage_mode = (storage_mode or os.getenv("KB_REPORT_STORAGE", FULL_STORAGE)).strip().lower()
+        if self.storage_mode not in (FULL_STORAGE, DELTA_STORAGE):
+            logger.warning(f"Unknown report storage mode {self.storage_mode!r}, using {FULL_STORAGE}")
+            self.storage_mode = FULL_STORAGE
+        self.backend = (backend or default_backend(self.kb_dir)).strip().lower()
+        if self.backend not in (FILES_BACKEND, SEGMENTS_BACKEND):
+            logger.warning(f"Unknown storage backend {self.backend!r}, using {FILES_BACKEND}")
+            self.backend = FILES_BACKEND
+        self.segments = SegmentLog(self.kb_dir) if self.backend == SEGMENTS_BACKEND else None
+        self.index_updates = (index_updates or os.getenv("KB_INDEX_UPDATES", SYNC_INDEX_UPDATES)).strip().lower()
+        if self.index_updates not in (SYNC_INDEX_UPDATES, BACKGROUND_INDEX_UPDATES):
+            logger.warning(f"Unknown index update mode {self.index_updates!r}, using {SYNC_INDEX_UPDATES}")
+            self.index_updates = SYNC_INDEX_UPDATES
+        self.change_feed = ChangeFeed(self.kb_dir) if self.index_updates == BACKGROUND_INDEX_UPDATES else None
+        self.inverted_index = InvertedIndex(self.kb_dir)
+        self.report_cache = get_report_cache()
+        self.manifest_store = ManifestStore(self.kb_dir, segments=self.segments)
+        self.date_index = DateIndex(self.kb_dir)
+        self.topic_index = TopicIndex(self.kb_dir)
+        self.scanner = ReportScanner(workers=scan_workers, executor=scan_executor)
+        self.metrics_store = MetricsStore(self.kb_dir) if NUMPY_AVAILABLE else None
+        self.writer = ReportWriter(self.kb_dir)
+        
+        # Finish batches interrupted by a crash before serving reads
+        if recover and self.writer.pending():
+            self.recover_pending_writes()
+    
+    def _relative(self, file_path: Path) -> str:
+        """Return a report path relative to the knowledge base root (its segment log key)."""
+        return Path(file_path).relative_to(self.kb_dir).as_posix()
+    
+    def _report_exists(self, file_path: Path) -> bool:
+        """Return True if a report is stored at this path with the active backend."""
+        if self.segments:
+            return self.segments.contains(self._relative(file_path))
+        return file_path.exists()
+    
+    def _load_report(self, file_path: Path) -> Dict[str, Any]:
+        """Load a stored report (shared with the report cache, read-only) from the active backend."""
+        if self.segments:
+            return self.segments.load_report(self._relative(file_path))
+        return self.report_cache.load_report(file_path)
+    
+    def _read_report_bytes(self, file_path: Path) -> bytes:
+        """Return the stored (encoded) bytes of a report."""
+        if self.segments:
+            return self.segments.read(self._relative(file_path))
+        return file_path.read_bytes()
+    
+    def _remove_reports(self, relative_paths: List[str]) -> None:
+        """Delete stored reports that have been superseded."""
+        if self.segments:
+            self.segments.delete_many(relative_paths)
+            return
+        for relative_path in relative_paths:
+            file_path = self.kb_dir / relative_path
+            if file_path.exists():
+                file_path.unlink()
     
     def _get_storage_path(self, ticker: str, date: Optional[str] = None) -> Optional[Path]:
         """
@@ -39,60 +167,174 @@ class ReportTools:
             return None
         
         if date:
+            entry = self.manifest_store.entry(normalized_ticker, date)
+            if entry and self._report_exists(self.kb_dir / entry["path"]):
+                return self.kb_dir / entry["path"]
+            
             year = date[:4]
-            file_path = ticker_dir / year / f"{normalized_ticker}_{date}.json"
-            return file_path if file_path.exists() else None
-        else:
-            # Find most recent report
-            most_recent = None
-            most_recent_date = None
+            for suffix in REPORT_SUFFIXES:
+                file_path = ticker_dir / year / f"{normalized_ticker}_{date}{suffix}"
+                if self._report_exists(file_path):
+                    return file_path
+            return None
+        
+        # Find most recent report from the ticker manifest
+        entry = self.manifest_store.latest(normalized_ticker)
+        if entry is None and self.manifest_store.load(normalized_ticker) is None:
+            # Knowledge bases written before manifests existed
+            self.manifest_store.rebuild(normalized_ticker)
+            entry = self.manifest_store.latest(normalized_ticker)
+        
+        if entry:
+            file_path = self.kb_dir / entry["path"]
+            if self._report_exists(file_path):
+                return file_path
             
-            for year_dir in ticker_dir.iterdir():
-                if not year_dir.is_dir():
-                    continue
-                for report_file in year_dir.glob("*.json"):
-                    try:
-                        # Extract date from filename
-                        filename = report_file.stem
-                        if "_" in filename:
-                            date_str = filename.split("_", 1)[1]
-                            if date_str > (most_recent_date or ""):
-                                most_recent = report_file
-                                most_recent_date = date_str
-                    except Exception:
-                        continue
-            
-            return most_recent
-    
-    def read_report(self, ticker: str, date: Optional[str] = None) -> Optional[Dict[str, Any]]:
+            # Manifest and files disagree, rebuild once from disk
+            logger.warning(f"Manifest for {normalized_ticker} points to missing file {entry['path']}, rebuilding")
+            self.manifest_store.rebuild(normalized_ticker)
+            entry = self.manifest_store.latest(normalized_ticker)
+            if entry:
+                return self.kb_dir / entry["path"]
+        
+        return None
+    
+    def list_report_dates(self, ticker: str) -> List[str]:
+        """
+        List the dates of all stored reports for a ticker.
+        
+        Args:
+            ticker: Stock ticker symbol
+            
+        Returns:
+            Report dates (YYYY-MM-DD), newest first
+        """
+        normalized_ticker = ticker.replace(":", "_").upper()
+        if not (self.kb_dir / normalized_ticker).exists():
+            return []
+        
+        dates = self.manifest_store.list_dates(normalized_ticker)
+        if dates is None:
+            dates = sorted(self.manifest_store.rebuild(normalized_ticker)["reports"], reverse=True)
+        return dates
+    
+    def rebuild_manifests(self, tickers: Optional[List[str]] = None) -> Dict[str, int]:
+        """
+        Rebuild ticker manifests from the report files on disk.
+        
+        Args:
+            tickers: Optional list of tickers (defaults to every ticker in the knowledge base)
+            
+        Returns:
+            Mapping of ticker to number of reports recorded
+        """
+        if tickers:
+            normalized = [t.replace(":", "_").upper() for t in tickers]
+        else:
+            normalized = [d.name for d in self.kb_dir.iterdir() if d.is_dir() and not d.name.startswith("_")]
+        
+        return {
+            ticker: len(self.manifest_store.rebuild(ticker)["reports"])
+            for ticker in normalized
+            if (self.kb_dir / ticker).exists()
+        }
+    
+    def read_report(
+        self,
+        ticker: str,
+        date: Optional[str] = None,
+        sections: Optional[List[str]] = None
+    ) -> Optional[Dict[str, Any]]:
         """
         Read a stock analysis report.
         
         Args:
             ticker: Stock ticker symbol
             date: Analysis date in YYYY-MM-DD format (optional, defaults to most recent)
+            sections: Optional list of analysis sections to return (e.g. ["valuation", "risks"]).
+                Only these sections are read from disk.
             
         Returns:
-            Full report JSON or None if not found
+            Full report JSON (or the projected report when sections are given) or None
+            if not found. The returned dict is shared with the report cache and must not
+            be modified.
         """
+        if sections:
+            return self._read_report_sections(ticker, date, sections)
+        
+        if date is None:
+            latest = self._read_latest_materialized(ticker)
+            if latest is not None:
+                return latest
+        
+        file_path = self._get_storage_path(ticker, date)
+        if not file_path:
+            logger.debug(f"Report not found for {ticker} on {date or 'most recent'}")
+            return None
+        
+        try:
+            return self._load_report(file_path)
+        except (json.JSONDecodeError, IOError) as e:
+            logger.error(f"Error reading report {file_path}: {e}")
+            return None
+    
+    def _read_latest_materialized(self, ticker: str) -> Optional[Dict[str, Any]]:
+        """Return the cached full copy of a ticker's latest report if it is stored as a delta."""
+        normalized_ticker = ticker.replace(":", "_").upper()
+        latest_path = self.kb_dir / normalized_ticker / LATEST_FILE
+        if not latest_path.exists():
+            return None
+        entry = self.manifest_store.latest(normalized_ticker)
+        try:
+            report = self.report_cache.load(latest_path)
+        except (json.JSONDecodeError, IOError) as e:
+            logger.warning(f"Ignoring unreadable {latest_path}: {e}")
+            return None
+        if not entry or report.get("analysis_date") != entry["date"]:
+            return None
+        return report
+    
+    def _read_report_sections(self, ticker: str, date: Optional[str], sections: List[str]) -> Optional[Dict[str, Any]]:
+        """Read selected analysis sections using the byte offsets recorded in the manifest."""
         file_path = self._get_storage_path(ticker, date)
         if not file_path:
             logger.debug(f"Report not found for {ticker} on {date or 'most recent'}")
             return None
         
+        normalized_ticker = ticker.replace(":", "_").upper()
+        report_date = report_date_from_filename(file_path.name)
+        entry = self.manifest_store.entry(normalized_ticker, report_date)
+        
         try:
-            with open(file_path, "r", encoding="utf-8") as f:
-                return json.load(f)
+            offsets = entry.get("sections") if entry else None
+            if offsets and self.segments and self.segments.size(self._relative(file_path)) == entry.get("size"):
+                analysis = self.segments.read_sections(self._relative(file_path), offsets, sections)
+            elif offsets and not self.segments and file_path.stat().st_size == entry.get("size"):
+                analysis = read_sections(file_path, offsets, sections)
+            else:
+                # No usable offsets (legacy or rewritten file), project the full report
+                full_analysis = self._load_report(file_path).get("analysis", {})
+                analysis = {name: full_analysis[name] for name in sections if name in full_analysis}
         except (json.JSONDecodeError, IOError) as e:
             logger.error(f"Error reading report {file_path}: {e}")
             return None
+        
+        return {
+            "ticker": normalized_ticker,
+            "analysis_date": report_date,
+            "analysis": analysis
+        }
     
     def search_reports(
         self,
         tickers: Optional[List[str]] = None,
         date_range: Optional[Dict[str, str]] = None,
         topics: Optional[List[str]] = None,
-        keywords: Optional[List[str]] = None
+        keywords: Optional[List[str]] = None,
+        full_scan: bool = False,
+        limit: Optional[int] = 20,
+        cursor: Optional[str] = None,
+        include_report: bool = False
     ) -> List[Dict[str, Any]]:
         """
         Search across multiple reports.
@@ -102,13 +344,270 @@ class ReportTools:
             date_range: Optional dict with 'start' and 'end' dates (YYYY-MM-DD)
             topics: Optional list of topics to search for
             keywords: Optional list of keywords to search for
+            full_scan: Read every report (parallel scan) instead of ranking with BM25 over
+                the inverted index. Both match the same reports: one whose text has
+                every word of at least one topic/keyword (words match as prefixes)
+            limit: Maximum number of results (None for all matches)
+            cursor: Cursor returned by search_reports_page to fetch the next page
+            include_report: Attach the full report JSON under "report"
             
         Returns:
-            List of matching reports with excerpts and relevance scores
+            List of matching reports with excerpts and relevance scores, best first
+        """
+        return self.search_reports_page(
+            tickers=tickers,
+            date_range=date_range,
+            topics=topics,
+            keywords=keywords,
+            full_scan=full_scan,
+            limit=limit,
+            cursor=cursor,
+            include_report=include_report
+        )["results"]
+    
+    def search_reports_page(
+        self,
+        tickers: Optional[List[str]] = None,
+        date_range: Optional[Dict[str, str]] = None,
+        topics: Optional[List[str]] = None,
+        keywords: Optional[List[str]] = None,
+        full_scan: bool = False,
+        limit: Optional[int] = 20,
+        cursor: Optional[str] = None,
+        include_report: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Return one page of search results ranked by (relevance, date).
+        
+        Candidates are streamed and only the best ``limit`` are kept in a heap, so
+        memory is bounded by the page size. Reports are read only for the results
+        on the page (plus every report for a full scan).
+        
+        Args:
+            Same as search_reports
+            
+        Returns:
+            Dictionary with "results" and "next_cursor" (None on the last page)
+        """
+        after = self._decode_cursor(cursor)
+        candidates = self._iter_candidates(tickers, date_range, topics, keywords, full_scan, include_report)
+        if after is not None:
+            candidates = (c for c in candidates if self._rank_key(c) < after)
+        
+        if limit is None:
+            page = sorted(candidates, key=self._rank_key, reverse=True)
+        else:
+            page = heapq.nlargest(limit, candidates, key=self._rank_key)
+        
+        results = [self._finalize_result(c, topics, include_report) for c in page]
+        next_cursor = None
+        if limit is not None and len(page) == limit:
+            next_cursor = self._encode_cursor(self._rank_key(page[-1]))
+        
+        return {"results": results, "next_cursor": next_cursor}
+    
+    def iter_search_results(
+        self,
+        tickers: Optional[List[str]] = None,
+        date_range: Optional[Dict[str, str]] = None,
+        topics: Optional[List[str]] = None,
+        keywords: Optional[List[str]] = None,
+        full_scan: bool = False,
+        include_report: bool = False
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Stream every matching report, unsorted, without materializing the result set.
+        
+        Args:
+            Same as search_reports (without paging)
+            
+        Yields:
+            Result dictionaries
+        """
+        for candidate in self._iter_candidates(tickers, date_range, topics, keywords, full_scan, include_report):
+            yield self._finalize_result(candidate, topics, include_report)
+    
+    def _iter_candidates(
+        self,
+        tickers: Optional[List[str]],
+        date_range: Optional[Dict[str, str]],
+        topics: Optional[List[str]],
+        keywords: Optional[List[str]],
+        full_scan: bool,
+        include_report: bool
+    ) -> Iterator[Dict[str, Any]]:
+        """Yield lightweight match candidates (ticker, date, file_path, relevance_score)."""
+        search_terms = (topics or []) + (keywords or [])
+        
+        if search_terms and not full_scan:
+            self._ensure_search_index()
+            yield from self._iter_indexed_candidates(search_terms, tickers, date_range)
+            return
+        
+        if date_range:
+            files = self._iter_dated_files(tickers, date_range)
+        else:
+            files = self._iter_report_files(tickers)
+        
+        if not search_terms:
+            # Listing without terms: rank by date, read only the reports that make the page
+            for ticker, date_str, report_file in files:
+                yield {
+                    "ticker": ticker,
+                    "date": date_str,
+                    "file_path": report_file.relative_to(self.kb_dir).as_posix(),
+                    "relevance_score": 1.0
+                }
+            return
+        
+        tasks = (
+            (ticker, date_str, str(report_file), report_file.relative_to(self.kb_dir).as_posix())
+            for ticker, date_str, report_file in files
+        )
+        yield from self.scanner.iter_scan(
+            tasks,
+            search_terms=search_terms,
+            topics=topics,
+            include_report=include_report,
+            loader=self.segments.load_report if self.segments else None
+        )
+    
+    def _iter_indexed_candidates(
+        self,
+        search_terms: List[str],
+        tickers: Optional[List[str]],
+        date_range: Optional[Dict[str, str]]
+    ) -> Iterator[Dict[str, Any]]:
+        """Rank reports with BM25 from the inverted index postings without opening them."""
+        ticker_filter = {t.replace(":", "_").upper() for t in tickers} if tickers else None
+        tokens = query_tokens(search_terms)
+        term_postings = self.inverted_index.term_postings(tokens)
+        
+        # A report matches when it has every token of at least one term (as the full scan)
+        token_docs = {token: set() for token in tokens}
+        for term, postings in term_postings.items():
+            for token in tokens:
+                if term.startswith(token):
+                    token_docs[token].update(postings)
+        matched = set()
+        for search_term in search_terms:
+            term_tokens = tokenize(search_term)
+            if term_tokens:
+                matched.update(set.intersection(*(token_docs[token] for token in term_tokens)))
+        
+        # Only the tickers with a matching report have their metadata loaded
+        docs = self.inverted_index.get_docs(matched)
+        scores = score_postings(term_postings, docs, self.inverted_index.get_stats())
+        
+        for doc_key in matched:
+            score = scores.get(doc_key, 0.0)
+            doc = docs.get(doc_key)
+            if not doc:
+                continue
+            if ticker_filter and doc["ticker"] not in ticker_filter:
+                continue
+            if not self._in_date_range(doc["date"], date_range):
+                continue
+            yield {
+                "ticker": doc["ticker"],
+                "date": doc["date"],
+                "file_path": doc["file_path"],
+                "relevance_score": round(score, 6)
+            }
+    
+    def _finalize_result(self, candidate: Dict[str, Any], topics: Optional[List[str]], include_report: bool) -> Dict[str, Any]:
+        """Fill in the excerpt (and report body if requested) for a selected candidate."""
+        result = dict(candidate)
+        
+        if include_report and "report" not in result:
+            result["report"] = self.read_report(result["ticker"], result["date"]) or {}
+        
+        if "excerpt" not in result:
+            if "report" in result:
+                source = result["report"]
+            else:
+                source = self.read_report(result["ticker"], result["date"], sections=excerpt_sections(topics)) or {}
+            result["excerpt"] = topic_excerpt(source, topics) if topics else summary_excerpt(source)
+        
+        return result
+    
+    @staticmethod
+    def _rank_key(result: Dict[str, Any]) -> Tuple[float, str, str]:
+        """Sort key for results: relevance, then date, then ticker (all descending)."""
+        return (result["relevance_score"], result["date"], result["ticker"])
+    
+    @staticmethod
+    def _encode_cursor(key: Tuple[float, str, str]) -> str:
+        return base64.urlsafe_b64encode(json.dumps(list(key)).encode("utf-8")).decode("ascii")
+    
+    @staticmethod
+    def _decode_cursor(cursor: Optional[str]) -> Optional[Tuple[float, str, str]]:
+        if not cursor:
+            return None
+        try:
+            score, date_str, ticker = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+            return (float(score), str(date_str), str(ticker))
+        except (ValueError, TypeError) as e:
+            raise ValueError(f"Invalid search cursor: {cursor}") from e
+    
+    @staticmethod
+    def _in_date_range(date_str: str, date_range: Optional[Dict[str, str]]) -> bool:
+        """Check a YYYY-MM-DD date against an optional {'start', 'end'} range."""
+        if not date_range:
+            return True
+        start = date_range.get("start")
+        end = date_range.get("end")
+        if start and date_str < start:
+            return False
+        if end and date_str > end:
+            return False
+        return True
+    
+    def iter_reports(self, tickers: Optional[List[str]] = None) -> Iterator[Tuple[str, str, str, Dict[str, Any]]]:
+        """
+        Stream every stored report, one at a time.
+        
+        Args:
+            tickers: Optional list of ticker symbols to restrict the walk to
+            
+        Yields:
+            (ticker, date, relative path, report) tuples; unreadable reports are skipped.
+            Reports are shared with the report cache and must not be modified.
         """
-        results = []
+        for ticker, date_str, report_file in self._iter_report_files(tickers):
+            try:
+                report = self._load_report(report_file)
+            except (json.JSONDecodeError, IOError) as e:
+                logger.warning(f"Skipping unreadable report {report_file}: {e}")
+                continue
+            yield ticker, date_str, self._relative(report_file), report
+    
+    def _iter_report_files(self, tickers: Optional[List[str]] = None):
+        """
+        Walk stored reports (report files on disk, or segment log keys).
         
-        # Determine which ticker directories to search
+        Args:
+            tickers: Optional list of ticker symbols to restrict the walk to
+            
+        Yields:
+            (ticker, date, path) tuples
+        """
+        if self.segments:
+            yield from self._iter_segment_reports(self.segments, tickers)
+        else:
+            yield from self._walk_report_files(tickers)
+    
+    def _iter_segment_reports(self, segments: SegmentLog, tickers: Optional[List[str]] = None):
+        """Yield (ticker, date, path) for every report key in a segment log."""
+        prefixes = [f"{t.replace(':', '_').upper()}/" for t in tickers] if tickers else [""]
+        for prefix in prefixes:
+            for key in segments.keys(prefix):
+                date_str = report_date_from_filename(key.rsplit("/", 1)[-1])
+                if date_str:
+                    yield key.split("/", 1)[0], date_str, self.kb_dir / key
+    
+    def _walk_report_files(self, tickers: Optional[List[str]] = None):
+        """Yield (ticker, date, path) for every report file in the ticker directories."""
         if tickers:
             search_dirs = [self.kb_dir / t.replace(":", "_").upper() for t in tickers]
         else:
@@ -117,78 +616,250 @@ class ReportTools:
         for ticker_dir in search_dirs:
             if not ticker_dir.exists():
                 continue
-            
-            ticker = ticker_dir.name
-            
-            # Search all reports in this ticker directory
             for year_dir in ticker_dir.iterdir():
                 if not year_dir.is_dir():
                     continue
-                
-                for report_file in year_dir.glob("*.json"):
-                    try:
-                        # Extract date from filename
-                        filename = report_file.stem
-                        if "_" not in filename:
-                            continue
-                        date_str = filename.split("_", 1)[1]
-                        
-                        # Check date range filter
-                        if date_range:
-                            start = date_range.get("start")
-                            end = date_range.get("end")
-                            if start and date_str < start:
-                                continue
-                            if end and date_str > end:
-                                continue
-                        
-                        # Read report
-                        with open(report_file, "r", encoding="utf-8") as f:
-                            report = json.load(f)
-                        
-                        # Check topic/keyword matches
-                        relevance_score = 0.0
-                        excerpt = ""
-                        
-                        if topics or keywords:
-                            report_text = json.dumps(report, default=str).lower()
-                            search_terms = (topics or []) + (keywords or [])
-                            
-                            for term in search_terms:
-                                if term.lower() in report_text:
-                                    relevance_score += 1.0
-                            
-                            # Generate excerpt from relevant section
-                            if topics:
-                                for topic in topics:
-                                    topic_lower = topic.lower()
-                                    if topic_lower in ["risk", "risks"] and "risks" in report.get("analysis", {}):
-                                        excerpt = str(report["analysis"]["risks"])[:200]
-                                    elif topic_lower in ["valuation", "value"] and "valuation" in report.get("analysis", {}):
-                                        excerpt = str(report["analysis"]["valuation"])[:200]
-                                    elif topic_lower in ["catalyst", "catalysts"] and "catalysts" in report.get("analysis", {}):
-                                        excerpt = str(report["analysis"]["catalysts"])[:200]
-                        else:
-                            # No filters, include all reports
-                            relevance_score = 1.0
-                            excerpt = report.get("analysis", {}).get("executive_summary", {}).get("summary", "")[:200]
-                        
-                        if relevance_score > 0 or not (topics or keywords):
-                            results.append({
-                                "ticker": ticker,
-                                "date": date_str,
-                                "file_path": str(report_file.relative_to(self.kb_dir)),
-                                "excerpt": excerpt,
-                                "relevance_score": relevance_score / max(len(topics or []) + len(keywords or []), 1),
-                                "report": report
-                            })
-                    except (json.JSONDecodeError, IOError, KeyError) as e:
-                        logger.warning(f"Error processing report {report_file}: {e}")
-                        continue
-        
-        # Sort by relevance and date
-        results.sort(key=lambda x: (x["relevance_score"], x["date"]), reverse=True)
-        return results
+                for date_str, report_file in iter_report_files(year_dir):
+                    yield ticker_dir.name, date_str, report_file
+    
+    def _iter_dated_files(self, tickers: Optional[List[str]], date_range: Dict[str, str]):
+        """
+        Yield (ticker, date, path) for reports in a date range from the date index.
+        
+        Args:
+            tickers: Optional list of ticker symbols
+            date_range: Dict with optional 'start' and 'end' dates (YYYY-MM-DD)
+        """
+        if not self.date_index.exists():
+            self.rebuild_date_index()
+        for entry in self.date_index.range(date_range.get("start"), date_range.get("end"), tickers=tickers):
+            yield entry["ticker"], entry["date"], self.kb_dir / entry["file_path"]
+    
+    def rebuild_date_index(self) -> int:
+        """
+        Rebuild the month and week date nodes from every report on disk.
+        
+        Returns:
+            Number of reports indexed
+        """
+        def entries():
+            for ticker, date_str, report_file in self._iter_report_files():
+                try:
+                    report = self._load_report(report_file)
+                except (json.JSONDecodeError, IOError) as e:
+                    logger.warning(f"Skipping unreadable report {report_file}: {e}")
+                    continue
+                yield self._date_entry(ticker, date_str, report_file.relative_to(self.kb_dir).as_posix(), report)
+        
+        count = self.date_index.add_reports(entries(), reset=True)
+        logger.info(f"Rebuilt date index with {count} reports")
+        return count
+    
+    def rebuild_topic_index(self) -> int:
+        """
+        Rebuild the sector, risk and catalyst topic nodes from every report on disk.
+        
+        Returns:
+            Number of reports indexed
+        """
+        def items():
+            for ticker, date_str, report_file in self._iter_report_files():
+                try:
+                    report = self._load_report(report_file)
+                except (json.JSONDecodeError, IOError) as e:
+                    logger.warning(f"Skipping unreadable report {report_file}: {e}")
+                    continue
+                yield self._date_entry(ticker, date_str, report_file.relative_to(self.kb_dir).as_posix(), report), report
+        
+        count = self.topic_index.add_reports(items(), reset=True)
+        logger.info(f"Rebuilt topic index with {count} reports")
+        return count
+    
+    @staticmethod
+    def _date_entry(ticker: str, date_str: str, relative_path: str, report: Dict[str, Any]) -> Dict[str, Any]:
+        """Build the date index entry of a report."""
+        analysis = report.get("analysis", {})
+        exec_summary = analysis.get("executive_summary", {}) if isinstance(analysis, dict) else {}
+        return {
+            "ticker": ticker,
+            "date": date_str,
+            "file_path": relative_path,
+            "summary": (exec_summary or {}).get("summary", "")[:150]
+        }
+    
+    def _ensure_search_index(self) -> None:
+        """Build the inverted index on first use for knowledge bases that predate it."""
+        if not self.inverted_index.exists():
+            self.rebuild_search_index()
+    
+    def rebuild_search_index(self) -> int:
+        """
+        Rebuild the inverted search index from every report on disk.
+        
+        Returns:
+            Number of reports indexed
+        """
+        def reports():
+            for _, _, report_file in self._iter_report_files():
+                try:
+                    report = self._load_report(report_file)
+                except (json.JSONDecodeError, IOError) as e:
+                    logger.warning(f"Skipping unreadable report {report_file}: {e}")
+                    continue
+                yield report, report_file.relative_to(self.kb_dir).as_posix()
+        
+        count = self.inverted_index.add_reports(reports(), reset=True)
+        logger.info(f"Rebuilt search index with {count} reports")
+        return count
+    
+    def get_metrics_store(self) -> MetricsStore:
+        """
+        Return the numeric metrics store, building it on first use.
+        
+        Returns:
+            Metrics store with one row per report
+            
+        Raises:
+            ImportError: If numpy is not installed
+        """
+        if self.metrics_store is None:
+            raise ImportError("The metrics store requires 'numpy'. Please install: pip install numpy")
+        if not self.metrics_store.exists():
+            self.rebuild_metrics()
+        return self.metrics_store
+    
+    def screen_stocks(
+        self,
+        filters: Optional[List[Any]] = None,
+        sort_by: Optional[str] = None,
+        descending: bool = False,
+        limit: Optional[int] = 50,
+        fields: Optional[List[str]] = None,
+        tickers: Optional[List[str]] = None,
+        as_of: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Screen the latest report of every ticker by numeric metrics.
+        
+        Args:
+            filters: Comparisons that must all hold, e.g. ["pe_forward < 20", "revenue_growth_yoy_pct > 0"]
+            sort_by: Metric to order results by
+            descending: Sort from highest to lowest
+            limit: Maximum number of results (None for all)
+            fields: Extra metrics to include in each result
+            tickers: Restrict the universe to these tickers
+            as_of: Use the latest report on or before this date (YYYY-MM-DD)
+            
+        Returns:
+            Screen result (see Screener.screen)
+            
+        Raises:
+            ValueError: If a filter or metric name is invalid
+        """
+        return Screener(self.get_metrics_store()).screen(
+            filters=filters,
+            sort_by=sort_by,
+            descending=descending,
+            limit=limit,
+            fields=fields,
+            tickers=tickers,
+            as_of=as_of
+        )
+    
+    def rebuild_metrics(self) -> int:
+        """
+        Rebuild the numeric metrics store from every report on disk.
+        
+        Returns:
+            Number of reports extracted
+        """
+        if self.metrics_store is None:
+            raise ImportError("The metrics store requires 'numpy'. Please install: pip install numpy")
+        
+        def reports():
+            for _, _, report_file in self._iter_report_files():
+                try:
+                    yield self._load_report(report_file)
+                except (json.JSONDecodeError, IOError) as e:
+                    logger.warning(f"Skipping unreadable report {report_file}: {e}")
+        
+        return self.metrics_store.rebuild(reports())
+    
+    def get_vector_index(self) -> VectorIndex:
+        """
+        Return the semantic vector index, (re)building its report sections when missing
+        or built with another embedding model.
+        
+        Returns:
+            Vector index shared by Report Tools and Index Tools
+            
+        Raises:
+            ImportError: If numpy is not installed
+        """
+        vector_index = get_vector_index(self.kb_dir)
+        if not vector_index.ready():
+            self.rebuild_vector_index()
+        return vector_index
+    
+    def has_vector_index(self) -> bool:
+        """Return True if a semantic vector index has been built (without loading an embedding model)."""
+        return NUMPY_AVAILABLE and (self.kb_dir / "_indexes" / "vectors" / VectorIndex.META_FILE).exists()
+    
+    def rebuild_vector_index(self) -> int:
+        """
+        Rebuild the semantic vector index from every report on disk.
+        
+        Returns:
+            Number of report sections embedded
+            
+        Raises:
+            ImportError: If numpy is not installed
+        """
+        return get_vector_index(self.kb_dir).rebuild(self.iter_reports())
+    
+    def semantic_search(
+        self,
+        query: str,
+        limit: int = 10,
+        tickers: Optional[List[str]] = None,
+        sections: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Find the report sections closest in meaning to a query (cosine similarity of embeddings).
+        
+        Args:
+            query: Free-text query
+            limit: Maximum number of sections to return
+            tickers: Optional tickers to restrict results to
+            sections: Optional section names to restrict results to (e.g. ["risks"])
+            
+        Returns:
+            Matches with ticker, date, section, file_path and score, best first
+            
+        Raises:
+            ImportError: If numpy is not installed
+        """
+        ticker_filter = {t.replace(":", "_").upper() for t in tickers} if tickers else None
+        section_filter = set(sections) if sections else None
+        
+        def accept(record: Dict[str, Any]) -> bool:
+            return (not ticker_filter or record["ticker"] in ticker_filter) and \
+                (not section_filter or record["section"] in section_filter)
+        
+        matches = []
+        for record, score in self.get_vector_index().search(query, top_k=limit, kind="section", accept=accept):
+            # The manifest has the current path (codec migrations rename report files)
+            entry = self.manifest_store.entry(record["ticker"], record["date"])
+            if not entry:
+                continue
+            matches.append({
+                "ticker": record["ticker"],
+                "date": record["date"],
+                "section": record["section"],
+                "file_path": entry["path"],
+                "score": round(score, 6),
+            })
+        return matches
     
     def save_report(self, report: Dict[str, Any]) -> Path:
         """
@@ -200,6 +871,43 @@ class ReportTools:
         Returns:
             Path to the saved file
         """
+        return self.save_reports([report])[0]
+    
+    def save_reports(self, reports: List[Dict[str, Any]], update_indexes: bool = True) -> List[Path]:
+        """
+        Save a batch of reports crash-safely.
+        
+        The batch is journaled first, then all report files are written with one
+        grouped fsync, and manifests, the search index and the metrics store are each
+        updated once. An interrupted batch is replayed when ReportTools next starts.
+        
+        Args:
+            reports: Report dictionaries
+            update_indexes: Update the search, date and topic indexes and the metrics store.
+                Bulk loaders pass False and call the rebuild_* methods once at the end.
+            
+        Returns:
+            Paths to the saved files, in input order
+            
+        Raises:
+            ValueError: If a report lacks 'ticker' or 'analysis_date'
+        """
+        entries = [self._encode_entry(report) for report in reports]
+        if not entries:
+            return []
+        if self.storage_mode == DELTA_STORAGE:
+            entries, reports = self._encode_deltas(entries, list(reports))
+        
+        journal_path = self.writer.begin(entries)
+        self._apply_entries(entries, reports, update_indexes=update_indexes)
+        self.writer.commit(journal_path)
+        
+        for entry in entries:
+            logger.info(f"Saved report to: {self.kb_dir / entry['path']}")
+        return [self.kb_dir / entry["path"] for entry in entries]
+    
+    def _encode_entry(self, report: Dict[str, Any]) -> Dict[str, Any]:
+        """Validate and encode a report into a write entry."""
         ticker = report.get("ticker", "")
         analysis_date = report.get("analysis_date", "")
         
@@ -208,16 +916,363 @@ class ReportTools:
         
         normalized_ticker = ticker.replace(":", "_").upper()
         year = analysis_date[:4]
+        filename = f"{normalized_ticker}_{analysis_date}{codec_suffix(self.codec)}"
         
-        ticker_dir = self.kb_dir / normalized_ticker / year
-        ticker_dir.mkdir(parents=True, exist_ok=True)
+        data, section_offsets = encode_report(report, self.codec)
+        return {
+            "ticker": normalized_ticker,
+            "date": analysis_date,
+            "path": f"{normalized_ticker}/{year}/{filename}",
+            "sections": section_offsets,
+            "data": data
+        }
+    
+    def _encode_deltas(
+        self,
+        entries: List[Dict[str, Any]],
+        reports: List[Dict[str, Any]]
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        Re-encode full entries as deltas against the ticker's latest earlier snapshot.
         
-        filename = f"{normalized_ticker}_{analysis_date}.json"
-        file_path = ticker_dir / filename
+        A report becomes a snapshot when the ticker has no earlier snapshot, when the
+        snapshot already has KB_DELTA_SNAPSHOT_INTERVAL - 1 deltas, or when the delta
+        would not be much smaller than the report. Deltas based on a date that is being
+        overwritten are re-encoded in the same batch.
+        """
+        interval = snapshot_interval()
+        # Per ticker: date -> {"base": snapshot date or None, "report": report if in this batch}
+        state: Dict[str, Dict[str, Dict[str, Any]]] = {}
         
-        with open(file_path, "w", encoding="utf-8") as f:
-            json.dump(report, f, indent=2, ensure_ascii=False)
+        def ticker_state(ticker: str) -> Dict[str, Dict[str, Any]]:
+            if ticker not in state:
+                manifest = self.manifest_store.load(ticker) or {}
+                state[ticker] = {
+                    d: {"base": e.get("base"), "path": e["path"]}
+                    for d, e in manifest.get("reports", {}).items()
+                }
+            return state[ticker]
+        
+        # Deltas whose snapshot is overwritten must be rebuilt against new content
+        queue = list(zip(entries, reports))
+        batch_keys = {(e["ticker"], e["date"]) for e in entries}
+        for entry in entries:
+            for dependent_date, info in ticker_state(entry["ticker"]).items():
+                if info["base"] == entry["date"] and (entry["ticker"], dependent_date) not in batch_keys:
+                    report = self._load_report(self.kb_dir / info["path"])
+                    queue.append((self._encode_entry(report), report))
+                    batch_keys.add((entry["ticker"], dependent_date))
+        
+        # Snapshots first within each ticker so deltas can refer to them
+        queue.sort(key=lambda item: (item[0]["ticker"], item[0]["date"]))
+        
+        encoded = []
+        for entry, report in queue:
+            ticker, date = entry["ticker"], entry["date"]
+            dates = ticker_state(ticker)
+            snapshots = [d for d, info in dates.items() if info["base"] is None and d < date]
+            base_date = max(snapshots) if snapshots else None
+            delta = None
+            
+            if base_date:
+                dependents = sum(1 for d, info in dates.items() if info["base"] == base_date and d != date)
+                if dependents + 1 < interval:
+                    base_info = dates[base_date]
+                    base_report = base_info.get("report") or self._load_report(self.kb_dir / base_info["path"])
+                    delta = encode_delta(base_info["path"], base_date, diff(base_report, report))
+                    if len(delta) > len(entry["data"]) * MAX_DELTA_RATIO:
+                        delta = None
+            
+            if delta is not None:
+                year_dir = entry["path"].rsplit("/", 1)[0]
+                entry = dict(entry, data=delta, sections={}, base=base_date,
+                             path=f"{year_dir}/{ticker}_{date}{DELTA_SUFFIX}")
+                dates[date] = {"base": base_date, "path": entry["path"]}
+            else:
+                dates[date] = {"base": None, "path": entry["path"], "report": report}
+            encoded.append((entry, report))
+        
+        return [e for e, _ in encoded], [r for _, r in encoded]
+    
+    def _apply_entries(
+        self,
+        entries: List[Dict[str, Any]],
+        reports: List[Dict[str, Any]],
+        update_indexes: bool = True
+    ) -> None:
+        """Write journaled report files and bring manifests and (optionally) indexes up to date."""
+        # Paths recorded before this batch, to drop copies left in another format
+        previous = {}
+        for entry in entries:
+            old = self.manifest_store.entry(entry["ticker"], entry["date"])
+            if old and old.get("path") != entry["path"]:
+                previous[entry["path"]] = old["path"]
+        
+        if self.segments:
+            self.segments.append_many((entry["path"], entry["data"]) for entry in entries)
+        else:
+            self.writer.apply(entries)
+        
+        by_ticker: Dict[str, List[Tuple[str, str, bytes, Dict[str, Any]]]] = {}
+        for entry in entries:
+            extra = {"sections": entry["sections"]}
+            if entry.get("base"):
+                extra["base"] = entry["base"]
+            by_ticker.setdefault(entry["ticker"], []).append((entry["date"], entry["path"], entry["data"], extra))
+        for ticker, ticker_entries in by_ticker.items():
+            self.manifest_store.record_many(ticker, ticker_entries)
+        
+        self._remove_reports(list(previous.values()))
+        
+        for ticker in by_ticker:
+            self._refresh_latest_materialized(ticker)
+        
+        if self.segments and self.segments.needs_compaction():
+            self.segments.compact_in_background()
+        
+        if not update_indexes:
+            return
+        
+        if self.change_feed:
+            # The index worker applies these; appended before the journal is committed
+            self.change_feed.append(entries)
+            return
+        self.index_saved_reports(entries, reports)
+    
+    def index_saved_reports(self, entries: List[Dict[str, Any]], reports: List[Dict[str, Any]]) -> None:
+        """
+        Bring the search, date, topic, metrics and vector indexes up to date with saved reports.
+        
+        Args:
+            entries: Dicts with the ticker, date and path of each report
+            reports: The saved reports (full, not deltas), in the same order
+        """
+        if self.inverted_index.exists():
+            self.inverted_index.add_reports(zip(reports, [entry["path"] for entry in entries]))
+        else:
+            self.rebuild_search_index()
+        
+        if self.date_index.exists():
+            self.date_index.add_reports(
+                self._date_entry(entry["ticker"], entry["date"], entry["path"], report)
+                for entry, report in zip(entries, reports)
+            )
+        else:
+            self.rebuild_date_index()
+        
+        if self.topic_index.exists():
+            self.topic_index.add_reports(
+                (self._date_entry(entry["ticker"], entry["date"], entry["path"], report), report)
+                for entry, report in zip(entries, reports)
+            )
+        else:
+            self.rebuild_topic_index()
+        
+        if self.metrics_store:
+            if self.metrics_store.exists():
+                self.metrics_store.append_many(reports)
+            else:
+                self.rebuild_metrics()
+        
+        # The vector index is built on the first semantic search, then kept current here
+        if self.has_vector_index():
+            vector_index = get_vector_index(self.kb_dir)
+            if vector_index.ready():
+                vector_index.add_reports(
+                    (entry["ticker"], entry["date"], entry["path"], report)
+                    for entry, report in zip(entries, reports)
+                )
+    
+    def _refresh_latest_materialized(self, ticker: str) -> None:
+        """Keep {ticker}/latest.json in step with a latest report stored as a delta."""
+        latest_path = self.kb_dir / ticker / LATEST_FILE
+        entry = self.manifest_store.latest(ticker)
+        if entry and entry.get("base"):
+            report = self._load_report(self.kb_dir / entry["path"])
+            atomic_write_json(latest_path, report, indent=None)
+        elif latest_path.exists():
+            latest_path.unlink()
+    
+    def recover_pending_writes(self) -> int:
+        """
+        Replay report batches whose write was interrupted.
+        
+        Returns:
+            Number of batches recovered
+        """
+        recovered = 0
+        for journal_path in self.writer.pending():
+            entries = self.writer.read(journal_path)
+            if entries is None:
+                self.writer.discard(journal_path)
+                continue
+            batch = {entry["path"]: entry["data"] for entry in entries}
+            reports = []
+            for entry in entries:
+                document = decode_report(entry["data"])
+                if is_delta(document):
+                    base_data = batch.get(document["base_path"])
+                    base = decode_report(base_data) if base_data else self._load_report(self.kb_dir / document["base_path"])
+                    document = apply_delta(base, document["ops"])
+                reports.append(document)
+            self._apply_entries(entries, reports)
+            self.writer.commit(journal_path)
+            recovered += 1
+            logger.warning(f"Recovered interrupted write of {len(entries)} report(s) from {journal_path.name}")
+        return recovered
+    
+    def _write_report_file(
+        self,
+        ticker: str,
+        date: str,
+        relative_path: str,
+        data: bytes,
+        section_offsets: Dict[str, List[int]]
+    ) -> None:
+        """Write encoded report bytes, record them in the manifest and drop a copy in another format."""
+        previous = self.manifest_store.entry(ticker, date)
+        
+        if self.segments:
+            self.segments.append_many([(relative_path, data)])
+        else:
+            atomic_write_bytes(self.kb_dir / relative_path, data)
+        self.manifest_store.record(ticker, date, relative_path, data, sections=section_offsets)
+        
+        if previous and previous.get("path") != relative_path:
+            self._remove_reports([previous["path"]])
+    
+    def migrate_storage(self, codec: str, tickers: Optional[List[str]] = None) -> Dict[str, int]:
+        """
+        Convert stored reports to another codec in place.
+        
+        Each report is re-encoded, written atomically next to the original and
+        recorded in the ticker manifest before the original file is removed. The
+        search and date indexes are rebuilt at the end because report paths may change.
+        
+        Args:
+            codec: Target codec (json, json-compact, msgpack-zstd)
+            tickers: Optional list of tickers to migrate (defaults to all)
+            
+        Returns:
+            Counts of migrated/unchanged/failed reports and total bytes before/after
+        """
+        stats = {"migrated": 0, "unchanged": 0, "failed": 0, "bytes_before": 0, "bytes_after": 0}
+        suffix = codec_suffix(codec)
+        
+        # Deltas first: they are materialized while their snapshots are still in place
+        report_files = sorted(self._iter_report_files(tickers), key=lambda f: not f[2].name.endswith(DELTA_SUFFIX))
+        for ticker, date_str, report_file in report_files:
+            try:
+                original = self._read_report_bytes(report_file)
+                report = self._load_report(report_file)
+                data, section_offsets = encode_report(report, codec)
+            except (json.JSONDecodeError, IOError) as e:
+                logger.warning(f"Skipping unreadable report {report_file}: {e}")
+                stats["failed"] += 1
+                continue
+            
+            stats["bytes_before"] += len(original)
+            stats["bytes_after"] += len(data)
+            
+            relative_path = f"{ticker}/{date_str[:4]}/{ticker}_{date_str}{suffix}"
+            if data == original and report_file.relative_to(self.kb_dir).as_posix() == relative_path:
+                stats["unchanged"] += 1
+                continue
+            
+            self._write_report_file(ticker, date_str, relative_path, data, section_offsets)
+            if report_file != self.kb_dir / relative_path:
+                self._remove_reports([self._relative(report_file)])
+            stats["migrated"] += 1
+        
+        if stats["migrated"]:
+            for ticker in {ticker for ticker, _, _ in report_files}:
+                self._refresh_latest_materialized(ticker)
+            self.rebuild_search_index()
+            self.rebuild_date_index()
+            self.rebuild_topic_index()
+        
+        logger.info(
+            f"Migrated {stats['migrated']} report(s) to {codec}: "
+            f"{stats['bytes_before']} -> {stats['bytes_after']} bytes"
+        )
+        return stats
+    
+    def compact_storage(self, min_dead_ratio: Optional[float] = None) -> Dict[str, int]:
+        """
+        Compact the segment log now instead of waiting for background compaction.
+        
+        Args:
+            min_dead_ratio: Rewrite segments with at least this fraction of dead bytes
+                (defaults to every sealed segment holding dead bytes)
+            
+        Returns:
+            Compaction counts (all zero for the files backend)
+        """
+        if not self.segments:
+            return {"segments_removed": 0, "records_moved": 0, "bytes_reclaimed": 0}
+        return self.segments.compact(min_dead_ratio if min_dead_ratio is not None else 0.0)
+    
+    def convert_backend(self, backend: str, batch_size: int = 500) -> Dict[str, int]:
+        """
+        Move every stored report to another storage backend.
+        
+        Reports keep their relative paths and bytes, so manifests and indexes stay
+        valid without a rebuild. Each batch is durably written to the target before
+        it is removed from the source, so an interrupted conversion is finished by
+        running it again.
+        
+        Args:
+            backend: Target backend ("files" or "segments")
+            batch_size: Reports copied per write batch
+            
+        Returns:
+            Counts of converted reports and bytes
+            
+        Raises:
+            ValueError: If the backend is unknown
+        """
+        backend = backend.strip().lower()
+        if backend not in (FILES_BACKEND, SEGMENTS_BACKEND):
+            raise ValueError(f"Unknown storage backend {backend!r}; expected {FILES_BACKEND} or {SEGMENTS_BACKEND}")
+        
+        stats = {"converted": 0, "bytes": 0}
+        segments = self.segments or SegmentLog(self.kb_dir)
+        if backend == SEGMENTS_BACKEND:
+            sources = list(self._walk_report_files())
+        else:
+            sources = list(self._iter_segment_reports(segments)) if segments.exists() else []
+        
+        for start in range(0, len(sources), batch_size):
+            batch = []
+            for _, _, source in sources[start:start + batch_size]:
+                relative_path = self._relative(source)
+                data = source.read_bytes() if backend == SEGMENTS_BACKEND else segments.read(relative_path)
+                batch.append((relative_path, data))
+            
+            if backend == SEGMENTS_BACKEND:
+                segments.append_many(batch)
+                for relative_path, _ in batch:
+                    (self.kb_dir / relative_path).unlink()
+            else:
+                self.writer.apply([{"path": path, "data": data} for path, data in batch])
+                segments.delete_many(path for path, _ in batch)
+            
+            stats["converted"] += len(batch)
+            stats["bytes"] += sum(len(data) for _, data in batch)
+        
+        if backend == SEGMENTS_BACKEND:
+            # Drop the emptied year directories
+            for year_dir in {source.parent for _, _, source in sources}:
+                if year_dir.exists() and not any(year_dir.iterdir()):
+                    year_dir.rmdir()
+            self.segments = segments
+        else:
+            if segments.segments_dir.exists():
+                shutil.rmtree(segments.segments_dir)
+            self.segments = None
+        self.backend = backend
+        self.manifest_store.segments = self.segments
         
-        logger.info(f"Saved report to: {file_path}")
-        return file_path
+        logger.info(f"Converted {stats['converted']} report(s) ({stats['bytes']} bytes) to the {backend} backend")
+        return stats
 
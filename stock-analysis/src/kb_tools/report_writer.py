@@ -0,0 +1,210 @@
+"""Report Writer - Journaled, batched report writes with crash recovery"""
+
+import base64
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Optional, Dict, Any, List
+
+from .fs_utils import fsync_dir, process_alive
+
+logger = logging.getLogger(__name__)
+
+JOURNAL_DIR = "_journal"
+JOURNAL_SUFFIX = ".journal"
+
+# Encoded report waiting to be written:
+# {"ticker", "date", "path" (relative to the KB root), "sections", "data" (bytes),
+#  "base" (snapshot date if data is a delta)}
+WriteEntry = Dict[str, Any]
+
+# Journals begun and not yet committed by this process: batches still being written
+_open_journals = set()
+_open_journals_lock = threading.Lock()
+
+
+def fsync_enabled() -> bool:
+    """Return False when KB_WRITE_FSYNC disables fsync (for tests and throwaway knowledge bases)."""
+    return os.getenv("KB_WRITE_FSYNC", "1").strip().lower() not in ("0", "false", "no", "off")
+
+
+class ReportWriter:
+    """
+    Write-ahead journal for batches of report files.
+
+    A batch is first serialized to one journal file under ``_journal/`` (written to a
+    temp name, fsynced and renamed, so a journal is either complete or absent). The
+    report files are then written to temp files, fsynced as a group, renamed into
+    place and their directories fsynced once each. The caller updates manifests and
+    indexes and finally ``commit``s the batch, which deletes the journal.
+
+    If the process dies before ``commit``, the journal survives and the whole batch,
+    including its index updates, is replayed on the next start. Replay is idempotent:
+    it rewrites the same bytes and re-records the same entries. Journal names carry the
+    writer's pid; ``pending`` leaves out journals of writers that are still running.
+    """
+
+    def __init__(self, knowledge_base_dir: Path, fsync: Optional[bool] = None):
+        """
+        Initialize Report Writer.
+
+        Args:
+            knowledge_base_dir: Root directory of the knowledge base
+            fsync: Flush files and directories to disk (defaults to KB_WRITE_FSYNC, then on)
+        """
+        self.kb_dir = Path(knowledge_base_dir)
+        self.journal_dir = self.kb_dir / JOURNAL_DIR
+        self.fsync = fsync_enabled() if fsync is None else fsync
+
+    def begin(self, entries: List[WriteEntry]) -> Path:
+        """
+        Durably record a batch before any report file is touched.
+
+        Args:
+            entries: Encoded reports to write
+
+        Returns:
+            Path of the journal file
+        """
+        self.journal_dir.mkdir(parents=True, exist_ok=True)
+        lines = [json.dumps({
+            "ticker": e["ticker"],
+            "date": e["date"],
+            "path": e["path"],
+            "sections": e.get("sections") or {},
+            "base": e.get("base"),
+            "data": base64.b64encode(e["data"]).decode("ascii"),
+        }) for e in entries]
+        body = "\n".join(lines).encode("utf-8")
+        trailer = json.dumps({"count": len(entries), "sha256": hashlib.sha256(body).hexdigest()})
+        content = body + b"\n" + trailer.encode("utf-8") + b"\n"
+
+        name = f"{time.time_ns():020d}-{os.getpid()}{JOURNAL_SUFFIX}"
+        journal_path = self.journal_dir / name
+        with _open_journals_lock:
+            _open_journals.add(journal_path)
+        fd, temp_name = tempfile.mkstemp(dir=self.journal_dir, prefix=f".{name}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(content)
+                if self.fsync:
+                    f.flush()
+                    os.fsync(f.fileno())
+            os.replace(temp_name, journal_path)
+        except BaseException:
+            if os.path.exists(temp_name):
+                os.unlink(temp_name)
+            with _open_journals_lock:
+                _open_journals.discard(journal_path)
+            raise
+        if self.fsync:
+            fsync_dir(self.journal_dir)
+        return journal_path
+
+    def apply(self, entries: List[WriteEntry]) -> None:
+        """
+        Write report files: temp files first, one fsync pass, then renames.
+
+        Args:
+            entries: Encoded reports to write
+        """
+        staged = []
+        try:
+            for entry in entries:
+                target = self.kb_dir / entry["path"]
+                target.parent.mkdir(parents=True, exist_ok=True)
+                fd, temp_name = tempfile.mkstemp(dir=target.parent, prefix=f".{target.name}.", suffix=".tmp")
+                staged.append((temp_name, target))
+                with os.fdopen(fd, "wb") as f:
+                    f.write(entry["data"])
+
+            if self.fsync:
+                for temp_name, _ in staged:
+                    fd = os.open(temp_name, os.O_RDONLY)
+                    try:
+                        os.fsync(fd)
+                    finally:
+                        os.close(fd)
+
+            for temp_name, target in staged:
+                os.replace(temp_name, target)
+        except BaseException:
+            for temp_name, _ in staged:
+                if os.path.exists(temp_name):
+                    os.unlink(temp_name)
+            raise
+
+        if self.fsync:
+            for directory in {target.parent for _, target in staged}:
+                fsync_dir(directory)
+
+    def commit(self, journal_path: Path) -> None:
+        """Mark a batch as fully applied by deleting its journal."""
+        with _open_journals_lock:
+            _open_journals.discard(journal_path)
+        try:
+            journal_path.unlink()
+        except FileNotFoundError:
+            return
+        if self.fsync:
+            fsync_dir(self.journal_dir)
+
+    def pending(self) -> List[Path]:
+        """
+        Return journals of interrupted batches, oldest first.
+
+        Journals of batches another running process, or another thread of this one,
+        is still writing are left out; only writers that died leave journals to replay.
+        """
+        if not self.journal_dir.exists():
+            return []
+        with _open_journals_lock:
+            open_journals = set(_open_journals)
+        pending = []
+        for journal_path in sorted(self.journal_dir.glob(f"*{JOURNAL_SUFFIX}")):
+            pid = journal_path.stem.rsplit("-", 1)[-1]
+            if journal_path in open_journals or (pid.isdigit() and process_alive(int(pid))):
+                continue  # a live writer commits this batch itself
+            pending.append(journal_path)
+        return pending
+
+    def read(self, journal_path: Path) -> Optional[List[WriteEntry]]:
+        """
+        Read a journal back.
+
+        Args:
+            journal_path: Journal file
+
+        Returns:
+            Entries of the batch, or None if the journal is gone or damaged
+        """
+        try:
+            content = journal_path.read_bytes()
+        except FileNotFoundError:
+            return None
+
+        body, _, trailer = content.rstrip(b"\n").rpartition(b"\n")
+        try:
+            check = json.loads(trailer)
+            if hashlib.sha256(body).hexdigest() != check["sha256"]:
+                raise ValueError("checksum mismatch")
+            entries = []
+            for line in body.splitlines():
+                entry = json.loads(line)
+                entry["data"] = base64.b64decode(entry["data"])
+                entries.append(entry)
+            if len(entries) != check["count"]:
+                raise ValueError("entry count mismatch")
+        except (ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Discarding damaged write journal {journal_path}: {e}")
+            return None
+        return entries
+
+    def discard(self, journal_path: Path) -> None:
+        """Delete a damaged journal."""
+        journal_path.unlink(missing_ok=True)
@@ -0,0 +1,188 @@
+"""Screener - Cross-sectional stock screens over the metrics store"""
+
+import logging
+import re
+import time
+from typing import Optional, Dict, Any, List, Tuple, Union
+
+from .metrics_store import MetricsStore, NUMPY_AVAILABLE
+
+if NUMPY_AVAILABLE:
+    import numpy as np
+
+logger = logging.getLogger(__name__)
+
+FILTER_PATTERN = re.compile(
+    r"^\s*([A-Za-z0-9_.]+)\s*(<=|>=|==|!=|<|>|=)\s*([-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)\s*%?\s*$"
+)
+OPERATORS = ("<", "<=", ">", ">=", "==", "!=")
+
+Filter = Tuple[str, str, float]
+
+
+class Screener:
+    """
+    Filters and ranks the latest report of every ticker by numeric metrics.
+
+    Filters are plain comparisons such as ``"pe_forward < 20"`` or
+    ``{"metric": "revenue_growth_yoy_pct", "op": ">", "value": 0}``. Metric names may be
+    given in full (``valuation.multiples.pe_forward``) or by any unambiguous suffix.
+    Tickers whose latest report lacks a filtered metric do not pass the filter.
+    """
+
+    def __init__(self, metrics_store: MetricsStore):
+        """
+        Initialize Screener.
+
+        Args:
+            metrics_store: Metrics store to screen
+        """
+        self.metrics_store = metrics_store
+
+    def resolve_metric(self, name: str) -> str:
+        """
+        Resolve a full or suffix metric name.
+
+        Args:
+            name: Metric name, e.g. "pe_forward" or "valuation.multiples.pe_forward"
+
+        Returns:
+            Full metric name
+
+        Raises:
+            ValueError: If the name is unknown or matches several metrics
+        """
+        metrics = self.metrics_store.list_metrics()
+        if name in metrics:
+            return name
+        matches = [m for m in metrics if m.endswith("." + name)]
+        if len(matches) == 1:
+            return matches[0]
+        if matches:
+            raise ValueError(f"Ambiguous metric {name!r}: {', '.join(sorted(matches))}")
+        raise ValueError(f"Unknown metric {name!r}")
+
+    def parse_filter(self, spec: Union[str, Dict[str, Any]]) -> Filter:
+        """
+        Parse one filter.
+
+        Args:
+            spec: "metric op value" string or {"metric", "op", "value"} dictionary
+
+        Returns:
+            (full metric name, operator, value)
+
+        Raises:
+            ValueError: If the filter is malformed or the metric unknown
+        """
+        if isinstance(spec, dict):
+            try:
+                metric, op, value = spec["metric"], spec["op"], float(spec["value"])
+            except (KeyError, TypeError, ValueError) as e:
+                raise ValueError(f"Invalid filter {spec!r}: expected metric, op and numeric value") from e
+        else:
+            match = FILTER_PATTERN.match(spec)
+            if not match:
+                raise ValueError(f"Invalid filter {spec!r}: expected e.g. 'pe_forward < 20'")
+            metric, op, value = match.group(1), match.group(2), float(match.group(3))
+
+        op = "==" if op == "=" else op
+        if op not in OPERATORS:
+            raise ValueError(f"Unknown operator {op!r}; expected one of {OPERATORS}")
+        return self.resolve_metric(metric), op, value
+
+    def parse_filters(self, filters: Optional[List[Union[str, Dict[str, Any]]]]) -> List[Filter]:
+        """Parse filters, splitting strings joined with "and"."""
+        parsed = []
+        for spec in filters or []:
+            if isinstance(spec, str):
+                parts = re.split(r"\s+and\s+", spec, flags=re.IGNORECASE)
+                parsed.extend(self.parse_filter(part) for part in parts if part.strip())
+            else:
+                parsed.append(self.parse_filter(spec))
+        return parsed
+
+    def screen(
+        self,
+        filters: Optional[List[Union[str, Dict[str, Any]]]] = None,
+        sort_by: Optional[str] = None,
+        descending: bool = False,
+        limit: Optional[int] = 50,
+        fields: Optional[List[str]] = None,
+        tickers: Optional[List[str]] = None,
+        as_of: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Screen each ticker's latest report.
+
+        Args:
+            filters: Comparisons that must all hold
+            sort_by: Metric to order results by (missing values last)
+            descending: Sort from highest to lowest
+            limit: Maximum number of results (None for all)
+            fields: Extra metrics to include in each result
+            tickers: Restrict the universe to these tickers
+            as_of: Use the latest report on or before this date (YYYY-MM-DD)
+
+        Returns:
+            Dictionary with "count" (tickers passing), "results" (ticker, date and the
+            filtered/sorted/requested metrics), "metrics" and "elapsed_ms"
+
+        Raises:
+            ValueError: If a filter or metric name is invalid
+        """
+        started = time.perf_counter()
+        parsed = self.parse_filters(filters)
+        sort_metric = self.resolve_metric(sort_by) if sort_by else None
+
+        columns: List[str] = []
+        for metric in [f[0] for f in parsed] + ([sort_metric] if sort_metric else []) + \
+                [self.resolve_metric(f) for f in fields or []]:
+            if metric not in columns:
+                columns.append(metric)
+
+        data = self.metrics_store.latest(columns, tickers=tickers, as_of=as_of)
+        mask = np.ones(len(data["ticker"]), dtype=bool)
+        with np.errstate(invalid="ignore"):
+            for metric, op, value in parsed:
+                values = data[metric]
+                if op == "<":
+                    mask &= values < value
+                elif op == "<=":
+                    mask &= values <= value
+                elif op == ">":
+                    mask &= values > value
+                elif op == ">=":
+                    mask &= values >= value
+                elif op == "==":
+                    mask &= values == value
+                else:
+                    mask &= (values != value) & ~np.isnan(values)
+
+        index = np.flatnonzero(mask)
+        if sort_metric:
+            keys = data[sort_metric][index]
+            keys = -keys if descending else keys
+            # NaN sorts last either way
+            index = index[np.argsort(keys, kind="stable")]
+
+        count = len(index)
+        if limit is not None:
+            index = index[:limit]
+
+        results = []
+        for i in index:
+            row = {"ticker": str(data["ticker"][i]), "date": str(data["date"][i])}
+            for metric in columns:
+                value = data[metric][i]
+                row[metric] = None if np.isnan(value) else float(value)
+            results.append(row)
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        logger.debug(f"Screen matched {count} of {len(mask)} tickers in {elapsed_ms:.1f} ms")
+        return {
+            "count": count,
+            "results": results,
+            "metrics": columns,
+            "elapsed_ms": round(elapsed_ms, 3),
+        }
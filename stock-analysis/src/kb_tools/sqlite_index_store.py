@@ -0,0 +1,432 @@
+"""SQLite Index Store - Graph index nodes in one SQLite database with full-text search"""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Tuple
+
+from .bm25 import query_tokens
+from .graph_adjacency import node_edges
+from .index_graph import SQLITE_DATABASE, node_date, node_text
+from .inverted_index import tokenize
+from .report_writer import fsync_enabled
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS nodes (
+    path TEXT PRIMARY KEY,
+    directory TEXT NOT NULL,
+    node_id TEXT,
+    node_type TEXT,
+    ticker TEXT,
+    node_date TEXT,
+    version INTEGER NOT NULL,
+    body TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS nodes_directory ON nodes (directory);
+CREATE INDEX IF NOT EXISTS nodes_node_id ON nodes (node_id);
+CREATE INDEX IF NOT EXISTS nodes_type_ticker ON nodes (node_type, ticker);
+CREATE INDEX IF NOT EXISTS nodes_date ON nodes (node_date);
+CREATE TABLE IF NOT EXISTS edges (
+    path TEXT NOT NULL,
+    source TEXT NOT NULL,
+    edge_type TEXT NOT NULL,
+    target TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS edges_path ON edges (path);
+CREATE INDEX IF NOT EXISTS edges_source ON edges (source);
+CREATE INDEX IF NOT EXISTS edges_target ON edges (target);
+"""
+
+# PRAGMA user_version of a database whose edges table is complete
+# (2: stock nodes also link to the week nodes of their reports)
+SCHEMA_VERSION = 2
+
+# Node ids per IN (...) query, below SQLite's bound-parameter limit
+QUERY_CHUNK = 500
+
+FTS_SCHEMA = "CREATE VIRTUAL TABLE IF NOT EXISTS nodes_fts USING fts5(path UNINDEXED, text)"
+
+
+def _directory(relative_path: str) -> str:
+    return relative_path.rsplit("/", 1)[0] if "/" in relative_path else ""
+
+
+class SQLiteIndexStore:
+    """
+    Graph index nodes stored in ``_indexes/nodes.db`` instead of one JSON file each.
+
+    Each node is a row keyed by its usual relative path ("stocks/AAPL.json"), with
+    the node as a JSON column and its directory, node_id, node_type, ticker and date
+    (``date_range`` or ``latest_report_date``) in indexed columns; an FTS5 table over
+    the node text (summary, topic, ticker, company name, tokenized like the BM25
+    index) serves keyword search, and an edges table holds the links of every node
+    (see ``graph_adjacency.node_edges``) for traversal. The database runs in WAL
+    mode, so readers in other processes are not blocked by a writer.
+
+    The store has the same interface as IndexGraph. Parsed nodes are cached and the
+    cache is dropped when another connection commits (``PRAGMA data_version``).
+    ``batch()`` groups writes into one transaction; writes outside a batch commit
+    immediately. A batch holds the store lock until it commits, so it belongs to one
+    thread and other threads' writes wait for it instead of joining its transaction.
+    Writers that read, modify and put shared nodes hold ``update_lock`` around the
+    whole change, as with IndexGraph.
+    """
+
+    def __init__(self, indexes_dir: Path, fsync: Optional[bool] = None):
+        """
+        Initialize SQLite Index Store.
+
+        Args:
+            indexes_dir: The knowledge base's ``_indexes`` directory
+            fsync: Sync every commit to disk (defaults to KB_WRITE_FSYNC); otherwise
+                commits are only synced at WAL checkpoints
+        """
+        self.indexes_dir = Path(indexes_dir)
+        self.indexes_dir.mkdir(parents=True, exist_ok=True)
+        self.db_path = self.indexes_dir / SQLITE_DATABASE
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(str(self.db_path), isolation_level=None, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        sync = fsync_enabled() if fsync is None else fsync
+        self._conn.execute(f"PRAGMA synchronous={'FULL' if sync else 'NORMAL'}")
+        self._conn.executescript(SCHEMA)
+        try:
+            self._conn.execute(FTS_SCHEMA)
+            self.fts = True
+        except sqlite3.OperationalError:
+            logger.warning("SQLite was built without FTS5; index search will scan nodes")
+            self.fts = False
+
+        self._cache: Dict[str, Tuple[int, Dict[str, Any]]] = {}
+        self._data_version: Optional[int] = None
+        self._batch_depth = 0
+        self._pending = 0
+
+        # Serializes read-modify-write of nodes across the threads of this process
+        self.update_lock = threading.RLock()
+        self._last_version = 0
+        self.flushes = 0
+        self._upgrade()
+
+    def _upgrade(self) -> None:
+        """Refill the edges table of a database written by an older edge extraction."""
+        if self._conn.execute("PRAGMA user_version").fetchone()[0] >= SCHEMA_VERSION:
+            return
+        with self._lock, self._write():
+            self._conn.execute("DELETE FROM edges")
+            for path, body in self._conn.execute("SELECT path, body FROM nodes").fetchall():
+                self._insert_edges(path, json.loads(body))
+            self._conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+
+    def _insert_edges(self, relative_path: str, node: Dict[str, Any]) -> None:
+        node_id = node.get("node_id")
+        if node_id:
+            self._conn.executemany(
+                "INSERT INTO edges (path, source, edge_type, target) VALUES (?, ?, ?, ?)",
+                [(relative_path, node_id, edge_type, target) for edge_type, target in node_edges(node)]
+            )
+
+    def _check_external(self) -> None:
+        """Drop cached nodes if another connection committed since the last check (caller holds the lock)."""
+        data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        if data_version != self._data_version:
+            self._cache.clear()
+            self._data_version = data_version
+
+    def _parse(self, relative_path: str, version: int, body: str) -> Dict[str, Any]:
+        cached = self._cache.get(relative_path)
+        if cached and cached[0] == version:
+            return cached[1]
+        node = json.loads(body)
+        self._cache[relative_path] = (version, node)
+        return node
+
+    def get(self, relative_path: str) -> Optional[Dict[str, Any]]:
+        """
+        Return a node by its path relative to ``_indexes/`` (e.g. "stocks/AAPL.json").
+
+        Args:
+            relative_path: Node path
+
+        Returns:
+            Shared, read-only node or None if it does not exist
+        """
+        with self._lock:
+            self._check_external()
+            row = self._conn.execute("SELECT version FROM nodes WHERE path = ?", (relative_path,)).fetchone()
+            if row is None:
+                return None
+            cached = self._cache.get(relative_path)
+            if cached and cached[0] == row[0]:
+                return cached[1]
+            version, body = self._conn.execute(
+                "SELECT version, body FROM nodes WHERE path = ?", (relative_path,)
+            ).fetchone()
+            return self._parse(relative_path, version, body)
+
+    def entries(self, directory: Optional[str] = None) -> Dict[str, Tuple[int, Dict[str, Any]]]:
+        """
+        Return nodes with their versions.
+
+        Args:
+            directory: Only nodes in this directory ("stocks", "topics", "dates"),
+                or "" for the root node; None returns every node
+
+        Returns:
+            Dictionary of relative path to (version, shared read-only node)
+        """
+        with self._lock:
+            self._check_external()
+            if directory is None:
+                rows = self._conn.execute("SELECT path, version, body FROM nodes")
+            else:
+                rows = self._conn.execute("SELECT path, version, body FROM nodes WHERE directory = ?", (directory,))
+            return {path: (version, self._parse(path, version, body)) for path, version, body in rows}
+
+    def nodes(self, directory: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        """Return nodes by relative path (see ``entries``)."""
+        return {path: node for path, (_, node) in self.entries(directory).items()}
+
+    def paths(self, directory: Optional[str] = None) -> List[str]:
+        """Return the relative paths of stored nodes, sorted."""
+        with self._lock:
+            if directory is None:
+                rows = self._conn.execute("SELECT path FROM nodes ORDER BY path")
+            else:
+                rows = self._conn.execute("SELECT path FROM nodes WHERE directory = ? ORDER BY path", (directory,))
+            return [path for (path,) in rows]
+
+    def query(
+        self,
+        node_type: Optional[str] = None,
+        ticker: Optional[str] = None,
+        start: Optional[str] = None,
+        end: Optional[str] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Return nodes matching indexed column filters.
+
+        Args:
+            node_type: Node type (root, stock, topic, date)
+            ticker: Normalized ticker
+            start: Earliest node date (YYYY-MM or YYYY-MM-DD, compared as text)
+            end: Latest node date (inclusive prefix, e.g. "2026-01" includes 2026-01-31)
+
+        Returns:
+            Dictionary of relative path to shared, read-only node
+        """
+        clauses, params = [], []
+        for column, value in (("node_type", node_type), ("ticker", ticker)):
+            if value:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if start:
+            clauses.append("node_date >= ?")
+            params.append(start)
+        if end:
+            clauses.append("node_date <= ?")
+            params.append(end + "\uffff")
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            self._check_external()
+            rows = self._conn.execute(f"SELECT path, version, body FROM nodes{where} ORDER BY path", params)
+            return {path: self._parse(path, version, body) for path, version, body in rows}
+
+    def adjacent(self, node_ids: List[str]) -> Dict[str, List[Tuple[str, str, str]]]:
+        """
+        Return the edges touching nodes, from the indexed edges table.
+
+        Args:
+            node_ids: Node identifiers
+
+        Returns:
+            Dictionary of node_id to (edge type, other node_id, "out" or "in") tuples
+        """
+        result: Dict[str, List[Tuple[str, str, str]]] = {node_id: [] for node_id in node_ids}
+        with self._lock:
+            for start in range(0, len(node_ids), QUERY_CHUNK):
+                chunk = node_ids[start:start + QUERY_CHUNK]
+                marks = ",".join("?" * len(chunk))
+                for source, edge_type, target in self._conn.execute(
+                    f"SELECT source, edge_type, target FROM edges WHERE source IN ({marks}) ORDER BY rowid", chunk
+                ):
+                    result[source].append((edge_type, target, "out"))
+                for source, edge_type, target in self._conn.execute(
+                    f"SELECT source, edge_type, target FROM edges WHERE target IN ({marks}) ORDER BY rowid", chunk
+                ):
+                    result[target].append((edge_type, source, "in"))
+        return result
+
+    def search_text(
+        self,
+        query_text: str,
+        directory: Optional[str] = None,
+        limit: int = 10
+    ) -> List[Tuple[str, float, Dict[str, Any]]]:
+        """
+        Rank nodes against a keyword query with FTS5's BM25.
+
+        Args:
+            query_text: Search query (any token may match)
+            directory: Optional directory to restrict results to
+            limit: Maximum number of results
+
+        Returns:
+            (relative path, score, node) tuples, best first (higher scores are better)
+        """
+        tokens = query_tokens([query_text])
+        if not tokens or not self.fts:
+            return []
+        # Prefix queries, like the in-memory BM25 which expands each token to the terms it starts
+        match = " OR ".join(f'"{token}"*' for token in tokens)
+        sql = (
+            "SELECT n.path, n.version, n.body, bm25(nodes_fts) AS rank FROM nodes_fts "
+            "JOIN nodes n ON n.path = nodes_fts.path WHERE nodes_fts MATCH ?"
+        )
+        params: List[Any] = [match]
+        if directory is not None:
+            sql += " AND n.directory = ?"
+            params.append(directory)
+        sql += " ORDER BY rank LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            self._check_external()
+            return [
+                (path, -rank, self._parse(path, version, body))
+                for path, version, body, rank in self._conn.execute(sql, params)
+            ]
+
+    def put(self, relative_path: str, node: Dict[str, Any], indent: Optional[int] = 2) -> Dict[str, Any]:
+        """
+        Insert or replace a node.
+
+        Args:
+            relative_path: Node path relative to the indexes directory
+            node: JSON-serializable node
+            indent: Ignored (nodes are stored compactly)
+
+        Returns:
+            The stored (read-only) node
+
+        Raises:
+            TypeError: If the node is not JSON-serializable
+            sqlite3.Error: If the database cannot be written
+        """
+        body = json.dumps(node, ensure_ascii=False, separators=(",", ":"))
+        resident = json.loads(body)
+        with self._lock, self._write():
+            version = max(time.time_ns(), self._last_version + 1)
+            self._last_version = version
+            self._conn.execute(
+                "INSERT OR REPLACE INTO nodes (path, directory, node_id, node_type, ticker, node_date, version, body) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (relative_path, _directory(relative_path), resident.get("node_id"), resident.get("node_type"),
+                 resident.get("ticker"), node_date(resident), version, body)
+            )
+            if self.fts:
+                self._conn.execute("DELETE FROM nodes_fts WHERE path = ?", (relative_path,))
+                self._conn.execute(
+                    "INSERT INTO nodes_fts (path, text) VALUES (?, ?)",
+                    (relative_path, " ".join(tokenize(node_text(resident))))
+                )
+            self._conn.execute("DELETE FROM edges WHERE path = ?", (relative_path,))
+            self._insert_edges(relative_path, resident)
+            self._cache[relative_path] = (version, resident)
+            self._pending += 1
+        return resident
+
+    def remove(self, relative_path: str) -> bool:
+        """
+        Delete a node.
+
+        Args:
+            relative_path: Node path relative to the indexes directory
+
+        Returns:
+            True if a node was removed
+        """
+        with self._lock, self._write():
+            removed = self._conn.execute("DELETE FROM nodes WHERE path = ?", (relative_path,)).rowcount > 0
+            if self.fts:
+                self._conn.execute("DELETE FROM nodes_fts WHERE path = ?", (relative_path,))
+            self._conn.execute("DELETE FROM edges WHERE path = ?", (relative_path,))
+            self._cache.pop(relative_path, None)
+            self._pending += removed
+            return removed
+
+    @contextmanager
+    def _write(self):
+        """Run statements in the open batch transaction, or in their own (caller holds the lock)."""
+        if self._batch_depth:
+            yield
+            return
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+        self._pending = 0
+
+    @contextmanager
+    def batch(self):
+        """
+        Group writes into one transaction, committed when the outermost ``batch`` exits.
+
+        Other threads' writes wait for the batch (the store lock is held throughout).
+        """
+        with self._lock:
+            if self._batch_depth == 0:
+                self._conn.execute("BEGIN IMMEDIATE")
+            self._batch_depth += 1
+            try:
+                yield self
+            finally:
+                self._batch_depth -= 1
+                if self._batch_depth == 0:
+                    self._commit()
+
+    def _commit(self) -> None:
+        if self._conn.in_transaction:
+            self._conn.execute("COMMIT")
+            self.flushes += 1
+        self._pending = 0
+
+    def pending(self) -> int:
+        """Return the number of writes not committed yet (inside a batch)."""
+        with self._lock:
+            return self._pending
+
+    def flush(self) -> int:
+        """
+        Commit the writes of an open batch now (the batch continues in a new transaction).
+
+        Returns:
+            Number of node writes committed
+        """
+        with self._lock:
+            pending = self._pending
+            if self._batch_depth:
+                self._commit()
+                self._conn.execute("BEGIN IMMEDIATE")
+            return pending
+
+    def refresh(self) -> int:
+        """Drop every cached node so the next reads come from the database."""
+        with self._lock:
+            dropped = len(self._cache)
+            self._cache.clear()
+            return dropped
+
+    def close(self) -> None:
+        """Commit pending writes and close the database."""
+        with self._lock:
+            self._commit()
+            self._conn.close()
@@ -0,0 +1,310 @@
+"""Topic Index - Sector, risk and catalyst topic nodes in _indexes/topics/, maintained on ingest"""
+
+import logging
+import re
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Iterable, Tuple
+
+from .index_graph import ROOT_NODE, get_index_graph
+
+logger = logging.getLogger(__name__)
+
+SECTOR_KIND = "sector"
+RISK_KIND = "risk"
+CATALYST_KIND = "catalyst"
+
+# Sector of a report, from the first keyword found in its industry description
+SECTOR_KEYWORDS = {
+    "Technology": ("technology", "software", "semiconductor", "hardware", "cloud", "internet", "chip"),
+    "Communication Services": ("media", "telecom", "advertising", "entertainment", "social network"),
+    "Consumer": ("retail", "consumer", "e-commerce", "apparel", "restaurant", "automotive", "automaker"),
+    "Energy": ("energy", "oil", "gas", "renewable"),
+    "Financials": ("bank", "lending", "insurance", "financial", "asset management", "payments"),
+    "Healthcare": ("biotech", "pharma", "healthcare", "medical", "health care"),
+    "Industrials": ("industrial", "aerospace", "defense", "machinery", "logistics", "transportation"),
+    "Real Estate": ("real estate", "reit"),
+    "Utilities": ("utility", "utilities"),
+    "Materials": ("chemical", "mining", "materials", "steel"),
+}
+
+# Catalyst themes, matched in each catalyst's name and description
+CATALYST_THEMES = {
+    "AI": ("ai", "artificial intelligence", "machine learning", "generative"),
+    "Cloud": ("cloud",),
+    "Product Launch": ("launch", "new product", "product cycle", "release"),
+    "Earnings": ("earnings", "guidance", "quarterly results"),
+    "Mergers and Acquisitions": ("acquisition", "merger", "acquire", "divestiture", "spin-off"),
+    "Capital Return": ("buyback", "repurchase", "dividend"),
+    "Regulation": ("regulatory", "regulation", "approval", "antitrust", "fda"),
+    "Pricing": ("pricing", "price increase"),
+}
+
+# Characters of the excerpt kept per stock
+EXCERPT_CHARS = 150
+
+
+def topic_slug(topic_name: str) -> str:
+    """Return the file stem / node id suffix of a topic ("Regulatory Risk" -> "regulatory_risk")."""
+    return re.sub(r"[^a-z0-9]+", "_", topic_name.lower()).strip("_")
+
+
+def _keyword_pattern(keywords: Iterable[str]) -> re.Pattern:
+    # Short keywords ("ai", "oil") must be whole words; longer ones may be word prefixes ("pharma")
+    parts = [re.escape(k) + (r"\b" if len(k) <= 3 else "") for k in keywords]
+    return re.compile(r"\b(?:" + "|".join(parts) + ")", re.IGNORECASE)
+
+
+SECTOR_PATTERNS = {name: _keyword_pattern(keywords) for name, keywords in SECTOR_KEYWORDS.items()}
+THEME_PATTERNS = {name: _keyword_pattern(keywords) for name, keywords in CATALYST_THEMES.items()}
+
+
+def _excerpt(*parts: Any) -> str:
+    return ": ".join(str(p) for p in parts if p)[:EXCERPT_CHARS]
+
+
+def report_topics(report: Dict[str, Any]) -> List[Tuple[str, str, str]]:
+    """
+    Extract the topics of a report.
+
+    The sector comes from ``industry_and_competition.industry_description``, one
+    "<Category> Risk" topic from each risk category, and catalyst themes from the
+    catalysts' names and descriptions.
+
+    Args:
+        report: Report dictionary
+
+    Returns:
+        (topic name, kind, excerpt) tuples, one per topic
+    """
+    analysis = report.get("analysis", {})
+    if not isinstance(analysis, dict):
+        return []
+    topics: Dict[str, Tuple[str, str, str]] = {}
+
+    industry = analysis.get("industry_and_competition") or {}
+    description = str(industry.get("industry_description", "")) if isinstance(industry, dict) else ""
+    positions = [(m.start(), name) for name, pattern in SECTOR_PATTERNS.items() for m in [pattern.search(description)] if m]
+    if positions:
+        sector = min(positions)[1]
+        topics[sector] = (sector, SECTOR_KIND, _excerpt(description))
+
+    for risk in analysis.get("risks") or []:
+        if isinstance(risk, dict) and risk.get("category"):
+            name = f"{str(risk['category']).strip().title()} Risk"
+            topics.setdefault(name, (name, RISK_KIND, _excerpt(risk.get("name"), risk.get("description"))))
+
+    for catalyst in analysis.get("catalysts") or []:
+        if not isinstance(catalyst, dict):
+            continue
+        text = f"{catalyst.get('name', '')} {catalyst.get('description', '')}"
+        for theme, pattern in THEME_PATTERNS.items():
+            if pattern.search(text):
+                topics.setdefault(theme, (theme, CATALYST_KIND, _excerpt(catalyst.get("name"), catalyst.get("description"))))
+
+    return list(topics.values())
+
+
+class TopicIndex:
+    """
+    Topic nodes (``_indexes/topics/{slug}.json``) built from report content on ingest.
+
+    Every saved report is assigned its sector, risk categories and catalyst themes
+    (``report_topics``), and each topic node lists the stocks covering it with the
+    dates of the matching reports and an excerpt of the latest one, so "which stocks
+    have regulatory risk" or "AI catalysts" is one node read::
+
+        {"node_id": "topic_regulatory_risk", "node_type": "topic",
+         "topic_name": "Regulatory Risk", "topic_kind": "risk",
+         "stocks": [{"ticker": "AAPL", "latest_report_date": "2026-01-11",
+                     "file_path": "AAPL/2026/AAPL_2026-01-11.json",
+                     "excerpt": "...", "report_dates": ["2026-01-11", ...]}],
+         "stock_count": 8, "report_count": 12, "latest_report_date": "2026-01-11"}
+
+    Topic nodes created by hand (without ``topic_kind``) are left alone. The root
+    node's ``topics`` list is kept in sync with the generated topics.
+    """
+
+    def __init__(self, knowledge_base_dir: Path):
+        """
+        Initialize Topic Index.
+
+        Args:
+            knowledge_base_dir: Root directory of the knowledge base
+        """
+        self.kb_dir = Path(knowledge_base_dir)
+        self.graph = get_index_graph(self.kb_dir / "_indexes")
+
+    @staticmethod
+    def _relative_path(topic_name: str) -> str:
+        return f"topics/{topic_slug(topic_name)}.json"
+
+    def _generated_nodes(self) -> Dict[str, Dict[str, Any]]:
+        return {p: n for p, n in self.graph.nodes("topics").items() if n.get("topic_kind")}
+
+    def exists(self) -> bool:
+        """Return True if any generated topic node has been written."""
+        return bool(self._generated_nodes())
+
+    def list_topics(self, kind: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        List generated topics, most covered first.
+
+        Args:
+            kind: Optional topic kind (sector, risk, catalyst)
+
+        Returns:
+            Dicts with topic_name, node_id, topic_kind, stock_count and report_count
+        """
+        topics = [
+            {key: node.get(key) for key in ("topic_name", "node_id", "topic_kind", "stock_count", "report_count")}
+            for node in self._generated_nodes().values()
+            if kind is None or node.get("topic_kind") == kind
+        ]
+        return sorted(topics, key=lambda t: (-(t["stock_count"] or 0), t["topic_name"]))
+
+    def load_node(self, topic_name: str) -> Optional[Dict[str, Any]]:
+        """Load a topic node by name (read-only, shared with the resident index graph)."""
+        return self.graph.get(self._relative_path(topic_name))
+
+    def add_reports(self, items: Iterable[Tuple[Dict[str, Any], Dict[str, Any]]], reset: bool = False) -> int:
+        """
+        Add reports to their topic nodes, rewriting each touched node once.
+
+        A report saved again is first removed from topics it no longer has.
+
+        Args:
+            items: (entry, report) pairs, where entry has ticker, date and file_path
+            reset: Discard all generated topic nodes first (used by rebuild)
+
+        Returns:
+            Number of reports indexed
+        """
+        return self.add_topics(((entry, report_topics(report)) for entry, report in items), reset=reset)
+
+    def add_topics(self, items: Iterable[Tuple[Dict[str, Any], List[Tuple[str, str, str]]]], reset: bool = False) -> int:
+        """
+        Add reports whose topics were already extracted (e.g. by rebuild workers).
+
+        Args:
+            items: (entry, topics) pairs, with topics as returned by ``report_topics``
+            reset: Discard all generated topic nodes first
+
+        Returns:
+            Number of reports indexed
+        """
+        by_topic: Dict[str, Dict[str, Any]] = {}
+        saved: Dict[str, set] = {}
+        count = 0
+        for entry, topics in items:
+            saved.setdefault(entry["ticker"], set()).add(entry["date"])
+            for topic_name, kind, excerpt in topics:
+                topic = by_topic.setdefault(topic_name, {"kind": kind, "reports": []})
+                topic["reports"].append((entry, excerpt))
+            count += 1
+
+        with self.graph.update_lock, self.graph.batch():
+            existing = self._generated_nodes()
+            if reset:
+                for relative_path in existing:
+                    if relative_path not in {self._relative_path(t) for t in by_topic}:
+                        self.graph.remove(relative_path)
+                existing = {}
+
+            # Reports saved again may have lost topics they used to have
+            touched = {self._relative_path(t) for t in by_topic}
+            for relative_path, node in existing.items():
+                if relative_path not in touched and self._mentions(node, saved):
+                    self._save_node(node.get("topic_name"), node.get("topic_kind"), node, [], saved)
+
+            for topic_name, topic in by_topic.items():
+                node = existing.get(self._relative_path(topic_name)) or {}
+                self._save_node(topic_name, topic["kind"], node, topic["reports"], saved)
+
+            self._update_root()
+        return count
+
+    @staticmethod
+    def _mentions(node: Dict[str, Any], saved: Dict[str, set]) -> bool:
+        return any(
+            saved.get(stock.get("ticker"), set()).intersection(stock.get("report_dates", []))
+            for stock in node.get("stocks", [])
+        )
+
+    def _save_node(
+        self,
+        topic_name: str,
+        kind: str,
+        node: Dict[str, Any],
+        reports: List[Tuple[Dict[str, Any], str]],
+        saved: Dict[str, set]
+    ) -> None:
+        stocks = {}
+        for stock in node.get("stocks", []):
+            dates = [d for d in stock.get("report_dates", []) if d not in saved.get(stock["ticker"], ())]
+            if dates:
+                stocks[stock["ticker"]] = dict(stock, report_dates=dates)
+        for entry, excerpt in reports:
+            stock = stocks.setdefault(entry["ticker"], {"ticker": entry["ticker"], "report_dates": []})
+            stock["report_dates"] = sorted(set(stock["report_dates"]) | {entry["date"]})
+            if entry["date"] >= stock.get("latest_report_date", ""):
+                stock.update(latest_report_date=entry["date"], file_path=entry["file_path"], excerpt=excerpt)
+        for ticker, stock in list(stocks.items()):
+            if stock.get("latest_report_date") not in stock["report_dates"]:
+                # The latest report lost this topic; point at the newest one that still has it
+                stock.update(latest_report_date=stock["report_dates"][-1], file_path=None, excerpt="")
+
+        relative_path = self._relative_path(topic_name)
+        if not stocks:
+            self.graph.remove(relative_path)
+            return
+
+        ordered = sorted(stocks.values(), key=lambda s: (s["latest_report_date"], s["ticker"]), reverse=True)
+        report_count = sum(len(s["report_dates"]) for s in ordered)
+        latest = ordered[0]["latest_report_date"]
+        listed = ", ".join(s["ticker"] for s in ordered[:10]) + (", ..." if len(ordered) > 10 else "")
+        label = {SECTOR_KIND: "Sector", RISK_KIND: "Risk theme", CATALYST_KIND: "Catalyst theme"}.get(kind, "Topic")
+
+        node = dict(node)
+        node.update({
+            "node_id": f"topic_{topic_slug(topic_name)}",
+            "node_type": "topic",
+            "topic_name": topic_name,
+            "topic_kind": kind,
+            "summary": f"{label} {topic_name}: {len(ordered)} stocks, {report_count} reports, "
+                       f"latest {latest}. Stocks: {listed}",
+            "stocks": ordered,
+            "stock_count": len(ordered),
+            "report_count": report_count,
+            "latest_report_date": latest,
+            "last_updated": datetime.now().isoformat(),
+        })
+        self.graph.put(relative_path, node)
+
+    def _update_root(self) -> None:
+        """List the generated topics in the root node, keeping topics added by hand."""
+        root = self.graph.get(ROOT_NODE)
+        if root is None:
+            return
+        generated = self._generated_nodes()
+        generated_ids = {node["node_id"] for node in generated.values()}
+        kept = []
+        for topic in root.get("topics", []):
+            if isinstance(topic, dict):
+                if topic.get("topic_kind") or topic.get("topic_index_id") in generated_ids:
+                    continue
+            elif topic in generated_ids:
+                continue
+            kept.append(topic)
+        listed = [
+            {
+                "topic_name": node["topic_name"],
+                "topic_index_id": node["node_id"],
+                "topic_kind": node["topic_kind"],
+                "stock_count": node["stock_count"],
+            }
+            for node in sorted(generated.values(), key=lambda n: (-n["stock_count"], n["topic_name"]))
+        ]
+        topics = kept + listed
+        if topics != root.get("topics"):
+            self.graph.put(ROOT_NODE, dict(root, topics=topics, last_updated=datetime.now().isoformat()))
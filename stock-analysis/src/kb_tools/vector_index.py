@@ -0,0 +1,581 @@
+"""Vector Index - Embeddings of index nodes and report sections for semantic search"""
+
+import json
+import logging
+import math
+import os
+import shutil
+import threading
+import zlib
+from collections import Counter
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Iterable, Tuple
+
+from .fs_utils import atomic_write_json
+from .inverted_index import doc_key_for, report_sections, tokenize
+
+logger = logging.getLogger(__name__)
+
+# Optional dependency for the vector matrix
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+# Optional local embedding model (KB_EMBEDDING_MODEL)
+try:
+    from sentence_transformers import SentenceTransformer
+    SENTENCE_TRANSFORMERS_AVAILABLE = True
+except ImportError:
+    SENTENCE_TRANSFORMERS_AVAILABLE = False
+
+HASHING_MODEL = "hashing"
+DEFAULT_HASHING_DIM = 512
+EMBED_BATCH_SIZE = 256
+
+# Text beyond this is not embedded (local models truncate far earlier anyway)
+MAX_TEXT_CHARS = 8000
+
+NODE_KIND = "node"
+SECTION_KIND = "section"
+
+# Sections of report_sections() that are metadata rather than content
+SKIPPED_SECTIONS = ("report",)
+
+
+def _require_numpy() -> None:
+    if not NUMPY_AVAILABLE:
+        raise ImportError("The vector index requires 'numpy'. Please install: pip install numpy")
+
+
+class HashingEmbedder:
+    """
+    Dependency-free text embedding: signed feature hashing of words and word pairs.
+
+    Each token and each pair of adjacent tokens is hashed (CRC-32, stable across
+    processes) into one of ``dim`` buckets with a hash-derived sign, weighted by
+    ``1 + log(tf)``, and the vector is L2-normalized. Texts sharing vocabulary get a
+    high cosine similarity; unlike a trained model, synonyms do not.
+    """
+
+    def __init__(self, dim: int = DEFAULT_HASHING_DIM):
+        """
+        Initialize Hashing Embedder.
+
+        Args:
+            dim: Number of hash buckets (vector dimension)
+        """
+        _require_numpy()
+        self.dim = dim
+        self.name = f"{HASHING_MODEL}-{dim}"
+
+    def embed(self, texts: List[str]) -> "np.ndarray":
+        """
+        Embed texts.
+
+        Args:
+            texts: Texts to embed
+
+        Returns:
+            float32 matrix of shape (len(texts), dim) with unit-length rows (zero rows for empty texts)
+        """
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            tokens = tokenize(text[:MAX_TEXT_CHARS])
+            features = Counter(tokens)
+            features.update(f"{a} {b}" for a, b in zip(tokens, tokens[1:]))
+            for feature, count in features.items():
+                digest = zlib.crc32(feature.encode("utf-8"))
+                sign = 1.0 if digest & 0x80000000 else -1.0
+                matrix[row, digest % self.dim] += sign * (1.0 + math.log(count))
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        np.divide(matrix, norms, out=matrix, where=norms > 0)
+        return matrix
+
+
+class LocalModelEmbedder:
+    """Embedding with a local sentence-transformers model on the CPU."""
+
+    def __init__(self, model_name: str):
+        """
+        Initialize Local Model Embedder.
+
+        Args:
+            model_name: sentence-transformers model name or local path
+
+        Raises:
+            ImportError: If sentence-transformers is not installed
+        """
+        _require_numpy()
+        if not SENTENCE_TRANSFORMERS_AVAILABLE:
+            raise ImportError(
+                "Local embedding models require 'sentence-transformers'. "
+                "Please install: pip install sentence-transformers"
+            )
+        self.model = SentenceTransformer(model_name, device="cpu")
+        self.dim = self.model.get_sentence_embedding_dimension()
+        self.name = model_name
+
+    def embed(self, texts: List[str]) -> "np.ndarray":
+        """Embed texts as unit-length float32 rows."""
+        vectors = self.model.encode(
+            [text[:MAX_TEXT_CHARS] for text in texts],
+            batch_size=32,
+            normalize_embeddings=True,
+            show_progress_bar=False
+        )
+        return np.asarray(vectors, dtype=np.float32).reshape(len(texts), self.dim)
+
+
+_embedder = None
+_embedder_lock = threading.Lock()
+
+
+def get_embedder():
+    """
+    Return the process-wide embedder.
+
+    KB_EMBEDDING_MODEL selects a local sentence-transformers model; unset (or
+    "hashing") uses the hashing vectorizer with KB_EMBEDDING_DIM buckets (default 512).
+    If the configured model cannot be loaded, the hashing vectorizer is used instead.
+    """
+    global _embedder
+    with _embedder_lock:
+        if _embedder is None:
+            model_name = os.getenv("KB_EMBEDDING_MODEL", HASHING_MODEL)
+            if model_name != HASHING_MODEL:
+                try:
+                    _embedder = LocalModelEmbedder(model_name)
+                except Exception as e:
+                    logger.warning(f"Cannot load embedding model {model_name!r} ({e}), using hashing vectorizer")
+            if _embedder is None:
+                configured = os.getenv("KB_EMBEDDING_DIM", "")
+                dim = int(configured) if configured.isdigit() and int(configured) > 0 else DEFAULT_HASHING_DIM
+                _embedder = HashingEmbedder(dim)
+        return _embedder
+
+
+def section_records(ticker: str, date: str, file_path: str, report: Dict[str, Any]) -> List[Tuple[Dict[str, Any], str]]:
+    """
+    Build the vector index records of a report, one per analysis section.
+
+    Args:
+        ticker: Normalized ticker
+        date: Analysis date
+        file_path: Report path relative to the knowledge base root
+        report: Report dictionary
+
+    Returns:
+        List of (record, text) pairs
+    """
+    doc_key = doc_key_for(ticker, date)
+    return [
+        ({"key": f"{SECTION_KIND}:{doc_key}#{name}", "kind": SECTION_KIND, "ticker": ticker,
+          "date": date, "section": name, "file_path": file_path}, text)
+        for name, text in report_sections(report).items()
+        if name not in SKIPPED_SECTIONS
+    ]
+
+
+class VectorIndex:
+    """
+    Embedding matrix of index nodes and report sections under ``_indexes/vectors/``.
+
+    Rows are appended, never rewritten in place::
+
+        vectors/meta.json      {"model": "hashing-512", "dim": 512, "rows": 1200, "keys_bytes": 98211}
+        vectors/vectors.f4     float32 row-major matrix, ``dim`` values per row
+        vectors/keys.jsonl     one record per row: key, kind and what the row points to
+
+    ``meta.json`` is written last, so rows past its count (from an interrupted append)
+    are ignored and truncated on the next write. A key appended again supersedes its
+    earlier rows, and a record with ``"deleted": true`` removes it; ``compact`` drops
+    the superseded rows. The matrix is kept in memory with spare capacity, so appends
+    do not copy it and a query is one matrix-vector product over the live rows.
+    """
+
+    META_FILE = "meta.json"
+    VECTORS_FILE = "vectors.f4"
+    KEYS_FILE = "keys.jsonl"
+    VERSION = 1
+
+    def __init__(self, knowledge_base_dir: Path, embedder=None):
+        """
+        Initialize Vector Index.
+
+        Args:
+            knowledge_base_dir: Root directory of the knowledge base
+            embedder: Embedder to use (defaults to get_embedder())
+
+        Raises:
+            ImportError: If numpy is not installed
+        """
+        _require_numpy()
+        self.kb_dir = Path(knowledge_base_dir)
+        self.vectors_dir = self.kb_dir / "_indexes" / "vectors"
+        self.embedder = embedder or get_embedder()
+        self._lock = threading.RLock()
+        self._version: Optional[int] = None
+        self._reset_memory()
+
+    def _reset_memory(self) -> None:
+        self._matrix = np.zeros((0, self.embedder.dim), dtype=np.float32)
+        self._live = np.zeros(0, dtype=bool)
+        self._is_section = np.zeros(0, dtype=bool)
+        self._rows = 0
+        self._records: List[Dict[str, Any]] = []
+        self._row_of: Dict[str, int] = {}
+        self._doc_sections: Dict[str, set] = {}
+
+    def exists(self) -> bool:
+        """Return True if the index has been built."""
+        return (self.vectors_dir / self.META_FILE).exists()
+
+    def ready(self) -> bool:
+        """Return True if every report's sections are indexed with the current embedder."""
+        return self.exists() and self.compatible() and self._load_meta().get("sections_built", False)
+
+    def compatible(self) -> bool:
+        """Return True if the stored vectors were made by the current embedder."""
+        meta = self._load_meta()
+        return meta.get("model") == self.embedder.name and meta.get("dim") == self.embedder.dim
+
+    def _load_meta(self) -> Dict[str, Any]:
+        meta_path = self.vectors_dir / self.META_FILE
+        if not meta_path.exists():
+            return {"version": self.VERSION, "model": self.embedder.name, "dim": self.embedder.dim,
+                    "rows": 0, "keys_bytes": 0}
+        with open(meta_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _meta_version(self) -> int:
+        meta_path = self.vectors_dir / self.META_FILE
+        return meta_path.stat().st_mtime_ns if meta_path.exists() else 0
+
+    def _ensure_loaded(self) -> None:
+        """(Re)load the matrix if meta.json changed since it was last read or written."""
+        version = self._meta_version()
+        if version == self._version:
+            return
+        self._reset_memory()
+        meta = self._load_meta()
+        compatible = meta.get("model") == self.embedder.name and meta.get("dim") == self.embedder.dim
+        rows = meta["rows"] if compatible else 0
+        if rows:
+            matrix = np.fromfile(self.vectors_dir / self.VECTORS_FILE, dtype="<f4", count=rows * self.embedder.dim)
+            with open(self.vectors_dir / self.KEYS_FILE, "rb") as f:
+                records = [json.loads(line) for line in f.read(meta["keys_bytes"]).splitlines()]
+            self._grow(rows)
+            self._matrix[:rows] = matrix.reshape(rows, self.embedder.dim)
+            for record in records:
+                self._track(record)
+        self._version = version
+
+    def _grow(self, rows: int) -> None:
+        """Make room for ``rows`` rows in total, doubling capacity."""
+        capacity = len(self._matrix)
+        if rows <= capacity:
+            return
+        capacity = max(rows, capacity * 2, 1024)
+        matrix = np.zeros((capacity, self.embedder.dim), dtype=np.float32)
+        matrix[:self._rows] = self._matrix[:self._rows]
+        live = np.zeros(capacity, dtype=bool)
+        live[:self._rows] = self._live[:self._rows]
+        is_section = np.zeros(capacity, dtype=bool)
+        is_section[:self._rows] = self._is_section[:self._rows]
+        self._matrix, self._live, self._is_section = matrix, live, is_section
+
+    def _track(self, record: Dict[str, Any]) -> None:
+        """Register an appended row in the in-memory lookup tables."""
+        row = self._rows
+        self._rows += 1
+        self._records.append(record)
+        key = record["key"]
+        previous = self._row_of.pop(key, None)
+        if previous is not None:
+            self._live[previous] = False
+        self._is_section[row] = record["kind"] == SECTION_KIND
+        doc = doc_key_for(record.get("ticker", ""), record.get("date", "")) if self._is_section[row] else None
+        if record.get("deleted"):
+            self._live[row] = False
+            if doc:
+                self._doc_sections.get(doc, set()).discard(key)
+            return
+        self._live[row] = True
+        self._row_of[key] = row
+        if doc:
+            self._doc_sections.setdefault(doc, set()).add(key)
+
+    def add(self, items: Iterable[Tuple[Dict[str, Any], Optional[str]]]) -> int:
+        """
+        Append rows, embedding texts in batches.
+
+        Args:
+            items: (record, text) pairs; a record needs "key" and "kind". A text of
+                None appends a deletion marker for the key.
+
+        Returns:
+            Number of rows appended
+        """
+        items = list(items)
+        if not items:
+            return 0
+
+        vectors = np.zeros((len(items), self.embedder.dim), dtype=np.float32)
+        texts = [(i, text) for i, (_, text) in enumerate(items) if text is not None]
+        for start in range(0, len(texts), EMBED_BATCH_SIZE):
+            batch = texts[start:start + EMBED_BATCH_SIZE]
+            vectors[[i for i, _ in batch]] = self.embedder.embed([text for _, text in batch])
+
+        with self._lock:
+            self._ensure_loaded()
+            self.vectors_dir.mkdir(parents=True, exist_ok=True)
+            meta = self._load_meta()
+            if meta.get("model") != self.embedder.name or meta.get("dim") != self.embedder.dim:
+                raise ValueError(
+                    f"Vector index was built with {meta.get('model')!r}; rebuild it for {self.embedder.name!r}"
+                )
+
+            records = []
+            for record, text in items:
+                record = dict(record)
+                if text is None:
+                    record["deleted"] = True
+                records.append(record)
+            lines = b"".join(json.dumps(r, ensure_ascii=False).encode("utf-8") + b"\n" for r in records)
+
+            # Discard bytes from an interrupted append, then append vectors and keys
+            rows = meta["rows"]
+            with open(self.vectors_dir / self.VECTORS_FILE, "ab") as f:
+                f.truncate(rows * self.embedder.dim * 4)
+                vectors.astype("<f4").tofile(f)
+            with open(self.vectors_dir / self.KEYS_FILE, "ab") as f:
+                f.truncate(meta["keys_bytes"])
+                f.write(lines)
+
+            meta.update({
+                "version": self.VERSION,
+                "model": self.embedder.name,
+                "dim": self.embedder.dim,
+                "rows": rows + len(records),
+                "keys_bytes": meta["keys_bytes"] + len(lines),
+            })
+            atomic_write_json(self.vectors_dir / self.META_FILE, meta)
+
+            self._grow(self._rows + len(records))
+            self._matrix[self._rows:self._rows + len(records)] = vectors
+            for record in records:
+                self._track(record)
+            self._version = self._meta_version()
+
+        logger.debug(f"Appended {len(records)} row(s) to vector index")
+        return len(records)
+
+    def add_reports(self, reports: Iterable[Tuple[str, str, str, Dict[str, Any]]]) -> int:
+        """
+        Index the sections of reports, replacing earlier rows of the same reports.
+
+        Args:
+            reports: (ticker, date, file_path, report) tuples
+
+        Returns:
+            Number of sections indexed
+        """
+        items = []
+        count = 0
+        with self._lock:
+            self._ensure_loaded()
+            for ticker, date, file_path, report in reports:
+                records = section_records(ticker, date, file_path, report)
+                keys = {record["key"] for record, _ in records}
+                # Sections the new version no longer has
+                stale = self._doc_sections.get(f"{ticker}/{date}", set()) - keys
+                items.extend(({"key": key, "kind": SECTION_KIND, "ticker": ticker, "date": date}, None)
+                             for key in sorted(stale))
+                items.extend(records)
+                count += len(records)
+            self.add(items)
+        return count
+
+    def sync_nodes(self, nodes: Dict[str, Tuple[int, Dict[str, Any]]], node_text) -> int:
+        """
+        Bring node rows in line with the index graph: embed new or changed nodes, drop deleted ones.
+
+        Args:
+            nodes: Relative node path to (version, node), as returned by IndexGraph.entries
+            node_text: Function returning the text of a node to embed
+
+        Returns:
+            Number of rows appended
+        """
+        with self._lock:
+            self._ensure_loaded()
+            items = []
+            for relative_path, (version, node) in nodes.items():
+                key = f"{NODE_KIND}:{relative_path}"
+                row = self._row_of.get(key)
+                if row is not None and self._records[row].get("version") == version:
+                    continue
+                items.append(({"key": key, "kind": NODE_KIND, "node_path": relative_path,
+                               "node_type": node.get("node_type"), "version": version}, node_text(node)))
+            for key, row in list(self._row_of.items()):
+                record = self._records[row]
+                if record["kind"] == NODE_KIND and record["node_path"] not in nodes:
+                    items.append(({"key": key, "kind": NODE_KIND, "node_path": record["node_path"]}, None))
+            return self.add(items)
+
+    def search(
+        self,
+        query: str,
+        top_k: int = 10,
+        kind: Optional[str] = None,
+        accept=None
+    ) -> List[Tuple[Dict[str, Any], float]]:
+        """
+        Return the rows most similar to a query by cosine similarity.
+
+        Args:
+            query: Query text
+            top_k: Maximum number of results
+            kind: Only rows of this kind ("node" or "section")
+            accept: Optional predicate on a row's record for further filtering
+
+        Returns:
+            (record, score) pairs, best first
+        """
+        query_vector = self.embedder.embed([query])[0]
+        if not query_vector.any():
+            return []
+
+        with self._lock:
+            self._ensure_loaded()
+            rows = self._rows
+            scores = self._matrix[:rows] @ query_vector
+            mask = self._live[:rows]
+            if kind:
+                mask = mask & (self._is_section[:rows] == (kind == SECTION_KIND))
+            candidates = np.flatnonzero(mask)
+            records = self._records
+
+        if not len(candidates):
+            return []
+
+        # Partial sort first; fall back to a full sort if filters reject too many rows
+        results = []
+        wanted = min(len(candidates), top_k * 4 if accept else top_k)
+        while True:
+            top = candidates[np.argpartition(-scores[candidates], wanted - 1)[:wanted]]
+            top = top[np.argsort(-scores[top], kind="stable")]
+            results = [(records[r], float(scores[r])) for r in top if not accept or accept(records[r])]
+            if len(results) >= top_k or wanted == len(candidates):
+                break
+            wanted = len(candidates)
+        return [(record, score) for record, score in results[:top_k] if score > 0]
+
+    def rebuild(self, reports: Iterable[Tuple[str, str, str, Dict[str, Any]]]) -> int:
+        """
+        Discard the index and rebuild the report section rows (node rows are re-synced on the next node search).
+
+        Args:
+            reports: (ticker, date, file_path, report) tuples
+
+        Returns:
+            Number of sections indexed
+        """
+        with self._lock:
+            if self.vectors_dir.exists():
+                shutil.rmtree(self.vectors_dir)
+            self._reset_memory()
+            self._version = None
+            count = 0
+            batch = []
+            for report in reports:
+                batch.append(report)
+                if len(batch) >= EMBED_BATCH_SIZE:
+                    count += self.add_reports(batch)
+                    batch = []
+            count += self.add_reports(batch)
+
+            # Mark the section rows complete (also creates an empty index for an empty KB)
+            meta = self._load_meta()
+            meta["sections_built"] = True
+            self.vectors_dir.mkdir(parents=True, exist_ok=True)
+            atomic_write_json(self.vectors_dir / self.META_FILE, meta)
+            self._version = self._meta_version()
+        logger.info(f"Rebuilt vector index ({count} sections, model {self.embedder.name})")
+        return count
+
+    def compact(self) -> int:
+        """
+        Rewrite the index keeping only live rows.
+
+        Returns:
+            Number of rows dropped
+        """
+        with self._lock:
+            self._ensure_loaded()
+            live = np.flatnonzero(self._live[:self._rows])
+            dropped = self._rows - len(live)
+            if not dropped:
+                return 0
+
+            staging = self.vectors_dir.with_name("vectors.compact")
+            if staging.exists():
+                shutil.rmtree(staging)
+            staging.mkdir(parents=True)
+            self._matrix[live].astype("<f4").tofile(staging / self.VECTORS_FILE)
+            lines = b"".join(
+                json.dumps(self._records[r], ensure_ascii=False).encode("utf-8") + b"\n" for r in live
+            )
+            with open(staging / self.KEYS_FILE, "wb") as f:
+                f.write(lines)
+            meta = self._load_meta()
+            meta.update({"rows": int(len(live)), "keys_bytes": len(lines)})
+            atomic_write_json(staging / self.META_FILE, meta)
+
+            backup = self.vectors_dir.with_name("vectors.old")
+            if backup.exists():
+                shutil.rmtree(backup)
+            os.replace(self.vectors_dir, backup)
+            os.replace(staging, self.vectors_dir)
+            shutil.rmtree(backup)
+            self._version = None
+
+        logger.info(f"Compacted vector index, dropped {dropped} superseded row(s)")
+        return dropped
+
+    def stats(self) -> Dict[str, Any]:
+        """Return row counts and the embedding model."""
+        with self._lock:
+            self._ensure_loaded()
+            live = [self._records[r]["kind"] for r in np.flatnonzero(self._live[:self._rows])]
+            return {
+                "model": self.embedder.name,
+                "dim": self.embedder.dim,
+                "rows": self._rows,
+                "live_nodes": live.count(NODE_KIND),
+                "live_sections": live.count(SECTION_KIND),
+            }
+
+
+_indexes: Dict[str, VectorIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_vector_index(knowledge_base_dir: Path) -> VectorIndex:
+    """
+    Return the process-wide vector index of a knowledge base.
+
+    Report Tools and Index Tools share one instance (and one in-memory matrix)
+    per knowledge base.
+
+    Raises:
+        ImportError: If numpy is not installed
+    """
+    key = os.path.realpath(knowledge_base_dir)
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = _indexes[key] = VectorIndex(Path(knowledge_base_dir))
+        return index